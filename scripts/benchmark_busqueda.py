@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Búsqueda Interactiva
+=================================
+Mide, sobre un catálogo sintético de IDs jerárquicos, la latencia por consulta
+de los índices en memoria que usa el menú de `gee_search.py`: búsqueda
+aproximada por trigramas (consultas con errores de tipeo), sugerencias de ID,
+navegación por prefijos y filtro por rango de fechas.
+
+Uso:
+    python scripts/benchmark_busqueda.py            # 100.000 colecciones
+    python scripts/benchmark_busqueda.py 300000
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.gee_toolkit.search_index import ArbolPrefijos, IndiceTemporal, IndiceTrigramas
+
+PROVEEDORES = ['COPERNICUS', 'MODIS', 'LANDSAT', 'NASA', 'NOAA', 'JAXA', 'ECMWF', 'USGS', 'FAO', 'JRC']
+PRODUCTOS = ['S2_SR_HARMONIZED', 'MOD13Q1', 'LC08_C02_T1_L2', 'GPM_IMERG', 'CHIRPS_DAILY', 'ERA5_LAND',
+             'GSMAP_OPERATIONAL', 'WAPOR_AETI', 'S5P_OFFL_NO2', 'VIIRS_DNB', 'GLDAS_NOAH', 'SRTM_DEM']
+NOMBRES = ['Surface Reflectance', 'Vegetation Indices', 'Precipitation', 'Land Surface Temperature',
+           'Nitrogen Dioxide', 'Evapotranspiration', 'Night Lights', 'Elevation']
+
+CONSULTAS_APROXIMADAS = ['sentinl', 'S2_SR_HARMONISED', 'precipitacion', 'landsta 8', 'chirps dayli', 'modis ndvi']
+
+
+def generar_ids(n: int, semilla: int = 42):
+    rng = random.Random(semilla)
+    for i in range(n):
+        proveedor = rng.choice(PROVEEDORES)
+        cid = f"{proveedor}/V{rng.randint(1, 9):03d}/{rng.choice(PRODUCTOS)}_{i}"
+        anio = rng.randint(1980, 2020)
+        registro = {
+            'nombre': f"{proveedor.title()} {rng.choice(NOMBRES)} {i}",
+            'temporal': f"{anio}-presente" if i % 3 else f"{anio}-{anio + rng.randint(0, 10)}",
+        }
+        yield cid, registro
+
+
+def medir_consultas(etiqueta: str, consultas, func):
+    tiempos = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        func(consulta)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"  {etiqueta:<38} p50 {statistics.median(tiempos):8.2f} ms   máx {max(tiempos):8.2f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    colecciones = list(generar_ids(n))
+
+    print("\n" + "="*70)
+    print(f"BENCHMARK DE BÚSQUEDA INTERACTIVA ({n:,} colecciones)")
+    print("="*70)
+
+    arbol, temporal = ArbolPrefijos(), IndiceTemporal()
+    inicio = time.perf_counter()
+    for cid, registro in colecciones:
+        arbol.agregar(cid)
+        temporal.actualizar(cid, registro)
+    print(f"\nIndexación al cargar (prefijos y períodos): {time.perf_counter() - inicio:.2f} s")
+
+    # Los trigramas se arman recién en la primera búsqueda aproximada
+    trigramas, trigramas_id = IndiceTrigramas(), IndiceTrigramas()
+    inicio = time.perf_counter()
+    for cid, registro in colecciones:
+        trigramas.agregar(cid, f"{cid} {registro['nombre']}")
+        trigramas_id.agregar(cid, cid)
+    print(f"Indexación de trigramas (primer uso):        {time.perf_counter() - inicio:.2f} s")
+
+    rng = random.Random(7)
+    originales = [cid for cid, _ in rng.sample(colecciones, 50)]
+    ids_con_error = []
+    for cid in originales:
+        i = rng.randrange(len(cid))
+        ids_con_error.append(cid[:i] + cid[i + 1:])  # un carácter menos
+
+    print("\nLatencia por consulta:")
+    medir_consultas("Búsqueda aproximada (ID + nombre)", CONSULTAS_APROXIMADAS * 5,
+                    lambda q: trigramas.buscar(q, 20))
+    medir_consultas("Sugerencias de ID (un carácter menos)", ids_con_error,
+                    lambda q: trigramas_id.buscar(q, 5, 0.6, completo=True))
+    medir_consultas("Nivel de la jerarquía de IDs", PROVEEDORES * 5,
+                    lambda q: arbol.hijos(q))
+    temporal.superpuestas('2000-01-01', '2000-12-31')  # primera consulta: arma el IntervalIndex
+    medir_consultas("Colecciones en rango de fechas", [f"{a}-01-01" for a in range(1990, 2025)],
+                    lambda q: temporal.superpuestas(q, q[:4] + '-12-31'))
+
+    aciertos = sum(original in [c for c, _ in trigramas_id.buscar(q, 5, 0.6, completo=True)]
+                   for q, original in zip(ids_con_error, originales))
+    print(f"\n[OK] El ID correcto aparece entre las sugerencias en {aciertos}/{len(originales)} casos.")
+
+
+if __name__ == '__main__':
+    main()
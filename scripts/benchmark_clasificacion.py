@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Motor de Clasificación
+====================================
+Compara la clasificación por categoría y nivel de procesamiento basada en
+reglas compiladas (src/gee_toolkit/classification.py) con la implementación
+anterior de chequeos `in` encadenados, sobre un catálogo sintético.
+
+Verifica además que ambas den exactamente el mismo resultado.
+
+Uso:
+    python scripts/benchmark_clasificacion.py            # 50.000 IDs
+    python scripts/benchmark_clasificacion.py 200000
+"""
+
+import sys
+import random
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Agregar el directorio raíz al path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.gee_toolkit.classification import CLASIFICADOR_CATEGORIA, CLASIFICADOR_NIVEL
+
+
+# --- Implementación anterior (referencia) -----------------------------------
+
+def categoria_referencia(collection_id: str, metadata: dict) -> str:
+    cid = collection_id.upper()
+    nombre = metadata.get('nombre', '').upper()
+    desc = str(metadata.get('descripcion', '')).upper()
+    texto = f"{cid} {nombre} {desc}"
+
+    if any(x in cid for x in ['S5P', 'TROPOMI']) or any(x in texto for x in ['NO2', 'CO', 'O3', 'SO2', 'CH4', 'ATMOSPHERE']):
+        return 'atmosfera'
+    if any(x in cid for x in ['HYCOM', 'GSW', 'OCEANDATA']) or any(x in texto for x in ['WATER', 'OCEAN', 'SST', 'HYDRO']):
+        return 'agua'
+    if any(x in cid for x in ['GEDI', 'HANSEN', 'GLAD']) or any(x in texto for x in ['FOREST', 'BIOMASS', 'CANOPY', 'TREE']):
+        return 'lidar_biomasa'
+    if any(x in cid for x in ['FAO', 'WAPOR']) or any(x in texto for x in ['CROP', 'AGRICULTURE', 'YIELD']):
+        return 'agricultura'
+    if any(x in cid for x in ['ISDASOIL', 'OPENLANDMAP']) or 'SOIL' in texto:
+        return 'suelos'
+    if any(x in cid for x in ['FIRMS', 'FIRE', 'MCD64']) or 'BURNED' in texto:
+        return 'fuego'
+    if 'SNOW' in texto or 'ICE' in texto or 'CRYOSPHERE' in texto:
+        return 'criosphere'
+    if any(x in cid for x in ['WORLDCOVER', 'CORINE', 'NLCD', 'DYNAMICWORLD']):
+        return 'landcover'
+    if any(x in cid for x in ['DEM', 'SRTM', 'ELEVATION']):
+        return 'elevacion'
+    if 'SAR' in texto or 'SENTINEL-1' in cid:
+        return 'sar'
+    if any(x in cid for x in ['ERA5', 'CHIRPS', 'GPM', 'CLIMATE']):
+        return 'clima'
+    if any(x in cid for x in ['MOD13', 'NDVI', 'EVI']):
+        return 'vegetacion'
+    if any(x in cid for x in ['WORLDPOP', 'GPW', 'URBAN']):
+        return 'poblacion'
+    return 'clima'
+
+
+def nivel_referencia(collection_id: str) -> str:
+    cid = collection_id.upper()
+    if 'S2_SR' in cid or 'L2A' in cid: return 'L2A'
+    if 'S2_HARMONIZED' in cid and 'SR' not in cid: return 'L1C'
+    if 'COPERNICUS/S2' in cid and 'SR' not in cid: return 'L1C'
+    if 'S1_GRD' in cid: return 'L1_GRD'
+    if 'S5P' in cid: return 'L2 (Atmosférico)'
+    if 'C02/T1_L2' in cid or 'C02/T2_L2' in cid: return 'L2'
+    if 'C02/T1_TOA' in cid or 'C02/T2_TOA' in cid: return 'TOA'
+    if 'C02/T1_RT' in cid: return 'RAW'
+    if 'C02/T1' in cid or 'C02/T2' in cid: return 'L1 (DN)'
+    if any(x in cid for x in ['MOD09', 'MYD09', 'MCD09']):
+        if 'GA' in cid: return 'L2G'
+        return 'L3' if 'A1' in cid else 'L2'
+    return 'No especificado'
+
+
+# --- Catálogo sintético ------------------------------------------------------
+
+PROVEEDORES = ['COPERNICUS', 'LANDSAT', 'MODIS/061', 'NASA', 'ECMWF', 'USGS', 'JAXA', 'ESA', 'NOAA', 'JRC',
+               'LARSE/GEDI', 'FAO/WAPOR/3', 'WRI', 'GOOGLE', 'UCSB-CHG', 'projects/sat-io/open-datasets']
+PRODUCTOS = ['S2_SR_HARMONIZED', 'S2_HARMONIZED', 'S1_GRD', 'S5P/OFFL/L3_NO2', 'LC09/C02/T1_L2', 'LC08/C02/T1_TOA',
+             'LE07/C02/T1_RT', 'LT05/C02/T2', 'MOD09GA', 'MYD09A1', 'MOD13Q1', 'MCD64A1', 'ERA5_LAND/DAILY_AGGR',
+             'CHIRPS/DAILY', 'GPM_L3/IMERG_V07', 'WORLDCOVER/v200', 'SRTMGL1_003', 'GSW1_4/MonthlyHistory',
+             'HANSEN/GFC2023', 'FIRMS', 'WORLDPOP/GP/100m', 'OPENLANDMAP/SOL', 'DYNAMICWORLD/V1', 'GLDAS/NOAH']
+NOMBRES = ['Surface Reflectance', 'Top of Atmosphere', 'Global Forest Change', 'Ocean Color', 'Snow Cover',
+           'Burned Area Monthly', 'Crop Yield', 'Soil Moisture', 'SAR Backscatter', 'Vegetation Indices',
+           'Daily Precipitation', 'Land Cover', 'Night Lights', 'Elevation Model', '']
+
+
+def generar_catalogo(n: int, semilla: int = 42) -> pd.DataFrame:
+    rng = random.Random(semilla)
+    filas = []
+    for i in range(n):
+        cid = f"{rng.choice(PROVEEDORES)}/{rng.choice(PRODUCTOS)}"
+        if rng.random() < 0.5:
+            cid += f"_V{i}"
+        filas.append({'collection_id': cid, 'nombre': rng.choice(NOMBRES), 'descripcion': ''})
+    return pd.DataFrame(filas)
+
+
+def medir(etiqueta: str, func):
+    inicio = time.perf_counter()
+    resultado = func()
+    duracion = time.perf_counter() - inicio
+    print(f"  {etiqueta:<38} {duracion * 1000:10.1f} ms")
+    return resultado, duracion
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = generar_catalogo(n)
+    registros = df.to_dict('records')
+    textos = df['collection_id'] + ' ' + df['nombre'] + ' ' + df['descripcion']
+
+    print("\n" + "="*70)
+    print(f"BENCHMARK DE CLASIFICACIÓN ({n:,} IDs sintéticos)")
+    print("="*70)
+
+    print("\nCategoría:")
+    ref_cat, t_ref = medir("Referencia (chequeos `in`)",
+                           lambda: [categoria_referencia(r['collection_id'], r) for r in registros])
+    uno_cat, t_uno = medir("Reglas compiladas (por ID)",
+                           lambda: [CLASIFICADOR_CATEGORIA.clasificar(r['collection_id'], t)
+                                    for r, t in zip(registros, textos)])
+    lote_cat, t_lote = medir("Reglas compiladas (lote)",
+                             lambda: CLASIFICADOR_CATEGORIA.clasificar_lote(df['collection_id'], textos))
+    print(f"  Aceleración: x{t_ref / t_uno:.1f} por ID, x{t_ref / t_lote:.1f} en lote")
+    assert ref_cat == uno_cat == list(lote_cat), "Las categorías no coinciden con la referencia"
+
+    print("\nNivel de procesamiento:")
+    ref_niv, t_ref = medir("Referencia (chequeos `in`)",
+                           lambda: [nivel_referencia(cid) for cid in df['collection_id']])
+    uno_niv, t_uno = medir("Reglas compiladas (por ID)",
+                           lambda: [CLASIFICADOR_NIVEL.clasificar(cid) for cid in df['collection_id']])
+    # Segunda pasada sobre los mismos IDs (ej: revalidaciones sucesivas): memo por ID
+    repetido_niv, t_repetido = medir("Reglas compiladas (por ID, repetido)",
+                                     lambda: [CLASIFICADOR_NIVEL.clasificar(cid) for cid in df['collection_id']])
+    lote_niv, t_lote = medir("Reglas compiladas (lote)",
+                             lambda: CLASIFICADOR_NIVEL.clasificar_lote(df['collection_id']))
+    print(f"  Aceleración: x{t_ref / t_uno:.1f} por ID, x{t_ref / t_repetido:.1f} por ID repetido, "
+          f"x{t_ref / t_lote:.1f} en lote")
+    assert ref_niv == uno_niv == repetido_niv == list(lote_niv), "Los niveles no coinciden con la referencia"
+
+    print("\n[OK] Resultados idénticos a la implementación de referencia.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Memoria del Catálogo
+=================================
+Compara la memoria de un catálogo sintético con registros dict (como salen de
+`json.loads`) contra registros compactos (src/gee_toolkit/records.py), y el
+tiempo de cargarlo desde JSON y desde el snapshot binario.
+
+Verifica además que el JSON escrito desde los registros compactos sea idéntico
+al original.
+
+Uso:
+    python scripts/benchmark_memoria.py            # 100.000 colecciones
+    python scripts/benchmark_memoria.py 300000
+"""
+
+import gc
+import io
+import json
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.gee_toolkit.records import catalogo_plano, compactar_catalogo
+from src.gee_toolkit.snapshot import _Cargador
+
+
+# --- Catálogo sintético ------------------------------------------------------
+
+CATEGORIAS = ['opticas_alta_res', 'vegetacion', 'clima', 'agua', 'sar', 'landcover', 'elevacion',
+              'atmosfera', 'fuego', 'suelos', 'agricultura', 'poblacion', 'lidar_biomasa']
+NIVELES = ['L2A', 'L1C', 'L1_GRD', 'L2', 'TOA', 'L3', 'No especificado', 'L2 (Atmosférico)']
+RESOLUCIONES = ['10m', '30m', '250m', '500m', '1km', '0.1°', '11km', 'No especificado']
+TEMPORALES = ['2015-presente', '2000-presente', '1984-2012', 'Consultar en GEE', '2017-06 a Presente']
+BANDAS = [['B2', 'B3', 'B4', 'B8'], ['SR_B2', 'SR_B3', 'SR_B4', 'SR_B5', 'SR_B6', 'SR_B7'], ['VV', 'VH'],
+          ['NDVI', 'EVI'], ['precipitation'], ['temperature_2m', 'total_precipitation'], ['elevation'], []]
+
+
+def generar_catalogo_json(n: int, semilla: int = 42) -> bytes:
+    rng = random.Random(semilla)
+    catalogo = {'_metadata': {'version': '2.2.0', 'cache_duration_days': 30}}
+    for cat in CATEGORIAS:
+        catalogo[cat] = {'nombre': cat.replace('_', ' ').title(), 'colecciones': {}}
+    for i in range(n):
+        registro = {
+            'nombre': f"Dataset sintético {i}",
+            'bandas_principales': list(rng.choice(BANDAS)),
+            'tipo': rng.choice(['ImageCollection', 'Image']),
+            'last_verified': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:{i % 60:02d}",
+            'nivel': rng.choice(NIVELES),
+            'resolucion': rng.choice(RESOLUCIONES),
+            'temporal': rng.choice(TEMPORALES),
+        }
+        if rng.random() < 0.1:
+            registro['sensor_type'] = rng.choice(['optical', 'sar', 'model'])
+        catalogo[rng.choice(CATEGORIAS)]['colecciones'][f"PROV{i % 97}/PRODUCTO_{i}"] = registro
+    return json.dumps(catalogo, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def medir_memoria(etiqueta: str, func):
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = func()
+    duracion = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {etiqueta:<38} {memoria / 2**20:9.1f} MB {duracion * 1000:10.1f} ms")
+    return resultado, memoria
+
+
+def medir(etiqueta: str, func):
+    inicio = time.perf_counter()
+    resultado = func()
+    duracion = time.perf_counter() - inicio
+    print(f"  {etiqueta:<38} {duracion * 1000:10.1f} ms")
+    return resultado, duracion
+
+
+def cargar_compacto(contenido: bytes):
+    catalogo = json.loads(contenido)
+    compactar_catalogo(catalogo)
+    return catalogo
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    contenido = generar_catalogo_json(n)
+
+    print("\n" + "="*70)
+    print(f"BENCHMARK DE MEMORIA DEL CATÁLOGO ({n:,} colecciones, JSON de {len(contenido) / 2**20:.1f} MB)")
+    print("="*70)
+
+    print("\nMemoria del catálogo cargado desde JSON:")
+    dicts, m_dict = medir_memoria("Registros dict", lambda: json.loads(contenido))
+    compacto, m_comp = medir_memoria("Registros compactos", lambda: cargar_compacto(contenido))
+    print(f"  Reducción: {(1 - m_comp / m_dict) * 100:.0f}% ({m_dict / n:.0f} -> {m_comp / n:.0f} bytes por colección)")
+
+    print("\nSnapshot binario:")
+    snap_dict = pickle.dumps(dicts, protocol=pickle.HIGHEST_PROTOCOL)
+    snap_comp = pickle.dumps(compacto, protocol=pickle.HIGHEST_PROTOCOL)
+    medir(f"Carga registros dict ({len(snap_dict) / 2**20:.1f} MB)",
+          lambda: _Cargador(io.BytesIO(snap_dict)).load())
+    medir(f"Carga registros compactos ({len(snap_comp) / 2**20:.1f} MB)",
+          lambda: _Cargador(io.BytesIO(snap_comp)).load())
+
+    print("\nEscritura JSON:")
+    medir("Registros dict", lambda: json.dumps(dicts, indent=2, ensure_ascii=False).encode('utf-8'))
+    escrito, _ = medir("Registros compactos",
+                       lambda: json.dumps(catalogo_plano(compacto), indent=2, ensure_ascii=False).encode('utf-8'))
+    assert json.loads(escrito) == dicts, "El JSON escrito no coincide con el original"
+
+    print("\n[OK] El JSON escrito desde registros compactos es idéntico al original.")
+
+
+if __name__ == '__main__':
+    main()
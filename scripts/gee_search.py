@@ -12,6 +12,7 @@ Características:
     - Filtrado por fechas y porcentaje de nubes
     - Análisis de cobertura temporal
     - Exportación a CSV
+    - Comparación de varias colecciones sobre la misma área
     - Exploración interactiva del catálogo
 
 Uso:
@@ -34,8 +35,18 @@ from src.gee_toolkit.config import get_project_id
 from src.gee_toolkit.auth_utils import initialize_gee
 from src.gee_toolkit.catalog import CatalogoGEE
 from src.gee_toolkit.colecciones_config import get_descripcion_filtro
-from src.gee_toolkit.geo_utils import cargar_geojson
-from src.gee_toolkit.analysis import analizar_cobertura_temporal
+from src.gee_toolkit.geo_utils import CAMPO_ID_DEFECTO, cargar_geojson, features_ee
+from src.gee_toolkit.analysis import (
+    analizar_cobertura_por_feature, analizar_cobertura_temporal, comparar_colecciones
+)
+
+# Sensores que se suelen comparar sobre una misma área
+COLECCIONES_COMPARACION = (
+    'COPERNICUS/S2_SR_HARMONIZED',
+    'LANDSAT/LC08/C02/T1_L2',
+    'LANDSAT/LC09/C02/T1_L2',
+    'COPERNICUS/S1_GRD',
+)
 
 
 def menu_interactivo():
@@ -50,12 +61,42 @@ Opciones:
 3. Listar niveles de procesamiento disponibles
 4. Buscar colecciones por nivel de procesamiento
 5. Salir
+6. Comparar disponibilidad de varias colecciones en un área
 """)
     
-    opcion = input("Selecciona opción (1-5): ").strip()
+    opcion = input("Selecciona opción (1-6): ").strip()
     return opcion
 
 
+def seleccionar_geojson():
+    """Lista los GeoJSON de data/geojson/ y pide elegir uno. Devuelve la ruta o None."""
+    geojson_dir = Path('data/geojson')
+    geojson_files = sorted(list(geojson_dir.glob('*.geojson')))
+    
+    if not geojson_files:
+        print(f"\n[ERROR] No se encontraron archivos .geojson en {geojson_dir}")
+        print("       Por favor, coloca tus archivos de área en la carpeta 'data/geojson/'")
+        input("Presiona Enter para volver...")
+        return None
+
+    print("\n" + "-"*50)
+    print("SELECCIÓN DE ÁREA DE ESTUDIO")
+    print("-"*50)
+    print(f"Archivos encontrados en {geojson_dir}:")
+    
+    for i, f in enumerate(geojson_files, 1):
+        print(f"  {i}. {f.name}")
+    
+    sel_geo = input("\nSelecciona número de archivo: ").strip()
+    if not sel_geo.isdigit() or int(sel_geo) < 1 or int(sel_geo) > len(geojson_files):
+        print("[ERROR] Selección inválida.")
+        return None
+        
+    ruta_geojson = geojson_files[int(sel_geo)-1]
+    print(f"[OK] Archivo seleccionado: {ruta_geojson}")
+    return ruta_geojson
+
+
 def main():
     """Función principal."""
     # Inicializar GEE usando utilidades robustas
@@ -78,7 +119,9 @@ def main():
         )
         return
     
-    # Menú interactivo
+    # Menú interactivo. El catálogo se carga una vez y se comparte entre
+    # acciones para reutilizar su inventario e índices en memoria.
+    catalogo = None
     while True:
         opcion = menu_interactivo()
         
@@ -115,7 +158,8 @@ def main():
             
             # 1. Mostrar catálogo y seleccionar colección
             print("\n[INFO] Cargando catálogo de colecciones...")
-            catalogo = CatalogoGEE(project_id=get_project_id())
+            if catalogo is None:
+                catalogo = CatalogoGEE(project_id=get_project_id())
             df_catalogo = catalogo.generar_inventario_completo(exportar_csv=False)
             
             # Filtrar solo colecciones con ImageCollection (no DEM estáticos)
@@ -124,14 +168,36 @@ def main():
             ].copy()
             
             print(f"\n[OK] {len(colecciones_validas)} colecciones disponibles para búsqueda temporal")
+            
+            # Rango de interés opcional: ofrecer solo colecciones con cobertura en esas fechas
+            rango = input("\nRango de fechas de interés (YYYY-MM-DD YYYY-MM-DD, Enter = sin filtro): ").split()
+            rango_inicio = rango_fin = None
+            ids_en_rango = None
+            if len(rango) == 2:
+                try:
+                    rango_inicio, rango_fin = (datetime.strptime(f, '%Y-%m-%d').strftime('%Y-%m-%d') for f in rango)
+                except ValueError:
+                    print("[WARN] Formato de fechas inválido, se muestran todas las colecciones")
+            elif rango:
+                print("[WARN] Se esperaban dos fechas, se muestran todas las colecciones")
+            if rango_inicio and rango_inicio > rango_fin:
+                print("[WARN] La fecha de inicio es posterior a la de fin, se muestran todas las colecciones")
+                rango_inicio = rango_fin = None
+            if rango_inicio:
+                ids_en_rango = catalogo.colecciones_en_rango(rango_inicio, rango_fin)
+                total_previo = len(colecciones_validas)
+                colecciones_validas = colecciones_validas[colecciones_validas['collection_id'].isin(ids_en_rango)]
+                print(f"[OK] {len(colecciones_validas)} colecciones con datos entre {rango_inicio} y {rango_fin} "
+                      f"({total_previo - len(colecciones_validas)} fuera de rango ocultas)")
             print("\nOpciones de búsqueda:")
             print("  1. Filtrar por nombre o ID (ej: 'sentinel', 'landsat')")
             print("  2. Buscar por categoría")
             print("  3. Buscar por nivel de procesamiento")
             print("  4. Ver lista completa (paginada)")
             print("  5. Ingresar ID directamente (si ya lo conoces)")
+            print("  6. Explorar por proveedor (ej: MODIS > 061 > MOD13Q1)")
             
-            busqueda_opcion = input("\nSelecciona opción (1-5): ").strip()
+            busqueda_opcion = input("\nSelecciona opción (1-6): ").strip()
             
             collection_id = None
             col_info = None
@@ -143,10 +209,24 @@ def main():
                     print("[INFO] Búsqueda cancelada")
                     continue
                 
-                resultados = colecciones_validas[
-                    colecciones_validas['collection_id'].str.contains(filtro, case=False, na=False) |
-                    colecciones_validas['nombre'].str.contains(filtro, case=False, na=False)
-                ].reset_index(drop=True)
+                # Índice invertido (ordenado por relevancia); si no hay coincidencias
+                # por término se recurre a la búsqueda por subcadena
+                ids_rankeados = [cid for cid, _ in catalogo.buscar_texto(filtro, limit=0)]
+                if ids_rankeados:
+                    resultados = colecciones_validas.set_index('collection_id', drop=False) \
+                        .reindex(ids_rankeados).dropna(subset=['collection_id']).reset_index(drop=True)
+                else:
+                    resultados = colecciones_validas[
+                        colecciones_validas['collection_id'].str.contains(filtro, case=False, na=False, regex=False) |
+                        colecciones_validas['nombre'].str.contains(filtro, case=False, na=False, regex=False)
+                    ].reset_index(drop=True)
+                if len(resultados) == 0:
+                    # Sin coincidencias exactas: probar con búsqueda tolerante a errores de tipeo
+                    ids_aproximados = [cid for cid, _ in catalogo.buscar_aproximado(filtro, limit=20)]
+                    resultados = colecciones_validas.set_index('collection_id', drop=False) \
+                        .reindex(ids_aproximados).dropna(subset=['collection_id']).reset_index(drop=True)
+                    if len(resultados) > 0:
+                        print(f"[INFO] Sin coincidencias exactas para '{filtro}'; resultados aproximados:")
                 
                 if len(resultados) == 0:
                     print(f"[INFO] No se encontraron colecciones con '{filtro}'")
@@ -217,7 +297,10 @@ def main():
                 niveles_df = catalogo.listar_niveles_disponibles()
                 nivel = input("\nNivel de procesamiento (ej: L2A, TOA, L1C): ").strip().upper()
                 
-                resultados = catalogo.buscar_por_nivel_procesamiento(nivel).reset_index(drop=True)
+                resultados = catalogo.buscar_por_nivel_procesamiento(nivel)
+                if ids_en_rango is not None:
+                    resultados = resultados[resultados['collection_id'].isin(ids_en_rango)]
+                resultados = resultados.reset_index(drop=True)
                 if len(resultados) > 0:
                     print(f"\n[OK] {len(resultados)} colecciones con nivel '{nivel}':")
                     num_seleccion = None
@@ -283,36 +366,70 @@ def main():
                     print("[INFO] Selección cancelada")
                     continue
                 
-                matches = colecciones_validas[colecciones_validas['collection_id'] == collection_id]
-                if len(matches) > 0:
-                    col_info = matches.iloc[0]
+                sugerencias = catalogo.sugerir_ids(collection_id)
+                if sugerencias:
+                    print(f"[INFO] '{collection_id}' no está en el catálogo. ¿Quisiste decir...?")
+                    for i, cid in enumerate(sugerencias, 1):
+                        print(f"  {i}. {cid}")
+                    ans = input("\nNúmero de sugerencia (o Enter para usar el ID ingresado): ").strip()
+                    if ans.isdigit() and 1 <= int(ans) <= len(sugerencias):
+                        collection_id = sugerencias[int(ans) - 1]
+            
+            elif busqueda_opcion == '6':
+                # Navegar la jerarquía de IDs: cada nivel sale del árbol de prefijos del catálogo
+                prefijo = ''
+                while not collection_id:
+                    nivel_ids = catalogo.explorar_prefijo(prefijo)
+                    print("\n" + "="*70)
+                    print(f"{prefijo or 'PROVEEDORES'} ({catalogo.contar_prefijo(prefijo)} colecciones)")
+                    print("="*70)
+                    for i, (ruta, total, es_coleccion) in enumerate(nivel_ids, 1):
+                        segmento = ruta.rsplit('/', 1)[-1]
+                        if es_coleccion and total == 1:
+                            print(f"  {i}. {segmento}")
+                        else:
+                            marca = " + colección" if es_coleccion else ""
+                            print(f"  {i}. {segmento}/ ({total}{marca})")
+                    
+                    ans = input("\nNúmero para abrir, '..' para subir o Enter para cancelar: ").strip()
+                    if ans == '..':
+                        prefijo = prefijo.rpartition('/')[0]
+                    elif ans.isdigit() and 1 <= int(ans) <= len(nivel_ids):
+                        ruta, total, es_coleccion = nivel_ids[int(ans) - 1]
+                        if es_coleccion and (total == 1 or input(
+                                f"¿Seleccionar {ruta}? (s = seleccionar, Enter = abrir): ").strip().lower() == 's'):
+                            collection_id = ruta
+                        else:
+                            prefijo = ruta
+                    else:
+                        break
             
             else:
                 print("[ERROR] Opción inválida")
                 continue
             
+            if collection_id and col_info is None:
+                matches = colecciones_validas[colecciones_validas['collection_id'] == collection_id]
+                if len(matches) > 0:
+                    col_info = matches.iloc[0]
+                elif ids_en_rango is not None and catalogo.periodo_coleccion(collection_id) is not None:
+                    print(f"[WARN] Según el catálogo, {collection_id} no tiene datos entre {rango_inicio} y {rango_fin}")
+            
             if not collection_id:
                 print("[INFO] No se seleccionó ninguna colección. Volviendo al menú principal...")
                 continue
             
-            # Extraer fechas default desde metadata si está disponible
+            # Fechas default: el rango pedido o, si no hay, el período parseado de la colección
             fecha_inicio_default = '2020-01-01'
             fecha_fin_default = datetime.now().strftime('%Y-%m-%d')
             
-            if col_info is not None and 'periodo_temporal' in col_info:
-                periodo = str(col_info['periodo_temporal'])
-                # Parsear "2017-presente" o "2000-2020"
-                if 'presente' in periodo.lower():
-                    parts = periodo.split('-')
-                    if len(parts) >= 2 and parts[0].isdigit():
-                        fecha_inicio_default = f"{parts[0]}-01-01"
-                elif '-' in periodo:
-                    parts = periodo.split('-')
-                    if len(parts) == 2:
-                        if parts[0].isdigit() and len(parts[0]) == 4:
-                            fecha_inicio_default = f"{parts[0]}-01-01"
-                        if parts[1].isdigit() and len(parts[1]) == 4:
-                            fecha_fin_default = f"{parts[1]}-12-31"
+            periodo = catalogo.periodo_coleccion(collection_id)
+            if rango_inicio:
+                fecha_inicio_default, fecha_fin_default = rango_inicio, rango_fin
+            elif periodo is not None:
+                fecha_inicio_default = periodo[0].isoformat()
+                if periodo[1] is not None:
+                    fecha_fin_default = periodo[1].isoformat()
             
             print(f"\n[OK] Colección seleccionada: {collection_id}")
             if col_info is not None:
@@ -325,30 +442,9 @@ def main():
             print(f"[INFO] {descripcion_filtro}")
             
             # 2. Seleccionar área GeoJSON (Auto-discovery)
-            geojson_dir = Path('data/geojson')
-            geojson_files = sorted(list(geojson_dir.glob('*.geojson')))
-            
-            if not geojson_files:
-                print(f"\n[ERROR] No se encontraron archivos .geojson en {geojson_dir}")
-                print("       Por favor, coloca tus archivos de área en la carpeta 'data/geojson/'")
-                input("Presiona Enter para volver...")
-                continue
-
-            print("\n" + "-"*50)
-            print("SELECCIÓN DE ÁREA DE ESTUDIO")
-            print("-"*50)
-            print(f"Archivos encontrados en {geojson_dir}:")
-            
-            for i, f in enumerate(geojson_files, 1):
-                print(f"  {i}. {f.name}")
-            
-            sel_geo = input("\nSelecciona número de archivo: ").strip()
-            if not sel_geo.isdigit() or int(sel_geo) < 1 or int(sel_geo) > len(geojson_files):
-                print("[ERROR] Selección inválida.")
+            ruta_geojson = seleccionar_geojson()
+            if ruta_geojson is None:
                 continue
-                
-            ruta_geojson = geojson_files[int(sel_geo)-1]
-            print(f"[OK] Archivo seleccionado: {ruta_geojson}")
             
             # 3. Fechas con defaults inteligentes
             fecha_inicio = input(f"Fecha inicio [default: {fecha_inicio_default}]: ").strip()
@@ -369,27 +465,65 @@ def main():
                 except ValueError:
                     print("[WARN] Valor inválido, usando 100%")
                     max_nubes = 100
-            
+
+            # 5. Modo: detalle por imagen (CSV) o solo estadísticas calculadas en GEE
+            print("\nModo de análisis:")
+            print("  1. Detalle por imagen + CSV (descarga las propiedades de cada imagen)")
+            print("  2. Solo resumen calculado en GEE (una petición, sin CSV)")
+            solo_resumen = input("Selecciona modo [default: 1]: ").strip() == '2'
+            por = 'anio'
+            if solo_resumen and input("¿Distribución por mes en lugar de por año? (s/N): ").strip().lower() == 's':
+                por = 'mes'
+            campos = None
+            if not solo_resumen:
+                texto_campos = input("Propiedades para el CSV, separadas por coma "
+                                     "(ej: MGRS_TILE,SPACECRAFT_NAME; Enter = todas): ").strip()
+                if texto_campos:
+                    campos = [c.strip() for c in texto_campos.split(',') if c.strip()]
+
             try:
-                geometry, _ = cargar_geojson(ruta_geojson)
+                geometry, gdf = cargar_geojson(ruta_geojson)
                 nombre_area = ruta_geojson.stem
                 
+                # Archivos con varias parcelas: conteo por feature en una sola petición
+                if len(gdf) > 1 and input(f"¿Analizar las {len(gdf)} features por separado "
+                                          f"(una petición, tabla por feature)? (s/N): ").strip().lower() == 's':
+                    atributos = [str(c) for c in gdf.columns if c != gdf.geometry.name]
+                    campo_id = input(f"Atributo identificador ({', '.join(atributos)}) "
+                                     f"[default: número de fila]: ").strip() or None
+                    features = features_ee(gdf, campo_id)
+                    analizar_cobertura_por_feature(
+                        collection_id=collection_id,
+                        features=features,
+                        nombre_area=nombre_area,
+                        fecha_inicio=fecha_inicio,
+                        fecha_fin=fecha_fin,
+                        max_nubes=max_nubes,
+                        campo_id=campo_id or CAMPO_ID_DEFECTO
+                    )
+                    input("\nPresiona Enter para continuar...")
+                    continue
+                
                 analizar_cobertura_temporal(
                     collection_id=collection_id,
                     geometry=geometry,
                     nombre_area=nombre_area,
                     fecha_inicio=fecha_inicio,
                     fecha_fin=fecha_fin,
-                    max_nubes=max_nubes
+                    max_nubes=max_nubes,
+                    solo_resumen=solo_resumen,
+                    por=por,
+                    campos=campos
                 )
             except Exception as e:
-                print(f"[ERROR] No se pudo cargar el GeoJSON: {e}")
+                print(f"[ERROR] No se pudo completar el análisis: {e}")
             
             input("\nPresiona Enter para continuar...")
         
         elif opcion == '3':
             # Listar niveles
-            catalogo = CatalogoGEE(project_id=get_project_id())
+            if catalogo is None:
+                catalogo = CatalogoGEE(project_id=get_project_id())
             catalogo.listar_niveles_disponibles()
             
             input("\nPresiona Enter para continuar...")
@@ -398,7 +532,8 @@ def main():
             # Buscar por nivel
             nivel = input("\nNivel de procesamiento (ej: L2A, TOA, L1C): ").strip()
             
-            catalogo = CatalogoGEE(project_id=get_project_id())
+            if catalogo is None:
+                catalogo = CatalogoGEE(project_id=get_project_id())
             resultados = catalogo.buscar_por_nivel_procesamiento(nivel)
             
             if len(resultados) > 0:
@@ -418,6 +553,49 @@ def main():
             print("\n¡Hasta luego!")
             break
         
+        elif opcion == '6':
+            # Comparación de colecciones sobre la misma área (búsquedas en paralelo)
+            print("\n" + "="*70)
+            print("COMPARACIÓN DE COLECCIONES EN UN ÁREA")
+            print("="*70)
+            print(f"Colecciones por defecto: {', '.join(COLECCIONES_COMPARACION)}")
+            texto_ids = input("\nIDs separados por coma [Enter = por defecto]: ").strip()
+            collection_ids = [c.strip() for c in texto_ids.split(',') if c.strip()] or list(COLECCIONES_COMPARACION)
+            
+            if catalogo is None:
+                catalogo = CatalogoGEE(project_id=get_project_id())
+            for cid in collection_ids:
+                sugerencias = catalogo.sugerir_ids(cid)
+                if sugerencias:
+                    print(f"[WARN] {cid} no está en el catálogo. ¿Quisiste decir: {', '.join(sugerencias[:3])}?")
+            
+            ruta_geojson = seleccionar_geojson()
+            if ruta_geojson is None:
+                continue
+            
+            fecha_inicio = input("Fecha inicio [default: 2020-01-01]: ").strip() or '2020-01-01'
+            fecha_fin = input("Fecha fin [default: 2024-12-31]: ").strip() or '2024-12-31'
+            try:
+                max_nubes = float(input("% nubes máximo [default: 100]: ").strip() or 100)
+            except ValueError:
+                print("[WARN] Valor inválido, usando 100%")
+                max_nubes = 100
+            
+            try:
+                geometry, _ = cargar_geojson(ruta_geojson)
+                comparar_colecciones(
+                    collection_ids=collection_ids,
+                    geometry=geometry,
+                    nombre_area=ruta_geojson.stem,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    max_nubes=max_nubes
+                )
+            except Exception as e:
+                print(f"[ERROR] No se pudo completar la comparación: {e}")
+            
+            input("\nPresiona Enter para continuar...")
+        
         else:
             print("\n[ERROR] Opción inválida")
 
@@ -24,40 +24,64 @@ def main():
     parser.add_argument('--discover', action='store_true', help='Busca nuevas colecciones públicas')
     parser.add_argument('--recategorize', action='store_true', help='Actualiza categorías')
     parser.add_argument('--clean', action='store_true', help='Limpia colecciones inaccesibles')
+    parser.add_argument('--enrich', action='store_true', help='Completa bandas, tipos de dato y escala nominal (una imagen reciente por colección, incluidas Landsat/Sentinel/MODIS)')
+    parser.add_argument('--enrich-timeout', type=float, default=120, help='Segundos máximos por petición en --enrich (default: 120)')
     parser.add_argument('--add', type=str, metavar='ID', help='Agrega una colección específica')
     parser.add_argument('--batch', type=str, metavar='FILE', help='Agrega colecciones desde un archivo')
     parser.add_argument('--days', type=int, default=30, help='Días para considerar expiración (default: 30)')
     parser.add_argument('--limit', type=int, help='Límite de colecciones a procesar')
+    parser.add_argument('--workers', type=int, default=1, help='Consultas concurrentes a la API en --revalidate, --discover, --clean, --enrich y --batch (default: 1, en serie)')
+    parser.add_argument('--probe-batch', type=int, default=CatalogoGEE.TAMANO_LOTE_SONDEO, help=f'Colecciones por petición al sondear imágenes (default: {CatalogoGEE.TAMANO_LOTE_SONDEO})')
+    parser.add_argument('--full-crawl', action='store_true', help='En --discover, ignora el estado guardado y lista todas las carpetas')
+    parser.add_argument('--watch', action='store_true', help='Revalidación continua: revalida las más desactualizadas en cada intervalo (Ctrl+C para detener)')
+    parser.add_argument('--interval', type=float, default=3600, help='Segundos entre ciclos de --watch (default: 3600)')
+    parser.add_argument('--budget', type=int, default=50, help='Máximo de consultas a la API por ciclo de --watch (default: 50)')
+    parser.add_argument('--sqlite', type=str, metavar='DB', help='Usa una base SQLite como almacenamiento del catálogo (se importa el JSON si está vacía)')
+    parser.add_argument('--import-json', action='store_true', help='Reemplaza el contenido de la base --sqlite por config/colecciones_gee.json')
+    parser.add_argument('--no-cache', action='store_true', help='No lee respuestas de la caché de API (config/.cache_api.db); las consultas nuevas sí se guardan')
+    parser.add_argument('--export-json', action='store_true', help='Escribe el catálogo actual en config/colecciones_gee.json')
 
     args = parser.parse_args()
 
     # Validar si se especificó alguna acción concreta
     acciones = [args.report, args.revalidate, args.discover, args.recategorize, 
-                args.clean, args.add, args.batch]
+                args.clean, args.enrich, args.add, args.batch, args.import_json, args.export_json, args.watch]
     
     if not any(acciones):
         parser.print_help()
         return
 
+    if args.import_json and not args.sqlite:
+        parser.error('--import-json requiere --sqlite DB')
+
     # Inicialización de producción
     initialize_gee()
-    catalog = CatalogoGEE()
+    catalog = CatalogoGEE(sqlite_path=args.sqlite)
+    catalog.sondeo.tamano_lote = max(1, args.probe_batch)
+    if catalog.cache is not None:
+        catalog.cache.bypass = args.no_cache
 
     try:
+        if args.import_json:
+            catalog.importar_json()
+
         if args.report:
             catalog.generar_reporte()
         
         if args.revalidate:
-            catalog.revalidar_expiradas(dias=args.days, limite=args.limit)
+            catalog.revalidar_expiradas(dias=args.days, limite=args.limit, workers=args.workers)
         
         if args.discover:
-            catalog.descubrir_colecciones()
+            catalog.descubrir_colecciones(workers=args.workers, completo=args.full_crawl)
             
         if args.recategorize:
             catalog.recategorizar()
             
         if args.clean:
-            catalog.limpiar_invalidas()
+            catalog.limpiar_invalidas(workers=args.workers)
+
+        if args.enrich:
+            catalog.enriquecer_colecciones(limite=args.limit, workers=args.workers, timeout=args.enrich_timeout)
 
         if args.add:
             if catalog.agregar_coleccion_al_catalogo(args.add):
@@ -66,13 +90,27 @@ def main():
                 print(f"[ERROR] No se pudo agregar {args.add}.")
 
         if args.batch:
-            catalog.agregar_lote(args.batch)
+            catalog.agregar_lote(args.batch, workers=args.workers)
+
+        if args.export_json:
+            catalog.exportar_json()
+
+        if args.watch:
+            catalog.revalidar_continuo(presupuesto=args.budget, intervalo=args.interval,
+                                       dias=args.days, workers=args.workers)
 
     except KeyboardInterrupt:
         print("\n[!] Operación cancelada por el usuario.")
     except Exception as e:
         print(f"\n[ERROR] Ocurrió un fallo inesperado: {e}")
         logging.exception("Error en maintain_catalog:")
+    finally:
+        if catalog.cache is not None:
+            stats = catalog.cache.estadisticas()
+            if stats['aciertos'] or stats['fallos']:
+                print(f"[INFO] Caché de API: {stats['aciertos']} aciertos, {stats['fallos']} consultas "
+                      f"({stats['tasa_aciertos']:.0%}); {stats['entradas']} entradas, "
+                      f"{stats['bytes'] / 1024:.0f} KB")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
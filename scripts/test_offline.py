@@ -0,0 +1,1070 @@
+#!/usr/bin/env python3
+"""
+Test Offline de GEE Area Explorer
+=================================
+Verificaciones que no requieren credenciales ni red: las expresiones de Earth
+Engine se construyen y serializan contra la lista de algoritmos incluida en el
+paquete `ee` (`ee.apitestcase`), y `ee.data.computeValue` se reemplaza por
+respuestas simuladas.
+
+Complementa a `test_integral.py`, que corre contra GEE real.
+
+Uso:
+    python scripts/test_offline.py
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import ee
+import pandas as pd
+from ee import apitestcase
+
+from src.gee_toolkit import analysis, catalog as modulo_catalogo, snapshot
+from scripts.benchmark_clasificacion import categoria_referencia, generar_catalogo, nivel_referencia
+from src.gee_toolkit.api_cache import CacheRespuestas
+from src.gee_toolkit.catalog import CatalogoGEE
+from src.gee_toolkit.classification import CLASIFICADOR_CATEGORIA, CLASIFICADOR_NIVEL
+from src.gee_toolkit.discovery import BASE_PUBLICA, CrawlerAssets, ResultadoListado, comparar_por_carpetas
+from src.gee_toolkit.enrichment import EnriquecimientoImagenes, ImagenObjetivo, SondeoColecciones, plazo_api
+from src.gee_toolkit.records import RegistroColeccion, catalogo_plano, compactar_catalogo
+from src.gee_toolkit.search_index import ColaExpiracion, IndiceTemporal, IndiceTrigramas, parsear_periodo, trigramas
+from src.gee_toolkit.storage_sqlite import AlmacenSQLite
+
+
+def inicializar_ee_offline():
+    """Inicializa las clases de ee con los algoritmos empaquetados, sin autenticación."""
+    ee.data.getAlgorithms = apitestcase.GetAlgorithms
+    # setDeadline reinstala el cliente HTTP, que sin credenciales no existe
+    ee.data._install_cloud_api_resource = lambda: None
+    ee.apifunction.ApiFunction.initialize()
+    ee._InitializeUnboundMethods()
+    ee._InitializeGeneratedClasses()
+
+
+class ServidorSimulado:
+    """Reemplazo de `ee.data.computeValue`: registra cada petición y responde con `responder`."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.peticiones = []
+
+    def __call__(self, objeto):
+        serializado = objeto.serialize()
+        self.peticiones.append(serializado)
+        return self.responder(objeto, serializado)
+
+    def __enter__(self):
+        self._original = ee.data.computeValue
+        ee.data.computeValue = self
+        return self
+
+    def __exit__(self, *exc):
+        ee.data.computeValue = self._original
+
+
+@contextmanager
+def parchear(objeto, **atributos):
+    """Reemplaza atributos de `objeto` dentro del bloque."""
+    originales = {nombre: getattr(objeto, nombre) for nombre in atributos}
+    for nombre, valor in atributos.items():
+        setattr(objeto, nombre, valor)
+    try:
+        yield
+    finally:
+        for nombre, valor in originales.items():
+            setattr(objeto, nombre, valor)
+
+
+class _FiltroSimulado:
+    def __init__(self, condicion):
+        self.condicion = condicion
+
+    def Not(self):
+        return _FiltroSimulado(lambda p: not self.condicion(p))
+
+    @staticmethod
+    def gte(prop, valor):
+        return _FiltroSimulado(lambda p: p.get(prop) is not None and p[prop] >= valor)
+
+    @staticmethod
+    def inList(prop, valores):
+        valores = set(valores)
+        return _FiltroSimulado(lambda p: p.get(prop) in valores)
+
+
+class ColeccionSimulada:
+    """
+    ImageCollection en memoria para la paginación: `limit(n, prop)` elige las
+    `n` primeras por fecha, pero la página vuelve desordenada (como puede
+    ocurrir con reduceColumns/toList).
+    """
+
+    def __init__(self, imagenes, semilla=0):
+        self.imagenes = imagenes
+        self.rng = random.Random(semilla)
+        self.peticiones = 0
+
+    def filter(self, filtro):
+        sub = ColeccionSimulada([i for i in self.imagenes if filtro.condicion(i['properties'])])
+        sub.rng, sub.padre = self.rng, self
+        return sub
+
+    def pagina(self, n):
+        raiz = getattr(self, 'padre', self)
+        while hasattr(raiz, 'padre'):
+            raiz = raiz.padre
+        raiz.peticiones += 1
+        filas = sorted(self.imagenes, key=lambda i: i['properties']['system:time_start'])[:n]
+        filas = [json.loads(json.dumps(f)) for f in filas]
+        self.rng.shuffle(filas)
+        return filas
+
+
+def imagenes_simuladas(total, por_fecha):
+    """`total` imágenes con `por_fecha` granules por cada fecha de adquisición (cada 5 días)."""
+    imagenes = []
+    for k in range(total):
+        props = {'system:time_start': 1577836800000 + (k // por_fecha) * 5 * 86400000,
+                 'system:index': f"T{k:05d}", 'CLOUDY_PIXEL_PERCENTAGE': float(k % 100)}
+        imagenes.append({'id': f"C/T{k:05d}", 'properties': props})
+    return imagenes
+
+
+@contextmanager
+def paginacion_simulada(coleccion):
+    def pagina_dicts(col, n):
+        return col.pagina(n)
+
+    def pagina_columnas(col, n, selectores):
+        filas = col.pagina(n)
+        return {s: [f['properties'].get(s, analysis._SIN_VALOR) for f in filas] for s in selectores}
+
+    with parchear(ee, Filter=_FiltroSimulado), \
+            parchear(analysis, _filtrar_coleccion=lambda *a, **k: coleccion,
+                     _obtener_pagina=pagina_dicts, _obtener_columnas=pagina_columnas):
+        yield
+
+
+class FechaFija(datetime):
+    """`datetime` con `now()` fijo: dos ejecuciones escriben el mismo `last_verified`."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 1, 15, 12, 0, 0, tzinfo=tz)
+
+
+def catalogo_temporal(carpeta, colecciones=None, **kwargs):
+    """CatalogoGEE sobre un JSON en `carpeta`, sin caché de API ni credenciales."""
+    ruta = Path(carpeta) / 'colecciones_gee.json'
+    if colecciones is not None:
+        contenido = {'_metadata': {'version': '2.2.0', 'cache_duration_days': 30}, **colecciones}
+        ruta.write_text(json.dumps(contenido, indent=2), encoding='utf-8')
+    kwargs.setdefault('usar_cache', False)
+    return CatalogoGEE(project_id='offline', catalog_path=ruta, **kwargs)
+
+
+def asset_simulado(cid, update_time='2025-01-01T00:00:00Z'):
+    """Respuesta de getAsset para una IMAGE_COLLECTION."""
+    return {'id': cid, 'type': 'IMAGE_COLLECTION', 'updateTime': update_time,
+            'startTime': '2015-06-23T00:00:00Z', 'properties': {'title': f"Título {cid}"}}
+
+
+def get_asset_con_demoras(semilla=0, fallan=()):
+    """getAsset simulado que termina en orden aleatorio (demoras de 0 a 5 ms)."""
+    rng = random.Random(semilla)
+    demoras = {}
+
+    def get_asset(cid):
+        time.sleep(demoras.setdefault(cid, rng.random() * 0.005))
+        if cid in fallan:
+            raise ee.EEException(f"Asset '{cid}' not found.")
+        return asset_simulado(cid)
+    return get_asset
+
+
+def sondeo_simulado(ids):
+    return {cid: {'n_imagenes': 3, 'bandas': ['B1', 'B2'], 'propiedades': {}} for cid in ids}
+
+
+def arbol_simulado(proveedores=('PROV_A', 'PROV_B'), productos=3, por_producto=5):
+    """Carpetas `BASE/proveedor/producto` con colecciones, para un listAssets simulado."""
+    hijos = {}
+    for proveedor in proveedores:
+        raiz = f"{BASE_PUBLICA}/{proveedor}"
+        hijos[raiz] = [{'type': 'FOLDER', 'name': f"{raiz}/P{p}", 'updateTime': '2025-01-01T00:00:00Z'}
+                       for p in range(productos)]
+        hijos[raiz].append({'type': 'TABLE', 'name': f"{raiz}/TABLA"})
+        for p in range(productos):
+            carpeta = f"{raiz}/P{p}"
+            hijos[carpeta] = [{'type': 'IMAGE_COLLECTION', 'name': f"{carpeta}/C{k}",
+                               'id': f"{carpeta}/C{k}".replace(f"{BASE_PUBLICA}/", '')}
+                              for k in range(por_producto)]
+    return hijos
+
+
+def list_assets_simulado(hijos, llamadas=None, semilla=0):
+    """listAssets paginado sobre `hijos` (token = posición), con demoras aleatorias."""
+    rng = random.Random(semilla)
+
+    def list_assets(params):
+        time.sleep(rng.random() * 0.003)
+        if llamadas is not None:
+            llamadas.append(params['parent'])
+        assets = hijos.get(params['parent'], [])
+        inicio = int(params.get('pageToken') or 0)
+        fin = inicio + params.get('pageSize', 1000)
+        return {'assets': assets[inicio:fin], 'nextPageToken': str(fin) if fin < len(assets) else None}
+    return list_assets
+
+
+def metadata_simulada(cid):
+    """Metadata con la forma de `buscar_coleccion_api`."""
+    return {'nombre': f"Título {cid}", 'collection_id': cid, 'properties': {}, 'bandas': ['B1'],
+            'resolucion': 'No especificado', 'periodo': '2015-06 a Presente',
+            'update_time': '2025-01-01T00:00:00Z', 'huella': None, 'last_verified': '2026-01-15T12:00:00'}
+
+
+def colecciones_ejemplo():
+    """Categorías de un catálogo chico, con la forma de `config/colecciones_gee.json`."""
+    return {
+        'opticas_alta_res': {'nombre': 'Imágenes Ópticas', 'colecciones': {
+            'COPERNICUS/S2_SR_HARMONIZED': {
+                'nombre': 'Sentinel-2 MSI: MultiSpectral Instrument, Level-2A', 'nivel': 'L2A',
+                'temporal': '2017-03 a Presente', 'last_verified': '2026-01-10T00:00:00',
+                'update_time': '2025-01-01T00:00:00Z'},
+            'COPERNICUS/S2_HARMONIZED': {
+                'nombre': 'Sentinel-2 MSI: MultiSpectral Instrument, Level-1C', 'nivel': 'L1C',
+                'temporal': '2015-06 a Presente', 'last_verified': '2025-06-01T00:00:00'},
+            'LANDSAT/LC09/C02/T1_L2': {
+                'nombre': 'USGS Landsat 9 Level 2', 'descripcion': 'Surface reflectance, comparable with Sentinel',
+                'nivel': 'L2', 'date_start': '2021-10-31', 'date_end': '2025-11-11',
+                'last_verified': '2025-01-01T00:00:00'},
+        }},
+        'vegetacion': {'nombre': 'Productos de Vegetación', 'colecciones': {
+            'MODIS/061/MOD13Q1': {'nombre': 'MOD13Q1.061 Terra Vegetation Indices 16-Day',
+                                  'temporal': '2000-02 a Presente', 'last_verified': '2024-06-01T00:00:00'},
+            'MODIS/061/MYD13Q1': {'nombre': 'MYD13Q1.061 Aqua Vegetation Indices 16-Day',
+                                  'temporal': '2002-07 a 2024-12', 'last_verified': '2026-01-12T00:00:00'},
+        }},
+    }
+
+
+# --- Verificaciones ----------------------------------------------------------
+
+def test_enriquecimiento_coleccion_vigente():
+    """Una IMAGE_COLLECTION sin endTime se enriquece en una petición, con ventana hasta hoy."""
+    cid = 'LANDSAT/LC09/C02/T1_L2'
+    respuesta = {cid: {'bandas': ['SR_B4'], 'tipos': {'SR_B4': {'precision': 'int', 'min': 0, 'max': 65535}},
+                       'escalas': [30.0]}}
+    enriquecimiento = EnriquecimientoImagenes()
+    with ServidorSimulado(lambda objeto, s: respuesta) as servidor:
+        resultado = enriquecimiento.enriquecer_lote([ImagenObjetivo(cid, 'IMAGE_COLLECTION', None)])
+
+    assert not enriquecimiento.errores, enriquecimiento.errores
+    assert len(servidor.peticiones) == 1, f"{len(servidor.peticiones)} peticiones"
+    assert resultado[cid] and resultado[cid]['tipos_datos'] == {'SR_B4': 'uint16'}, resultado
+    hoy = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    assert hoy in servidor.peticiones[0], "la ventana no termina en la fecha de hoy"
+
+
+def test_plazo_api_restaura_limite():
+    """plazo_api restaura el límite que tenía el llamador, no 'sin límite'."""
+    ee.data.setDeadline(5000)
+    try:
+        with plazo_api(120):
+            assert ee.data._get_state().deadline_ms == 120000
+        assert ee.data._get_state().deadline_ms == 5000
+    finally:
+        ee.data.setDeadline(0)
+
+
+def test_timeout_por_llamada():
+    """El timeout de una llamada no modifica el del objeto compartido."""
+    enriquecimiento = EnriquecimientoImagenes(timeout=120)
+    vistos = []
+    with ServidorSimulado(lambda objeto, s: vistos.append(ee.data._get_state().deadline_ms) or {}):
+        enriquecimiento.enriquecer([ImagenObjetivo('X/Y', 'IMAGE', None)], timeout=7)
+    assert vistos == [7000], vistos
+    assert enriquecimiento.timeout == 120
+
+
+def test_paginacion_con_paginas_desordenadas():
+    """Con filas desordenadas en cada página no se saltan ni repiten imágenes, y salen en orden."""
+    imagenes = imagenes_simuladas(1234, por_fecha=7)
+    esperados = [i['id'] for i in imagenes]
+    for tamano in (1, 6, 7, 50, 200):
+        for campos in (None, ['CLOUDY_PIXEL_PERCENTAGE']):
+            coleccion = ColeccionSimulada(imagenes, semilla=tamano)
+            with paginacion_simulada(coleccion):
+                paginas = list(analysis.iterar_paginas_imagenes('C', None, 'a', 'b', tamano_pagina=tamano,
+                                                                campos=campos))
+            if campos is None:
+                ids = [r['id'] for pagina in paginas for r in pagina]
+                fechas = [r['fecha'] for pagina in paginas for r in pagina]
+            else:
+                ids = [i for pagina in paginas for i in pagina['id']]
+                fechas = [f for pagina in paginas for f in pagina['fecha']]
+            etiqueta = f"tamano_pagina={tamano}, campos={campos}"
+            assert sorted(ids) == esperados, f"{etiqueta}: {len(ids)} ids, {len(set(ids))} distintos"
+            assert fechas == sorted(fechas), f"{etiqueta}: páginas fuera de orden"
+
+
+def test_fechas_en_utc_en_ambos_modos():
+    """Una imagen cerca de medianoche UTC cae en el mismo día con y sin proyección de campos."""
+    # 2020-01-01T01:30Z: en Chile (UTC-3) todavía es 2019-12-31
+    imagenes = [{'id': 'C/T0', 'properties': {'system:time_start': 1577842200000, 'system:index': 'T0'}}]
+    zona_original = os.environ.get('TZ')
+    os.environ['TZ'] = 'America/Santiago'
+    time.tzset()
+    try:
+        fechas = []
+        for campos in (None, ['system:index']):
+            with paginacion_simulada(ColeccionSimulada(imagenes)):
+                pagina = next(analysis.iterar_paginas_imagenes('C', None, 'a', 'b', campos=campos))
+            fechas.append(pagina[0]['fecha'] if campos is None else pagina['fecha'][0].strftime('%Y-%m-%d'))
+    finally:
+        if zona_original is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = zona_original
+        time.tzset()
+    assert fechas == ['2020-01-01', '2020-01-01'], fechas
+
+
+def test_filtro_nubes_no_catalogado_en_una_peticion():
+    """Con una colección no catalogada, el filtro de nubes se resuelve en la misma petición y sin prints."""
+    area = ee.Geometry.Point([-70.6, -33.4]).buffer(1000)
+    features = ee.FeatureCollection([ee.Feature(area, {'feature_id': 1})])
+    respuestas = {'resumen': {'total': 0, 'por_periodo': {}, 'nubes': {}}, 'features': {'features': []}}
+    llamadas = {
+        'resumen': lambda: analysis.resumen_cobertura_servidor('FOO/BAR', area, '2020-01-01', '2020-12-31',
+                                                              max_nubes=50),
+        'features': lambda: analysis.cobertura_por_feature('FOO/BAR', features, '2020-01-01', '2020-12-31',
+                                                          max_nubes=50),
+    }
+    for nombre, llamada in llamadas.items():
+        salida = StringIO()
+        with ServidorSimulado(lambda objeto, s: respuestas[nombre]) as servidor, redirect_stdout(salida):
+            llamada()
+        assert len(servidor.peticiones) == 1, f"{nombre}: {len(servidor.peticiones)} peticiones"
+        assert 'CLOUDY_PIXEL_PERCENTAGE' in servidor.peticiones[0], f"{nombre}: falta el filtro de nubes"
+        assert not salida.getvalue(), f"{nombre}: escribió en consola: {salida.getvalue()!r}"
+
+
+def test_revalidacion_concurrente_igual_a_serie():
+    """agregar_lote y la revalidación con varios hilos dejan el mismo JSON que en serie."""
+    ids = [f"{prefijo}/C{k:02d}" for k in range(12) for prefijo in ('LANDSAT/LC09', 'PROYECTO')]
+    ids.append('PROYECTO/NO_EXISTE')
+    lista = "\n".join(['# colecciones', *ids, ids[0]])
+    contenidos = []
+    for workers in (1, 8):
+        with tempfile.TemporaryDirectory() as carpeta:
+            archivo = Path(carpeta) / 'ids.txt'
+            archivo.write_text(lista, encoding='utf-8')
+            catalogo = catalogo_temporal(carpeta, {})
+            sin_listado = ResultadoListado([], [], ids, [], 0, 0)
+            with parchear(ee.data, getAsset=get_asset_con_demoras(workers, fallan={'PROYECTO/NO_EXISTE'})), \
+                    parchear(modulo_catalogo, datetime=FechaFija), \
+                    parchear(catalogo.sondeo, sondear_lote=sondeo_simulado), \
+                    parchear(catalogo, _listar_por_carpetas=lambda c, workers=1: sin_listado), \
+                    redirect_stdout(StringIO()):
+                catalogo.agregar_lote(str(archivo), workers=workers)
+                agregado = catalogo.catalog_path.read_text(encoding='utf-8')
+                validas, fallidas = catalogo._revalidar_ids(ids, workers)
+            contenidos.append((agregado, catalogo.catalog_path.read_text(encoding='utf-8'), validas, fallidas))
+
+    agregado = json.loads(contenidos[0][0])
+    orden = [cid for cat, info in agregado.items() if not cat.startswith('_') for cid in info['colecciones']]
+    assert sorted(orden) == sorted(ids[:-1]), orden
+    assert contenidos[0][2:] == (len(ids) - 1, ['PROYECTO/NO_EXISTE']), contenidos[0][2:]
+    assert contenidos[0] == contenidos[1], "el resultado con 8 hilos difiere del serial"
+
+
+def test_crawler_paralelo_paginado():
+    """El BFS con varios hilos y páginas chicas encuentra las mismas colecciones que en serie."""
+    hijos = arbol_simulado()
+    esperados = sorted(a['name'] for lista in hijos.values() for a in lista if a['type'] == 'IMAGE_COLLECTION')
+    raices = [f"{BASE_PUBLICA}/PROV_A", f"{BASE_PUBLICA}/PROV_B"]
+    for workers in (1, 4):
+        crawler = CrawlerAssets(workers=workers, tamano_pagina=2)
+        with parchear(ee.data, listAssets=list_assets_simulado(hijos, semilla=workers)):
+            encontrados = [a['name'] for a in crawler.recorrer(raices)]
+        assert sorted(encontrados) == esperados, f"workers={workers}: {len(encontrados)} colecciones"
+        # 2 raíces de 4 assets + 6 carpetas de 5 colecciones, en páginas de 2
+        assert crawler.paginas == 2 * 2 + 6 * 3, f"workers={workers}: {crawler.paginas} páginas"
+        assert not crawler.errores, crawler.errores
+
+    # descubrir_colecciones registra lo encontrado igual con cualquier número de hilos
+    contenidos = []
+    for workers in (1, 4):
+        with tempfile.TemporaryDirectory() as carpeta:
+            catalogo = catalogo_temporal(carpeta, {})
+            with parchear(ee.data, listAssets=list_assets_simulado(hijos, semilla=workers),
+                          getAsset=get_asset_con_demoras(workers)), \
+                    parchear(modulo_catalogo, datetime=FechaFija), \
+                    parchear(catalogo.sondeo, sondear_lote=sondeo_simulado), \
+                    redirect_stdout(StringIO()):
+                catalogo.descubrir_colecciones(['PROV_A', 'PROV_B'], workers=workers)
+            contenidos.append(catalogo.catalog_path.read_text(encoding='utf-8'))
+    assert contenidos[0] == contenidos[1], "descubrir_colecciones con 4 hilos difiere del serial"
+    assert contenidos[0].count('"PROV_') == len(esperados), "faltan colecciones descubiertas"
+
+
+def test_transaccion_y_escritura_atomica():
+    """Las transacciones vuelcan según la política, y un fallo al escribir deja intacto el JSON."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, {})
+        ruta = catalogo.catalog_path
+        inicial = ruta.read_bytes()
+        guardadas = []
+        with catalogo.transaccion(flush_cada=3, flush_segundos=None):
+            for k in range(4):
+                catalogo._registrar_coleccion(f"X/C{k}", metadata_simulada(f"X/C{k}"), 'otros')
+                catalogo._guardar_catalogo()
+                guardadas.append(json.loads(ruta.read_bytes()).get('otros', {}).get('colecciones', {}))
+        # Solo el tercer cambio llega a disco; el cuarto, al cerrar el bloque
+        assert [len(g) for g in guardadas] == [0, 0, 3, 3], [len(g) for g in guardadas]
+        assert len(json.loads(ruta.read_bytes())['otros']['colecciones']) == 4
+        assert ruta.read_bytes() != inicial
+
+        # Un fallo entre la escritura del temporal y el reemplazo no toca el archivo
+        previo = ruta.read_bytes()
+        catalogo._registrar_coleccion('X/C9', metadata_simulada('X/C9'), 'otros')
+
+        def fsync_fallido(fd):
+            raise OSError("disco lleno")
+
+        with parchear(os, fsync=fsync_fallido), parchear(modulo_catalogo.logger, disabled=True):
+            catalogo._guardar_catalogo()
+        assert ruta.read_bytes() == previo, "el JSON cambió tras una escritura fallida"
+        assert sorted(p.name for p in Path(carpeta).iterdir() if p.suffix == '.tmp') == [], "quedó un temporal"
+        catalogo._guardar_catalogo()
+        assert 'X/C9' in json.loads(ruta.read_bytes())['otros']['colecciones']
+
+
+def test_indice_de_texto():
+    """buscar_texto exige todos los términos, admite prefijos y sigue las mutaciones del catálogo."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones_ejemplo())
+        assert [cid for cid, _ in catalogo.buscar_texto('sentinel sr')] == ['COPERNICUS/S2_SR_HARMONIZED']
+        # Prefijo: pesa más en el nombre que en la descripción; a igual puntaje, el ID más corto
+        assert [cid for cid, _ in catalogo.buscar_texto('sentin')] == [
+            'COPERNICUS/S2_HARMONIZED', 'COPERNICUS/S2_SR_HARMONIZED', 'LANDSAT/LC09/C02/T1_L2']
+        assert [cid for cid, _ in catalogo.buscar_texto('Índices mod13q1')] == ['MODIS/061/MOD13Q1']
+        assert catalogo.buscar_texto('sentinel modis') == []
+
+        del catalogo.colecciones['opticas_alta_res']['colecciones']['COPERNICUS/S2_HARMONIZED']
+        catalogo._al_modificar('COPERNICUS/S2_HARMONIZED')
+        catalogo._registrar_coleccion('COPERNICUS/S1_GRD', dict(metadata_simulada('COPERNICUS/S1_GRD'),
+                                                               nombre='Sentinel-1 SAR GRD'), 'sar')
+        assert [cid for cid, _ in catalogo.buscar_texto('sentinel', limit=0)] == [
+            'COPERNICUS/S1_GRD', 'COPERNICUS/S2_SR_HARMONIZED', 'LANDSAT/LC09/C02/T1_L2']
+
+
+def test_inventario_memoizado():
+    """El inventario se arma una vez, se entrega como copia y se rehace tras una mutación."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones_ejemplo())
+        construcciones = []
+        construir = catalogo._construir_inventario
+        with parchear(catalogo, _construir_inventario=lambda: construcciones.append(1) or construir()), \
+                redirect_stdout(StringIO()):
+            df = catalogo.generar_inventario_completo(exportar_csv=False)
+            df.loc[:, 'nombre'] = 'modificado'
+            df2 = catalogo.generar_inventario_completo(exportar_csv=False)
+            assert len(construcciones) == 1, f"{len(construcciones)} construcciones"
+            assert 'modificado' not in set(df2['nombre']), "la copia entregada comparte datos con la memoizada"
+            assert len(df2) == 5 and set(df2.loc[df2['collection_id'].str.startswith('MODIS'),
+                                                  'nivel_procesamiento']) == {'No especificado'}
+
+            catalogo._aplicar_metadata('LANDSAT/LC09/C02/T1_L2', {'sin_cambios': True,
+                                                                 'last_verified': '2026-02-01T00:00:00'})
+            df3 = catalogo.generar_inventario_completo(exportar_csv=False)
+        assert len(construcciones) == 2, "la mutación no invalidó el inventario"
+        fila = df3.set_index('collection_id').loc['LANDSAT/LC09/C02/T1_L2']
+        assert fila['last_verified'] == '2026-02-01T00:00:00', fila['last_verified']
+
+
+def test_clasificacion_igual_a_referencia():
+    """Por ID, por ID repetido y en lote dan lo mismo que los chequeos `in` originales."""
+    df = generar_catalogo(3000, semilla=7)
+    # Cadenas cortas con las letras de las palabras clave: fuerzan solapes ('GA' + 'A1', 'CO' + 'O3')
+    rng = random.Random(7)
+    letras = 'COSNWAG1EPR3/_MD09T2L'
+    aleatorios = [''.join(rng.choice(letras) for _ in range(rng.randint(0, 14))) for _ in range(3000)]
+    ids = pd.Series(df['collection_id'].tolist() + aleatorios, dtype=object)
+    nombres = pd.Series(df['nombre'].tolist() + aleatorios[::-1], dtype=object)
+    textos = ids + ' ' + nombres
+
+    esperado_nivel = [nivel_referencia(cid) for cid in ids]
+    esperado_categoria = [categoria_referencia(cid, {'nombre': n}) for cid, n in zip(ids, nombres)]
+    for _ in range(2):
+        assert [CLASIFICADOR_NIVEL.clasificar(cid) for cid in ids] == esperado_nivel
+    assert CLASIFICADOR_NIVEL.clasificar_lote(ids).tolist() == esperado_nivel
+    assert [CLASIFICADOR_CATEGORIA.clasificar(c, t) for c, t in zip(ids, textos)] == esperado_categoria
+    assert CLASIFICADOR_CATEGORIA.clasificar_lote(ids, textos).tolist() == esperado_categoria
+
+
+def test_snapshot_descartado_si_cambia_el_json():
+    """El snapshot se usa solo con la firma del JSON actual, aunque el cambio conserve tamaño y mtime."""
+    cid = 'MODIS/061/MOD13Q1'
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo_temporal(carpeta, colecciones_ejemplo())
+        ruta = Path(carpeta) / 'colecciones_gee.json'
+        assert snapshot.ruta_snapshot(ruta).exists(), "no se guardó el snapshot"
+
+        cargas = []
+        cargar = modulo_catalogo.cargar_snapshot
+        with parchear(modulo_catalogo, cargar_snapshot=lambda *a: cargas.append(cargar(*a)) or cargas[-1]):
+            catalogo_temporal(carpeta)
+            assert cargas[-1] is not None, "no se usó el snapshot vigente"
+
+            # Mismo tamaño y mismo mtime: solo el hash del contenido delata el cambio
+            st = os.stat(ruta)
+            contenido = ruta.read_bytes()
+            ruta.write_bytes(contenido.replace(b'MOD13Q1.061 Terra', b'MOD13Q1.061 TERRA'))
+            os.utime(ruta, ns=(st.st_atime_ns, st.st_mtime_ns))
+            catalogo = catalogo_temporal(carpeta)
+            assert cargas[-1] is None, "se usó un snapshot de otro contenido"
+            assert catalogo.colecciones['vegetacion']['colecciones'][cid]['nombre'].startswith('MOD13Q1.061 TERRA')
+
+            # El snapshot regenerado vuelve a servir para el JSON nuevo
+            catalogo = catalogo_temporal(carpeta)
+            assert cargas[-1] is not None, "no se regeneró el snapshot"
+            assert catalogo.colecciones['vegetacion']['colecciones'][cid]['nombre'].startswith('MOD13Q1.061 TERRA')
+
+
+def test_sqlite_importar_exportar_y_upsert():
+    """La base SQLite devuelve el layout JSON sin pérdida y no pisa filas verificadas más recientes."""
+    cid = 'COPERNICUS/S2_HARMONIZED'
+    with tempfile.TemporaryDirectory() as carpeta:
+        original = {'_metadata': {'version': '2.2.0', 'cache_duration_days': 30}, **colecciones_ejemplo()}
+        almacen = AlmacenSQLite(Path(carpeta) / 'catalogo.db')
+        assert almacen.vacio()
+        assert almacen.importar(original) == 5
+        assert almacen.exportar() == original
+        assert list(almacen.exportar()) == list(original), "cambió el orden de las categorías"
+
+        # Un registro sin last_verified no pisa la fila verificada; uno más reciente sí
+        catalogo = almacen.exportar()
+        registro = catalogo['opticas_alta_res']['colecciones'][cid]
+        del registro['last_verified']
+        registro['nombre'] = 'sin verificar'
+        almacen.guardar(catalogo, [cid])
+        assert almacen.exportar()['opticas_alta_res']['colecciones'][cid] == \
+            original['opticas_alta_res']['colecciones'][cid]
+        registro.update(nombre='verificado', last_verified='2026-01-15T00:00:00')
+        almacen.guardar(catalogo, [cid])
+        assert almacen.exportar()['opticas_alta_res']['colecciones'][cid]['nombre'] == 'verificado'
+
+        # Eliminar una colección borra solo su fila
+        del catalogo['vegetacion']['colecciones']['MODIS/061/MYD13Q1']
+        almacen.guardar(catalogo, ['MODIS/061/MYD13Q1'])
+        assert almacen.exportar() == catalogo
+        almacen.cerrar()
+
+        # CatalogoGEE importa el JSON la primera vez y después lee la base
+        ruta_db = Path(carpeta) / 'catalogo_gee.db'
+        with redirect_stdout(StringIO()):
+            catalogo_temporal(carpeta, colecciones_ejemplo(), sqlite_path=ruta_db)
+        (Path(carpeta) / 'colecciones_gee.json').unlink()
+        recargado = catalogo_temporal(carpeta, sqlite_path=ruta_db)
+        assert sorted(c for c, _ in recargado._iter_colecciones()) == sorted(
+            c for info in colecciones_ejemplo().values() for c in info['colecciones'])
+
+
+def test_cola_expiracion_y_modo_continuo():
+    """La cola entrega las más desactualizadas primero y el modo continuo respeta el presupuesto."""
+    cola = ColaExpiracion()
+    for cid, fecha in [('A', '2025-03-01T00:00:00'), ('B', None), ('C', '2025-01-01T00:00:00'),
+                       ('D', '2026-01-01T00:00:00'), ('E', 'fecha ilegible')]:
+        cola.actualizar(cid, fecha)
+    umbral = datetime(2025, 6, 1).timestamp()
+    # Sin verificar y fecha ilegible cuentan como lo más antiguo
+    assert cola.mas_antiguas(umbral) == ['B', 'E', 'C', 'A'], cola.mas_antiguas(umbral)
+    cola.actualizar('C', '2025-12-01T00:00:00')
+    cola.eliminar('B')
+    assert cola.mas_antiguas(umbral, 2) == ['E', 'A'], "una entrada reemplazada o eliminada siguió en la cola"
+    assert cola.mas_antiguas(umbral) == ['E', 'A'], "la consulta quitó entradas de la cola"
+    assert len(cola) == 4
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones_ejemplo())
+        ciclos = []
+
+        def revalidar(ids, workers=1):
+            ciclos.append(list(ids))
+            validas = [cid for cid in ids if cid != 'MODIS/061/MOD13Q1']
+            for cid in validas:
+                catalogo._aplicar_metadata(cid, {'sin_cambios': True, 'last_verified': '2026-01-15T12:00:00'})
+            return len(validas), [cid for cid in ids if cid not in validas]
+
+        with parchear(modulo_catalogo, datetime=FechaFija), parchear(catalogo, _revalidar_ids=revalidar), \
+                redirect_stdout(StringIO()):
+            catalogo.revalidar_continuo(presupuesto=2, intervalo=0, dias=30, ciclos=3)
+        # La fallida se pospone en lugar de ocupar el presupuesto de cada ciclo
+        assert ciclos == [['MODIS/061/MOD13Q1', 'LANDSAT/LC09/C02/T1_L2'], ['COPERNICUS/S2_HARMONIZED']], ciclos
+        registro = catalogo.colecciones['opticas_alta_res']['colecciones']['LANDSAT/LC09/C02/T1_L2']
+        assert registro['last_verified'] == '2026-01-15T12:00:00'
+
+
+def test_recorrido_reanudable_y_carpetas_sin_cambios():
+    """Un recorrido interrumpido se reanuda desde el checkpoint y las carpetas sin cambios no se relistan."""
+    hijos = arbol_simulado()
+    esperados = sorted(a['name'] for lista in hijos.values() for a in lista if a['type'] == 'IMAGE_COLLECTION')
+    raices = [f"{BASE_PUBLICA}/PROV_A", f"{BASE_PUBLICA}/PROV_B"]
+    with tempfile.TemporaryDirectory() as carpeta:
+        estado = Path(carpeta) / 'estado.json'
+
+        def crawler(completo=False):
+            return CrawlerAssets(workers=2, tamano_pagina=2, estado_path=estado, completo=completo,
+                                 checkpoint_cada=1)
+
+        with parchear(ee.data, listAssets=list_assets_simulado(hijos)):
+            # Interrupción a mitad de recorrido: queda un checkpoint
+            primero = crawler()
+            recorrido = primero.recorrer(raices)
+            vistos = [next(recorrido)['name'] for _ in range(7)]
+            recorrido.close()
+            assert json.loads(estado.read_text())['en_curso'], "no se guardó el checkpoint"
+
+            segundo = crawler()
+            reanudados = [a['name'] for a in segundo.recorrer(raices)]
+            assert segundo.reanudado
+            assert sorted(reanudados) == esperados, "la reanudación perdió o repitió colecciones"
+            assert set(vistos) <= set(reanudados)
+            assert primero.paginas + segundo.paginas <= 2 * 2 + 6 * 3 + segundo.workers, \
+                f"{primero.paginas} + {segundo.paginas} páginas: se relistó lo ya recorrido"
+            segundo.confirmar()
+            assert json.loads(estado.read_text())['en_curso'] is None
+
+            # Sin cambios: solo se listan las raíces
+            tercero = crawler()
+            assert [a['name'] for a in tercero.recorrer(raices)] == []
+            assert (tercero.omitidas, tercero.paginas) == (6, 4), (tercero.omitidas, tercero.paginas)
+            tercero.confirmar()
+
+        # Una carpeta con otro updateTime se vuelve a listar; `completo` ignora el estado
+        hijos[raices[0]][1] = dict(hijos[raices[0]][1], updateTime='2026-01-10T00:00:00Z')
+        with parchear(ee.data, listAssets=list_assets_simulado(hijos)):
+            cuarto = crawler()
+            assert sorted(a['name'] for a in cuarto.recorrer(raices)) == \
+                [f"{raices[0]}/P1/C{k}" for k in range(5)]
+            assert cuarto.omitidas == 5
+            cuarto.confirmar()
+            quinto = crawler(completo=True)
+            assert sorted(a['name'] for a in quinto.recorrer(raices)) == esperados
+
+
+def test_revalidacion_condicional_por_update_time():
+    """Con el mismo updateTime (o, sin él, la misma huella) solo se renueva last_verified."""
+    sin_cambio, modificada, por_huella = 'COPERNICUS/S2_SR_HARMONIZED', 'COPERNICUS/S2_HARMONIZED', 'MODIS/061/MOD13Q1'
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones_ejemplo())
+        sin_update_time = dict(asset_simulado(por_huella), updateTime=None)
+        catalogo.colecciones['vegetacion']['colecciones'][por_huella]['huella'] = \
+            catalogo._huella_asset(sin_update_time)
+        assets = {sin_cambio: asset_simulado(sin_cambio, '2025-01-01T00:00:00Z'),
+                  modificada: asset_simulado(modificada, '2025-09-01T00:00:00Z'),
+                  por_huella: sin_update_time}
+        consultadas = []
+        buscar = catalogo.buscar_coleccion_api
+        ids = list(assets)
+        sin_listado = ResultadoListado([], [], ids, [], 0, 0)
+        with parchear(ee.data, getAsset=assets.__getitem__), parchear(modulo_catalogo, datetime=FechaFija), \
+                parchear(catalogo.sondeo, sondear_lote=sondeo_simulado), \
+                parchear(catalogo, _listar_por_carpetas=lambda c, workers=1: sin_listado,
+                         buscar_coleccion_api=lambda cid, *a: consultadas.append(cid) or buscar(cid, *a)), \
+                redirect_stdout(StringIO()):
+            validas, fallidas = catalogo._revalidar_ids(ids, workers=2)
+
+        assert (validas, fallidas) == (3, []), (validas, fallidas)
+        assert consultadas == [modificada], consultadas
+        opticas = catalogo.colecciones['opticas_alta_res']['colecciones']
+        assert opticas[sin_cambio]['last_verified'] == '2026-01-15T12:00:00'
+        assert opticas[sin_cambio]['nombre'].startswith('Sentinel-2'), "se pisó la entrada sin cambios"
+        assert opticas[modificada]['update_time'] == '2025-09-01T00:00:00Z'
+        assert opticas[modificada]['nombre'] == f"Título {modificada}"
+        registro = catalogo.colecciones['vegetacion']['colecciones'][por_huella]
+        assert registro['last_verified'] == '2026-01-15T12:00:00' and registro['nombre'].startswith('MOD13Q1')
+
+
+def test_listado_por_carpetas():
+    """Una llamada listAssets por carpeta y página clasifica las colecciones según su updateTime."""
+    hijos = arbol_simulado(proveedores=('PROV_A',), productos=3, por_producto=5)
+    for lista in hijos.values():
+        for asset in lista:
+            if asset['type'] == 'IMAGE_COLLECTION':
+                asset['updateTime'] = '2025-01-01T00:00:00Z'
+    del hijos[f"{BASE_PUBLICA}/PROV_A/P0"][4]
+    update_times = {
+        'PROV_A/P0/C0': '2025-01-01T00:00:00Z',     # sin cambios
+        'PROV_A/P0/C1': '2024-01-01T00:00:00Z',     # cambiada
+        'PROV_A/P0/C2': None,                       # sin updateTime guardado
+        'PROV_A/P0/C4': '2025-01-01T00:00:00Z',     # ya no está en su carpeta
+        'PROV_A/P1/C0': '2025-01-01T00:00:00Z',     # única de su carpeta con updateTime
+        'PROV_A/P2/C0': '2025-01-01T00:00:00Z',
+        'PROV_A/P2/C1': '2025-01-01T00:00:00Z',
+        'SUELTA': '2025-01-01T00:00:00Z',           # sin carpeta
+    }
+    llamadas = []
+    falla = f"{BASE_PUBLICA}/PROV_A/P2"
+
+    def list_assets(params):
+        if params['parent'] == falla:
+            raise ee.EEException("Too many requests")
+        return list_assets_simulado(hijos, llamadas)(params)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = CacheRespuestas(Path(carpeta) / 'cache.db')
+        with parchear(ee.data, listAssets=list_assets), \
+                parchear(logging.getLogger('src.gee_toolkit.discovery'), disabled=True):
+            listado = comparar_por_carpetas(update_times, workers=2, tamano_pagina=2, cache=cache, ttl=60)
+            assert sorted(listado.sin_cambios) == ['PROV_A/P0/C0'], listado
+            assert sorted(listado.cambiados) == ['PROV_A/P0/C1', 'PROV_A/P0/C2'], listado
+            assert listado.no_listados == ['PROV_A/P0/C4'], listado
+            assert sorted(listado.sin_resolver) == ['PROV_A/P1/C0', 'PROV_A/P2/C0', 'PROV_A/P2/C1', 'SUELTA']
+            # Solo se lista P0 (4 assets en páginas de 2) y el intento fallido de P2
+            assert (listado.carpetas, listado.llamadas, llamadas) == (2, 2, [f"{BASE_PUBLICA}/PROV_A/P0"] * 2)
+
+            # El listado completo queda en la caché: la segunda vez no hay llamadas
+            repetido = comparar_por_carpetas(update_times, workers=2, tamano_pagina=2, cache=cache, ttl=60)
+            assert repetido.llamadas == 0 and len(llamadas) == 2
+            assert sorted(repetido.sin_cambios) == sorted(listado.sin_cambios)
+
+
+def test_sondeo_por_lotes():
+    """El sondeo evalúa un lote por petición y, si falla, lo parte hasta aislar la colección con error."""
+    ids = [f"PROY/C{k:02d}" for k in range(1, 11)]
+
+    def responder(objeto, serializado):
+        pedidos = [cid for cid in ids if f'"{cid}"' in serializado]
+        if 'PROY/C06' in pedidos:
+            raise ee.EEException("Collection.loadTable: Collection asset 'PROY/C06' not found.")
+        return {cid: {'n_imagenes': 2, 'bandas': [f"B_{cid[-2:]}"], 'propiedades': {}} for cid in pedidos}
+
+    sondeo = SondeoColecciones(tamano_lote=4)
+    with ServidorSimulado(responder) as servidor, \
+            parchear(logging.getLogger('src.gee_toolkit.enrichment'), disabled=True):
+        resultado = sondeo.sondear(ids)
+    assert list(resultado) == ids
+    assert resultado['PROY/C06'] is None and list(sondeo.errores) == ['PROY/C06']
+    assert all(resultado[cid]['bandas'] == [f"B_{cid[-2:]}"] for cid in ids if cid != 'PROY/C06')
+    # 3 lotes; el fallido se parte en [C05, C06] -> [C05], [C06] y [C07, C08]
+    assert sondeo.peticiones == len(servidor.peticiones) == 7, sondeo.peticiones
+
+    # buscar_coleccion_api sondea una colección no masiva en una sola petición
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, {})
+        with ServidorSimulado(responder) as servidor:
+            metadata = catalogo.buscar_coleccion_api('PROY/C01', asset_simulado('PROY/C01'))
+        assert len(servidor.peticiones) == 1 and metadata['bandas'] == ['B_01'], metadata
+
+
+def test_limpieza_solo_reutiliza_cache_reciente():
+    """--clean reutiliza getAsset recientes y listados en caché, y vuelve a consultar los getAsset viejos."""
+    ids = {cid: f"PROV/X/{cid}" for cid in ('OK', 'MODIFICADA', 'PREVIA', 'VIEJA')}
+    padre = f"{BASE_PUBLICA}/PROV/X"
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, {'otros': {'nombre': 'Otros', 'colecciones': {
+            cid: {'nombre': cid, 'update_time': '2025-01-01T00:00:00Z'} for cid in ids.values()}}},
+            usar_cache=True)
+        cache = catalogo.cache
+        listado = [{'type': 'IMAGE_COLLECTION', 'name': f"{padre}/OK", 'updateTime': '2025-01-01T00:00:00Z'},
+                   {'type': 'IMAGE_COLLECTION', 'name': f"{padre}/MODIFICADA", 'updateTime': '2025-09-01T00:00:00Z'}]
+        cache.obtener('listAssets', (padre,), lambda: listado, catalogo.TTL_LISTADO_SEGUNDOS)
+        # Respuestas vigentes según el TTL: una de esta ejecución, una de hace 10 minutos y una de hace 2 horas
+        for nombre, antiguedad in (('MODIFICADA', 0), ('PREVIA', 600), ('VIEJA', 7200)):
+            cid = ids[nombre]
+            cache.obtener('getAsset', (cid,), lambda: asset_simulado(cid), catalogo._ttl_cache())
+            cache._conn.execute("UPDATE respuestas SET guardada = guardada - ? WHERE clave = ?",
+                                (antiguedad, cache.clave('getAsset', cid)))
+        catalogo._inicio_ejecucion = time.time() - 1
+
+        consultadas = []
+
+        def get_asset(asset_id):
+            consultadas.append(asset_id)
+            raise ee.EEException(f"Asset '{asset_id}' not found.")
+
+        def list_assets(params):
+            raise AssertionError("se volvió a listar una carpeta en caché")
+
+        with parchear(ee.data, getAsset=get_asset, listAssets=list_assets), redirect_stdout(StringIO()):
+            catalogo.limpiar_invalidas(silencioso=True)
+
+        assert consultadas == [ids['VIEJA']], consultadas
+        assert sorted(catalogo.colecciones['otros']['colecciones']) == sorted(
+            ids[c] for c in ('OK', 'MODIFICADA', 'PREVIA'))
+        assert not cache.bypass
+        llamadas = []
+        cache.obtener('getAsset', (ids['VIEJA'],), lambda: llamadas.append(1) or {}, 60)
+        assert llamadas, "la respuesta del asset borrado sigue en la caché"
+
+
+def test_fusion_entre_procesos():
+    """Dos instancias sobre el mismo JSON conservan los cambios de ambas; un conflicto lo decide last_verified."""
+    s2_sr, s2, landsat = 'COPERNICUS/S2_SR_HARMONIZED', 'COPERNICUS/S2_HARMONIZED', 'LANDSAT/LC09/C02/T1_L2'
+    mod13, myd13 = 'MODIS/061/MOD13Q1', 'MODIS/061/MYD13Q1'
+
+    def verificar(catalogo, cid, fecha):
+        assert catalogo._aplicar_metadata(cid, {'sin_cambios': True, 'last_verified': fecha}), cid
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        proceso_a = catalogo_temporal(carpeta, colecciones_ejemplo())
+        proceso_b = catalogo_temporal(carpeta)
+
+        verificar(proceso_a, s2_sr, '2026-02-01T00:00:00')
+        verificar(proceso_a, landsat, '2026-02-01T00:00:00')     # conflicto: gana A (más reciente)
+        verificar(proceso_a, s2, '2026-01-20T00:00:00')          # conflicto: gana B
+        del proceso_a.colecciones['vegetacion']['colecciones'][myd13]
+        proceso_a._al_modificar(myd13)
+        proceso_a._registrar_coleccion('NASA/NUEVA', metadata_simulada('NASA/NUEVA'), 'otros')
+        with redirect_stdout(StringIO()):
+            proceso_a._guardar_catalogo()
+
+        verificar(proceso_b, mod13, '2026-02-02T00:00:00')
+        verificar(proceso_b, landsat, '2026-01-20T00:00:00')
+        verificar(proceso_b, s2, '2026-02-05T00:00:00')
+        verificar(proceso_b, myd13, '2026-02-03T00:00:00')       # la eliminación de A prevalece
+        salida = StringIO()
+        with redirect_stdout(salida):
+            proceso_b._guardar_catalogo()
+        assert '4 cambio(s), 3 conflicto(s)' in salida.getvalue(), salida.getvalue()
+
+        esperado = {s2_sr: '2026-02-01T00:00:00', landsat: '2026-02-01T00:00:00', s2: '2026-02-05T00:00:00',
+                    mod13: '2026-02-02T00:00:00', 'NASA/NUEVA': '2026-01-15T12:00:00'}
+        disco = json.loads(proceso_b.catalog_path.read_text(encoding='utf-8'))
+        assert {cid: registro['last_verified'] for cat, info in disco.items() if not cat.startswith('_')
+                for cid, registro in info['colecciones'].items()} == esperado
+        # B incorporó los cambios de A también en memoria y en sus índices
+        assert proceso_b.contar_prefijo('NASA') == 1 and proceso_b.contar_prefijo('MODIS') == 1
+
+        # A vuelve a escribir sin cambios propios: toma todo lo de B sin conflictos
+        with redirect_stdout(StringIO()):
+            proceso_a._guardar_catalogo()
+        assert json.loads(proceso_a.catalog_path.read_text(encoding='utf-8')) == disco
+        assert {cid: proceso_a._buscar_registro(cid)[1]['last_verified'] for cid in esperado} == esperado
+
+
+def test_registros_compactos():
+    """RegistroColeccion se comporta como el dict original y comparte cadenas y bandas repetidas."""
+    original = {'nombre': 'Producto', 'nivel': ''.join(['L', '2']), 'bandas_principales': ['B1', 'B2'],
+                'last_verified': '2026-01-10T00:00:00', 'sensor_type': 'optico', 'notas': {'x': [1, 2]}}
+    registro = RegistroColeccion(original)
+    otro = RegistroColeccion({'nombre': 'Otro', 'nivel': 'L' + str(2), 'bandas_principales': ['B1', 'B2']})
+    assert registro == original and registro.a_dict() == original
+    assert list(registro) == ['nombre', 'bandas_principales', 'last_verified', 'nivel', 'sensor_type', 'notas']
+    assert len(registro) == 6 and 'qa' not in registro and registro.get('qa', '-') == '-'
+    assert registro['nivel'] is otro['nivel'], "el nivel no se internó"
+    assert registro['bandas_principales'] is otro['bandas_principales'], "las bandas no se comparten"
+    assert not hasattr(registro, '__dict__')
+
+    registro.update(qa='QA_PIXEL', nivel='L1')
+    del registro['sensor_type'], registro['notas']
+    assert registro._extra is None and registro['qa'] == 'QA_PIXEL' and registro['nivel'] == 'L1'
+    try:
+        registro['sensor_type']
+        raise AssertionError("un campo eliminado sigue accesible")
+    except KeyError:
+        pass
+
+    # JSON y snapshot devuelven el mismo registro
+    catalogo = {'_metadata': {'version': '2.2.0'}, 'otros': {'colecciones': {'A/B': dict(original)}}}
+    assert compactar_catalogo(catalogo) == 1
+    assert json.loads(json.dumps(catalogo_plano(catalogo))) == \
+        {'_metadata': {'version': '2.2.0'}, 'otros': {'colecciones': {'A/B': original}}}
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / 'catalogo.json'
+        ruta.write_bytes(b'{}')
+        firma = snapshot.firma_contenido(ruta, b'{}')
+        snapshot.guardar_snapshot(ruta, catalogo, firma)
+        cargado = snapshot.cargar_snapshot(ruta, firma)
+    recuperado = cargado['otros']['colecciones']['A/B']
+    assert isinstance(recuperado, RegistroColeccion) and recuperado == original
+
+
+def test_indice_temporal():
+    """Los períodos se parsean de todos los formatos del catálogo y el filtro por rango sigue las mutaciones."""
+    assert parsear_periodo({'temporal': '2017-03 a Presente'}) == (date(2017, 3, 1), None)
+    assert parsear_periodo({'temporal': '2000-2020'}) == (date(2000, 1, 1), date(2020, 12, 31))
+    assert parsear_periodo({'temporal': '[950832000000, 1647648000000]'}) == (date(2000, 2, 18), date(2022, 3, 19))
+    assert parsear_periodo({'temporal': 'Consultar en GEE'}) is None
+    # Fin cercano a la verificación = colección vigente
+    assert parsear_periodo({'date_start': '2021-10-31', 'date_end': '2025-11-11',
+                            'last_verified': '2026-01-01T00:00:00'}) == (date(2021, 10, 31), None)
+
+    # Rangos '[ms, ms]': el fin más reciente no futuro marca la fecha del volcado
+    indice = IndiceTemporal()
+    indice.actualizar('A', {'temporal': '[950832000000, 1647648000000]'})
+    indice.actualizar('B', {'temporal': '[950832000000, 1420070400000]'})
+    assert indice.periodo('A') == (date(2000, 2, 18), None)
+    assert indice.periodo('B') == (date(2000, 2, 18), date(2015, 1, 1))
+
+    colecciones = colecciones_ejemplo()
+    colecciones['otros'] = {'nombre': 'Otros', 'colecciones': {'X/SIN_PERIODO': {'temporal': 'Consultar en GEE'}}}
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones)
+        myd13 = 'MODIS/061/MYD13Q1'
+        assert catalogo.periodo_coleccion(myd13) == (date(2002, 7, 1), date(2024, 12, 31))
+        assert catalogo.colecciones_en_rango('2001-01-01', '2001-12-31') == {'MODIS/061/MOD13Q1', 'X/SIN_PERIODO'}
+        assert catalogo.colecciones_en_rango('2025-01-01', '2025-06-30', incluir_sin_periodo=False) == {
+            'COPERNICUS/S2_SR_HARMONIZED', 'COPERNICUS/S2_HARMONIZED', 'LANDSAT/LC09/C02/T1_L2',
+            'MODIS/061/MOD13Q1'}
+
+        catalogo.colecciones['vegetacion']['colecciones'][myd13]['temporal'] = '2002-07 a Presente'
+        catalogo._al_modificar(myd13)
+        assert myd13 in catalogo.colecciones_en_rango('2025-01-01', '2025-06-30')
+        del catalogo.colecciones['vegetacion']['colecciones'][myd13]
+        catalogo._al_modificar(myd13)
+        assert myd13 not in catalogo.colecciones_en_rango('2000-01-01', '2030-01-01')
+
+
+def test_arbol_de_prefijos():
+    """La exploración por proveedor cuenta colecciones por subárbol y sigue las mutaciones del catálogo."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones_ejemplo())
+        assert catalogo.explorar_prefijo() == [('COPERNICUS', 2, False), ('LANDSAT', 1, False), ('MODIS', 2, False)]
+        assert catalogo.explorar_prefijo('/MODIS/061/') == [('MODIS/061/MOD13Q1', 1, True),
+                                                            ('MODIS/061/MYD13Q1', 1, True)]
+        assert catalogo.contar_prefijo() == 5 and catalogo.contar_prefijo('COPERNICUS/') == 2
+        # Los prefijos son segmentos completos, no texto
+        assert catalogo.contar_prefijo('MOD') == 0 and catalogo.explorar_prefijo('NASA') == []
+        assert catalogo.colecciones_bajo_prefijo('', limite=3) == [
+            'COPERNICUS/S2_HARMONIZED', 'COPERNICUS/S2_SR_HARMONIZED', 'LANDSAT/LC09/C02/T1_L2']
+
+        # Una colección que también es carpeta de otra
+        catalogo._registrar_coleccion('LANDSAT/LC09/C02', metadata_simulada('LANDSAT/LC09/C02'), 'otros')
+        assert catalogo.explorar_prefijo('LANDSAT/LC09') == [('LANDSAT/LC09/C02', 2, True)]
+        assert catalogo.sugerir_ids('LANDSAT/LC09/C02') == []
+
+        for cid in ('LANDSAT/LC09/C02/T1_L2', 'LANDSAT/LC09/C02'):
+            cat, _ = catalogo._buscar_registro(cid)
+            del catalogo.colecciones[cat]['colecciones'][cid]
+            catalogo._al_modificar(cid)
+        assert [ruta for ruta, _, _ in catalogo.explorar_prefijo()] == ['COPERNICUS', 'MODIS']
+        assert catalogo.contar_prefijo() == 4
+
+
+def test_busqueda_por_trigramas():
+    """El filtro de candidatos no pierde resultados y la búsqueda tolera errores de tipeo."""
+    rng = random.Random(3)
+    palabras = ['sentinel', 'landsat', 'modis', 'surface', 'reflectance', 'harmonized', 'vegetation', 'lst']
+    textos = {f"P/{k:03d}": ' '.join(rng.sample(palabras, 3)) for k in range(300)}
+    indice = IndiceTrigramas()
+    for clave, texto in textos.items():
+        indice.agregar(clave, texto)
+    for consulta in ('sentinl surfase', 'landsat', 'vegetacion modis', 'reflectanse harmonised'):
+        for completo in (False, True):
+            q = trigramas(consulta)
+            esperado = []
+            for clave, texto in textos.items():
+                propios = trigramas(texto)
+                comunes = len(q & propios)
+                similitud = 2 * comunes / (len(q) + len(propios)) if completo else comunes / len(q)
+                if similitud >= 0.5:
+                    esperado.append((-similitud, len(propios), clave))
+            esperado = [(clave, -s) for s, _, clave in sorted(esperado)[:10]]
+            assert indice.buscar(consulta, 10, 0.5, completo) == esperado, (consulta, completo)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        catalogo = catalogo_temporal(carpeta, colecciones_ejemplo())
+        assert {cid for cid, _ in catalogo.buscar_aproximado('sentinl', limit=2)} == {
+            'COPERNICUS/S2_SR_HARMONIZED', 'COPERNICUS/S2_HARMONIZED'}
+        assert catalogo.sugerir_ids('COPERNICUS/S2_SR_HARMONISED')[0] == 'COPERNICUS/S2_SR_HARMONIZED'
+        catalogo._registrar_coleccion('NASA/GPM_L3/IMERG', dict(metadata_simulada('NASA/GPM_L3/IMERG'),
+                                                                nombre='GPM Precipitation'), 'clima')
+        assert catalogo.buscar_aproximado('precipitaton')[0][0] == 'NASA/GPM_L3/IMERG'
+
+
+def test_resumen_cliente_con_forma_del_servidor():
+    """ResumenCobertura.a_dict devuelve las mismas claves que resumen_cobertura_servidor, incluida la propiedad."""
+    imagenes = [{'fecha': '2020-01-05', 'nubes': 12.0, 'properties': {'CLOUD_COVER': 12.0}},
+                {'fecha': '2020-03-05', 'nubes': 3.5, 'properties': {'CLOUD_COVER': 3.5}},
+                {'fecha': '2021-02-01', 'nubes': None, 'properties': {}}]
+    resumen = analysis.ResumenCobertura(top=1)
+    for imagen in imagenes:
+        resumen.agregar(imagen)
+    datos = resumen.a_dict()
+    assert list(datos['nubes']) == ['propiedad', 'n', 'promedio', 'min', 'max'], datos['nubes']
+    assert datos['nubes']['propiedad'] == 'CLOUD_COVER' and datos['nubes']['n'] == 2
+    assert datos['por_periodo'] == {'2020': 2, '2021': 1} and datos['mejores'] == [('2020-03-05', 3.5)]
+
+    tabla = pd.DataFrame({'fecha': pd.to_datetime(['2020-01-05', '2020-02-05'], utc=True),
+                          'nubes': [40.0, 10.0], 'CLOUDY_PIXEL_PERCENTAGE': [40.0, 10.0]})
+    en_lote = analysis.ResumenCobertura(por='mes')
+    en_lote.agregar_tabla(tabla)
+    assert en_lote.a_dict()['nubes'] == {'propiedad': 'CLOUDY_PIXEL_PERCENTAGE', 'n': 2, 'promedio': 25.0,
+                                         'min': 10.0, 'max': 40.0}
+    assert analysis.ResumenCobertura().a_dict()['nubes'] is None
+
+
+VERIFICACIONES = [
+    test_revalidacion_concurrente_igual_a_serie,
+    test_crawler_paralelo_paginado,
+    test_transaccion_y_escritura_atomica,
+    test_indice_de_texto,
+    test_inventario_memoizado,
+    test_clasificacion_igual_a_referencia,
+    test_snapshot_descartado_si_cambia_el_json,
+    test_sqlite_importar_exportar_y_upsert,
+    test_cola_expiracion_y_modo_continuo,
+    test_recorrido_reanudable_y_carpetas_sin_cambios,
+    test_revalidacion_condicional_por_update_time,
+    test_listado_por_carpetas,
+    test_sondeo_por_lotes,
+    test_limpieza_solo_reutiliza_cache_reciente,
+    test_fusion_entre_procesos,
+    test_registros_compactos,
+    test_indice_temporal,
+    test_arbol_de_prefijos,
+    test_busqueda_por_trigramas,
+    test_enriquecimiento_coleccion_vigente,
+    test_plazo_api_restaura_limite,
+    test_timeout_por_llamada,
+    test_paginacion_con_paginas_desordenadas,
+    test_fechas_en_utc_en_ambos_modos,
+    test_filtro_nubes_no_catalogado_en_una_peticion,
+    test_resumen_cliente_con_forma_del_servidor,
+]
+
+
+def main():
+    print("\n" + "="*70)
+    print("TEST OFFLINE (sin credenciales)")
+    print("="*70)
+    inicializar_ee_offline()
+    # Los volcados del catálogo se registran con INFO; aquí solo interesan los avisos
+    logging.getLogger('src.gee_toolkit').setLevel(logging.WARNING)
+
+    fallidas = 0
+    for verificacion in VERIFICACIONES:
+        try:
+            verificacion()
+            print(f"[OK] {verificacion.__name__}")
+        except Exception:
+            fallidas += 1
+            print(f"[ERROR] {verificacion.__name__}")
+            traceback.print_exc()
+
+    print(f"\n{len(VERIFICACIONES) - fallidas}/{len(VERIFICACIONES)} verificaciones correctas")
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == '__main__':
+    main()
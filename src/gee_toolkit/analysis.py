@@ -2,27 +2,53 @@
 Módulo de análisis y búsqueda de imágenes en Earth Engine.
 """
 
+import csv
+import heapq
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
 import ee
 import pandas as pd
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Optional
 
 from .colecciones_config import soporta_filtro_nubes
 from .api_utils import retry_api_call
 
-@retry_api_call()
-def buscar_imagenes_por_espacio(
+logger = logging.getLogger(__name__)
+
+# Imágenes por petición al paginar (la info completa de una imagen Sentinel-2 ronda los 15 KB)
+TAMANO_PAGINA = 200
+
+# Propiedades de nubes conocidas, en orden de preferencia
+PROPIEDADES_NUBES = ('CLOUDY_PIXEL_PERCENTAGE', 'CLOUD_COVER')
+
+# Valor que reemplaza en el servidor a las propiedades ausentes: reduceColumns descarta
+# las filas con algún selector nulo, y así las columnas proyectadas quedan alineadas
+_SIN_VALOR = '__sin_valor__'
+
+# Propiedades que la proyección siempre pide (cursor de paginación e ID de la imagen)
+_CAMPOS_CURSOR = ('system:time_start', 'system:index')
+
+# Agrupación de la distribución temporal: longitud de 'YYYY-MM-DD' y formato de Joda en GEE
+PERIODOS = {'anio': (4, 'YYYY'), 'mes': (7, 'YYYY-MM')}
+
+
+def _filtrar_coleccion(
     collection_id: str,
     geometry: ee.Geometry,
     fecha_inicio: str,
     fecha_fin: str,
-    max_nubes: float = 100,
-    limite: int = 500
-) -> List[Dict]:
+    max_nubes: float = 100
+) -> ee.ImageCollection:
     """
-    Busca imágenes en una colección por espacio, tiempo y cobertura nubosa.
+    Colección filtrada por espacio, tiempo y cobertura nubosa.
     Optimizado para evitar operaciones costosas (size(), geometry() global).
+
+    Solo construye la expresión: no hace peticiones a GEE ni escribe en consola.
     """
     coleccion = ee.ImageCollection(collection_id)
     
@@ -34,75 +60,434 @@ def buscar_imagenes_por_espacio(
         .filterBounds(geometry) \
         .filterDate(fecha_inicio, fecha_fin)
     
-    # Verificar filtros de nubes de manera eficiente
+    if max_nubes >= 100:
+        return coleccion
+
     soporta, propiedad = soporta_filtro_nubes(collection_id)
     
-    if max_nubes < 100:
-        if soporta is True:
-            coleccion = coleccion.filter(ee.Filter.lt(propiedad, max_nubes))
-            print(f"[INFO] Filtro de nubes aplicado: {propiedad} < {max_nubes}%")
-        elif soporta is False:
-            print(f"[INFO] Sin filtro de nubes (tipo de colección no óptico)")
-        else:
-            # Detección dinámica optimizada: NO contar toda la colección
-            print(f"[INFO] Verificando propiedades de nubes...")
-            try:
-                # Solo traemos 1 imagen para inspeccionar metadata
-                sample = coleccion.limit(1).first()
-                # getInfo() aquí es rápido porque es solo 1 elemento
-                info = sample.getInfo()
-                
-                if info:
-                    props = info.get('properties', {})
-                    if 'CLOUDY_PIXEL_PERCENTAGE' in props:
-                        coleccion = coleccion.filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', max_nubes))
-                        print(f"[INFO] Filtro detectado y aplicado: CLOUDY_PIXEL_PERCENTAGE")
-                    elif 'CLOUD_COVER' in props:
-                        coleccion = coleccion.filter(ee.Filter.lt('CLOUD_COVER', max_nubes))
-                        print(f"[INFO] Filtro detectado y aplicado: CLOUD_COVER")
-            except Exception:
-                # Si falla (ej: colección vacía), simplemente no aplicamos filtro extra
-                pass
-    
-    # Aplicar límite estricto ANTES de cualquier operación de lista
-    coleccion = coleccion.limit(limite)
+    if soporta is True:
+        logger.debug(f"{collection_id}: filtro de nubes {propiedad} < {max_nubes}%")
+        return coleccion.filter(ee.Filter.lt(propiedad, max_nubes))
+    if soporta is False:
+        logger.debug(f"{collection_id}: sin filtro de nubes (tipo de colección no óptico)")
+        return coleccion
+
+    # Colección no catalogada: la propiedad se elige en el servidor según la primera
+    # imagen, dentro de la misma petición que la consulta (antes era un getInfo() extra).
+    # iterate sobre limit(1) devuelve la lista vacía si no hay imágenes.
+    logger.debug(f"{collection_id}: filtro de nubes resuelto en el servidor (< {max_nubes}%)")
+    nombres = ee.List(coleccion.limit(1).iterate(
+        lambda imagen, _: ee.Image(imagen).propertyNames(), ee.List([])))
+    filtrada = coleccion
+    for prop in reversed(PROPIEDADES_NUBES):
+        filtrada = ee.Algorithms.If(nombres.contains(prop),
+                                    coleccion.filter(ee.Filter.lt(prop, max_nubes)), filtrada)
+    return ee.ImageCollection(filtrada)
+
+
+def _fecha_desde_ms(fecha_ms: Optional[float]) -> Optional[str]:
+    if not fecha_ms:
+        return None
+    # UTC, como `Date.format` en GEE y la conversión vectorizada de `_tabla_columnas`
+    return datetime.fromtimestamp(fecha_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _registro_imagen(info: Dict) -> Dict:
+    props = info.get('properties', {})
+    fecha = _fecha_desde_ms(props.get('system:time_start'))
     
-    try:
-        # toList() ahora opera sobre un máximo de 'limite' elementos
-        img_list = coleccion.toList(limite)
-        
-        # Obtenemos el tamaño de la lista ya recortada (rápido)
-        size = img_list.size().getInfo()
+    nubes = props.get('CLOUDY_PIXEL_PERCENTAGE') or props.get('CLOUD_COVER')
+    
+    return {
+        'id': info['id'],
+        'fecha': fecha,
+        'nubes': nubes,
+        'properties': props
+    }
+
+
+@retry_api_call()
+def _obtener_pagina(coleccion: ee.ImageCollection, n: int) -> List[Dict]:
+    # Una petición: las `n` primeras imágenes por fecha (toList sobre un máximo de n elementos)
+    return coleccion.limit(n, 'system:time_start').toList(n).getInfo() or []
+
+
+@retry_api_call()
+def _obtener_columnas(coleccion: ee.ImageCollection, n: int, selectores: List[str]) -> Dict[str, list]:
+    # Una petición: una lista por propiedad (reduceColumns con toList repetido), sin dicts por imagen
+    def proyectar(img):
+        img = ee.Image(img)
+        nombres = img.propertyNames()
+        return ee.Feature(None, {s: ee.Algorithms.If(nombres.contains(s), img.get(s), _SIN_VALOR)
+                                 for s in selectores})
+    
+    filas = ee.FeatureCollection(coleccion.limit(n, 'system:time_start').map(proyectar))
+    listas = filas.reduceColumns(ee.Reducer.toList().repeat(len(selectores)), selectores).get('list').getInfo()
+    return dict(zip(selectores, listas or [[] for _ in selectores]))
+
+
+def _tabla_columnas(collection_id: str, columnas: Dict[str, list], campos: Sequence[str]) -> pd.DataFrame:
+    """
+    DataFrame de una página proyectada: 'id', 'fecha' (datetime64, UTC), 'nubes'
+    si se pidió alguna propiedad de nubes conocida, y una columna por campo.
+    """
+    datos = {}
+    for campo, valores in columnas.items():
+        serie = pd.Series(valores, dtype=object)
+        datos[campo] = serie.where(serie != _SIN_VALOR).infer_objects()
+    
+    tabla = pd.DataFrame({
+        'id': collection_id + '/' + datos['system:index'].astype(str),
+        'fecha': pd.to_datetime(pd.to_numeric(datos['system:time_start']), unit='ms'),
+    })
+    nubes = [datos[p] for p in PROPIEDADES_NUBES if p in campos]
+    if nubes:
+        tabla['nubes'] = pd.to_numeric(nubes[0]) if len(nubes) == 1 else \
+            pd.to_numeric(nubes[0]).combine_first(pd.to_numeric(nubes[1]))
+    for campo in campos:
+        tabla[campo] = datos[campo]
+    return tabla
+
+
+def iterar_paginas_imagenes(
+    collection_id: str,
+    geometry: ee.Geometry,
+    fecha_inicio: str,
+    fecha_fin: str,
+    max_nubes: float = 100,
+    tamano_pagina: int = TAMANO_PAGINA,
+    limite: Optional[int] = None,
+    campos: Optional[Sequence[str]] = None
+) -> Iterator[Union[List[Dict], pd.DataFrame]]:
+    """
+    Recorre las imágenes de la búsqueda en orden cronológico, página por página.
+    
+    Pagina con un cursor temporal: cada petición pide las imágenes con
+    `system:time_start` >= la última fecha entregada, excluyendo las ya
+    entregadas con esa misma fecha (ej: varias granules de Sentinel-2 en la
+    misma pasada). A diferencia de un offset, el servidor no recorre de nuevo
+    lo ya paginado, y en memoria solo hay una página a la vez.
+    
+    Con `campos` solo se piden esas propiedades, como listas paralelas en el
+    servidor: la transferencia y la memoria dependen de las columnas usadas y
+    no de las decenas de propiedades de cada imagen.
+    
+    Args:
+        tamano_pagina: Imágenes por petición
+        limite: Máximo total de imágenes (None = todas)
+        campos: Propiedades a proyectar (ej: ['CLOUDY_PIXEL_PERCENTAGE', 'MGRS_TILE']);
+            None = propiedades completas
         
-        if size == 0:
-            return []
+    Yields:
+        Listas de registros {'id', 'fecha', 'nubes', 'properties'}, o con
+        `campos`, un DataFrame por página (ver `_tabla_columnas`)
+    """
+    coleccion = _filtrar_coleccion(collection_id, geometry, fecha_inicio, fecha_fin, max_nubes)
+    if campos is not None:
+        campos = list(dict.fromkeys(campos))
+        selectores = list(dict.fromkeys([*_CAMPOS_CURSOR, *campos]))
+    tamano_pagina = max(1, tamano_pagina)
+    cursor: Optional[int] = None
+    en_cursor: List[str] = []   # system:index ya entregados con time_start == cursor
+    entregadas = 0
+    
+    while limite is None or entregadas < limite:
+        n = tamano_pagina if limite is None else min(tamano_pagina, limite - entregadas)
+        pagina = coleccion
+        if cursor is not None:
+            pagina = pagina.filter(ee.Filter.gte('system:time_start', cursor))
+            if en_cursor:
+                pagina = pagina.filter(ee.Filter.inList('system:index', en_cursor).Not())
         
-        imagenes = []
-        # Traer toda la info de una vez es más eficiente que iterar getInfo()
-        # getInfo() sobre la lista completa
-        lista_info = img_list.getInfo()
+        if campos is None:
+            infos = _obtener_pagina(pagina, n)
+            props = [info.get('properties', {}) for info in infos]
+            tiempos = [p.get('system:time_start') for p in props]
+            indices = [p.get('system:index', info['id'].rsplit('/', 1)[-1]) for p, info in zip(props, infos)]
+        else:
+            columnas = _obtener_columnas(pagina, n, selectores)
+            tiempos = [None if t == _SIN_VALOR else t for t in columnas['system:time_start']]
+            indices = columnas['system:index']
+        if not tiempos:
+            return
         
-        for info in lista_info:
-            props = info.get('properties', {})
-            fecha_ms = props.get('system:time_start')
-            fecha = None
-            if fecha_ms:
-                fecha = datetime.fromtimestamp(fecha_ms / 1000).strftime('%Y-%m-%d')
-            
-            nubes = props.get('CLOUDY_PIXEL_PERCENTAGE') or props.get('CLOUD_COVER')
-            
-            imagenes.append({
-                'id': info['id'],
-                'fecha': fecha,
-                'nubes': nubes,
-                'properties': props
-            })
+        # La página trae las `n` imágenes más antiguas, pero reduceColumns/toList no
+        # garantizan el orden de las filas: se ordena en el cliente (sin fecha al final)
+        orden = sorted(range(len(tiempos)), key=lambda i: (tiempos[i] is None, tiempos[i] or 0))
+        if campos is None:
+            yield [_registro_imagen(infos[i]) for i in orden]
+        else:
+            yield _tabla_columnas(collection_id, {c: [v[i] for i in orden] for c, v in columnas.items()}, campos)
+        entregadas += len(tiempos)
+        if len(tiempos) < n:
+            return
         
-        return imagenes
+        # El cursor es la fecha más reciente de la página, no la de la última fila recibida
+        con_fecha = [t for t in tiempos if t is not None]
+        if not con_fecha:
+            logger.warning(f"{collection_id}: imágenes sin system:time_start, se detiene la paginación")
+            return
+        ultimo = max(con_fecha)
+        if ultimo != cursor:
+            cursor, en_cursor = ultimo, []
+        en_cursor.extend(indice for tiempo, indice in zip(tiempos, indices) if tiempo == ultimo)
+
+
+def iterar_imagenes_por_espacio(*args, **kwargs) -> Iterator[Dict]:
+    """
+    Igual que `iterar_paginas_imagenes` (sin `campos`), imagen por imagen.
+    """
+    for pagina in iterar_paginas_imagenes(*args, **kwargs):
+        yield from pagina
+
+
+def buscar_imagenes_por_espacio(
+    collection_id: str,
+    geometry: ee.Geometry,
+    fecha_inicio: str,
+    fecha_fin: str,
+    max_nubes: float = 100,
+    limite: Optional[int] = None,
+    campos: Optional[Sequence[str]] = None
+) -> Union[List[Dict], pd.DataFrame]:
+    """
+    Busca imágenes en una colección por espacio, tiempo y cobertura nubosa.
+    
+    Devuelve la lista completa en memoria; para rangos largos conviene
+    consumir `iterar_imagenes_por_espacio` directamente.
     
+    Args:
+        limite: Máximo de imágenes (None = todas, paginando)
+        campos: Propiedades a proyectar; si se indican, devuelve un DataFrame
+            columnar ('id', 'fecha', ['nubes'], campos...) en lugar de dicts
+    """
+    try:
+        if campos is not None:
+            paginas = list(iterar_paginas_imagenes(collection_id, geometry, fecha_inicio, fecha_fin,
+                                                   max_nubes, limite=limite, campos=campos))
+            return pd.concat(paginas, ignore_index=True) if paginas else pd.DataFrame()
+        return list(iterar_imagenes_por_espacio(collection_id, geometry, fecha_inicio, fecha_fin,
+                                                max_nubes, limite=limite))
     except Exception as e:
         print(f"[ERROR] al obtener imágenes: {e}")
+        return [] if campos is None else pd.DataFrame()
+
+
+class ResumenCobertura:
+    """
+    Agregados de la búsqueda calculados a medida que llegan las imágenes:
+    conteo por año (o mes), estadísticas de nubes y las `top` imágenes con menos nubes.
+    """
+
+    def __init__(self, top: int = 5, por: str = 'anio'):
+        self.total = 0
+        self.por_periodo: Counter = Counter()
+        self._largo_periodo = PERIODOS[por][0]
+        self._formato_periodo = '%Y' if por == 'anio' else '%Y-%m'
+        self.n_nubes = 0
+        self.suma_nubes = 0.0
+        self.min_nubes: Optional[float] = None
+        self.max_nubes: Optional[float] = None
+        self.propiedad_nubes: Optional[str] = None   # propiedad de la que salieron los valores de nubes
+        self._top = top
+        self._mejores: List[Tuple[float, int, str]] = []   # montículo de máximos (nubes negadas)
+
+    def agregar(self, imagen: Dict) -> None:
+        self.total += 1
+        if imagen.get('fecha'):
+            self.por_periodo[imagen['fecha'][:self._largo_periodo]] += 1
+        nubes = imagen.get('nubes')
+        if nubes is None:
+            return
+        if self.propiedad_nubes is None:
+            props = imagen.get('properties') or {}
+            self.propiedad_nubes = next((p for p in PROPIEDADES_NUBES if props.get(p) is not None), None)
+        nubes = float(nubes)
+        self.n_nubes += 1
+        self.suma_nubes += nubes
+        self.min_nubes = nubes if self.min_nubes is None else min(self.min_nubes, nubes)
+        self.max_nubes = nubes if self.max_nubes is None else max(self.max_nubes, nubes)
+        self._considerar(nubes, self.total, imagen.get('fecha') or '')
+
+    def _considerar(self, nubes: float, orden: int, fecha: str) -> None:
+        entrada = (-nubes, -orden, fecha)
+        if len(self._mejores) < self._top:
+            heapq.heappush(self._mejores, entrada)
+        elif entrada > self._mejores[0]:
+            heapq.heapreplace(self._mejores, entrada)
+
+    def agregar_tabla(self, tabla: pd.DataFrame) -> None:
+        """
+        Agrega una página proyectada (`iterar_paginas_imagenes(campos=...)`)
+        con operaciones vectorizadas.
+        """
+        tabla = tabla.reset_index(drop=True)
+        fechas = tabla['fecha']
+        self.por_periodo.update(fechas.dropna().dt.strftime(self._formato_periodo).value_counts().to_dict())
+        if 'nubes' in tabla:
+            nubes = tabla['nubes']
+            con_nubes = nubes.notna()
+            if con_nubes.any():
+                if self.propiedad_nubes is None:
+                    self.propiedad_nubes = next((p for p in PROPIEDADES_NUBES
+                                                 if p in tabla and tabla[p].notna().any()), None)
+                valores = nubes[con_nubes]
+                self.n_nubes += int(con_nubes.sum())
+                self.suma_nubes += float(valores.sum())
+                self.min_nubes = float(valores.min()) if self.min_nubes is None else min(self.min_nubes, float(valores.min()))
+                self.max_nubes = float(valores.max()) if self.max_nubes is None else max(self.max_nubes, float(valores.max()))
+                # Solo las `top` mejores de la página pueden entrar al montículo
+                for posicion, valor in valores.nsmallest(self._top, keep='first').items():
+                    fecha = fechas[posicion]
+                    self._considerar(float(valor), self.total + posicion + 1,
+                                     '' if pd.isna(fecha) else fecha.strftime('%Y-%m-%d'))
+        self.total += len(tabla)
+
+    @property
+    def promedio_nubes(self) -> Optional[float]:
+        return self.suma_nubes / self.n_nubes if self.n_nubes else None
+
+    def mejores(self) -> List[Tuple[str, float]]:
+        """
+        (fecha, nubes) de las imágenes con menos nubes, de menor a mayor
+        (a igual cobertura, la que llegó primero).
+        """
+        return [(fecha, -nubes) for nubes, _, fecha in sorted(self._mejores, reverse=True)]
+
+    def a_dict(self) -> Dict:
+        """
+        Resumen con la misma forma que `resumen_cobertura_servidor`.
+        """
+        nubes = None
+        if self.n_nubes:
+            nubes = {'propiedad': self.propiedad_nubes, 'n': self.n_nubes, 'promedio': self.promedio_nubes,
+                     'min': self.min_nubes, 'max': self.max_nubes}
+        return {
+            'total': self.total,
+            'por_periodo': dict(sorted(self.por_periodo.items())),
+            'nubes': nubes,
+            'mejores': self.mejores(),
+        }
+
+
+def _propiedades_nubes(collection_id: str) -> List[str]:
+    # Propiedades de nubes a consultar; tipo desconocido: todas las conocidas (se usa la que tenga valores)
+    soporta, propiedad = soporta_filtro_nubes(collection_id)
+    if soporta is True:
+        return [propiedad]
+    if soporta is False:
         return []
+    return list(PROPIEDADES_NUBES)
+
+
+def _estadisticas_nubes(coleccion: ee.ImageCollection, propiedad: str, top: int) -> ee.Dictionary:
+    con_valor = coleccion.filter(ee.Filter.notNull([propiedad]))
+    mejores = con_valor.limit(top, propiedad)
+    estadisticas = ee.Dictionary({
+        'n': con_valor.size(),
+        'promedio': con_valor.aggregate_mean(propiedad),
+        'min': con_valor.aggregate_min(propiedad),
+        'max': con_valor.aggregate_max(propiedad),
+        'mejores_ms': mejores.aggregate_array('system:time_start'),
+        'mejores_nubes': mejores.aggregate_array(propiedad),
+    })
+    # Los agregados sobre una colección vacía fallan: solo se evalúan si hay valores
+    return ee.Dictionary(ee.Algorithms.If(con_valor.size().gt(0), estadisticas, {'n': 0}))
+
+
+@retry_api_call()
+def resumen_cobertura_servidor(
+    collection_id: str,
+    geometry: ee.Geometry,
+    fecha_inicio: str,
+    fecha_fin: str,
+    max_nubes: float = 100,
+    por: str = 'anio',
+    top: int = 5
+) -> Dict:
+    """
+    Resumen de cobertura calculado en GEE, en una sola petición.
+    
+    El conteo por período sale de `aggregate_histogram` y las estadísticas de
+    nubes de `aggregate_mean/min/max` sobre la colección filtrada; solo vuelve
+    el resumen (cientos de bytes), no las propiedades de cada imagen, y no hay
+    tope en la cantidad de imágenes consideradas.
+    
+    Args:
+        por: Agrupación de la distribución temporal ('anio' o 'mes')
+        top: Cantidad de imágenes con menos nubes a incluir
+        
+    Returns:
+        {'total', 'por_periodo': {periodo: n}, 'nubes': {'propiedad', 'n',
+        'promedio', 'min', 'max'} o None, 'mejores': [(fecha, nubes)]}
+    """
+    formato = PERIODOS[por][1]
+    coleccion = _filtrar_coleccion(collection_id, geometry, fecha_inicio, fecha_fin, max_nubes)
+    
+    candidatas = _propiedades_nubes(collection_id)
+    con_periodo = coleccion.map(lambda img: img.set('_periodo', img.date().format(formato)))
+    resultado = ee.Dictionary({
+        'total': coleccion.size(),
+        'por_periodo': con_periodo.aggregate_histogram('_periodo'),
+        'nubes': ee.Dictionary({p: _estadisticas_nubes(coleccion, p, top) for p in candidatas}),
+    }).getInfo()
+    
+    nubes, mejores = None, []
+    for prop in candidatas:
+        estadisticas = resultado['nubes'].get(prop) or {}
+        if estadisticas.get('n'):
+            nubes = {'propiedad': prop, 'n': estadisticas['n'], 'promedio': estadisticas['promedio'],
+                     'min': estadisticas['min'], 'max': estadisticas['max']}
+            mejores = [(_fecha_desde_ms(ms), valor) for ms, valor
+                       in zip(estadisticas['mejores_ms'], estadisticas['mejores_nubes'])]
+            break
+    
+    return {
+        'total': resultado['total'],
+        'por_periodo': dict(sorted((resultado['por_periodo'] or {}).items())),
+        'nubes': nubes,
+        'mejores': mejores,
+    }
+
+
+def _imprimir_resumen(resumen: Dict) -> None:
+    print(f"[OK] Imágenes encontradas: {resumen['total']}")
+    
+    # Análisis por período
+    if resumen['por_periodo']:
+        print("\n" + "-"*70)
+        print("DISTRIBUCIÓN TEMPORAL:")
+        print("-"*70)
+        for periodo, count in resumen['por_periodo'].items():
+            print(f"  {periodo}: {count:3d} imágenes")
+    
+    # Análisis de nubes si está disponible
+    nubes = resumen['nubes']
+    if nubes:
+        print("\n" + "-"*70)
+        print("CALIDAD (% NUBES):")
+        print("-"*70)
+        print(f"  Promedio: {nubes['promedio']:.1f}%")
+        print(f"  Mínimo:   {nubes['min']:.1f}%")
+        print(f"  Máximo:   {nubes['max']:.1f}%")
+        
+        # Mejores imágenes
+        print("\n" + "-"*70)
+        print(f"TOP {len(resumen['mejores'])} MEJORES IMÁGENES (menos nubes):")
+        print("-"*70)
+        for fecha, valor in resumen['mejores']:
+            print(f"  {fecha} - {valor:.2f}% nubes")
+
+
+def _imprimir_area(geometry: ee.Geometry) -> None:
+    # Calcular área (protegido contra errores geométricos)
+    try:
+        # Usamos bestEffort=True y maxError para evitar fallos en geometrías complejas
+        area_m2 = geometry.area(maxError=1000).getInfo()
+        area_ha = area_m2 / 10000
+        print(f"\n[INFO] Área aprox: {area_ha:.2f} ha ({area_m2/1000000:.2f} km²)")
+    except Exception:
+        print(f"\n[INFO] Área: (Cálculo omitido por complejidad geométrica)")
 
 
 def analizar_cobertura_temporal(
@@ -112,7 +497,11 @@ def analizar_cobertura_temporal(
     fecha_inicio: str = '2020-01-01',
     fecha_fin: str = '2024-12-31',
     max_nubes: float = 100,
-    output_dir: Optional[Path] = None
+    output_dir: Optional[Path] = None,
+    limite: Optional[int] = None,
+    solo_resumen: bool = False,
+    por: str = 'anio',
+    campos: Optional[Sequence[str]] = None
 ):
     """
     Analiza la cobertura temporal de una colección en un área e imprime reporte.
@@ -125,20 +514,21 @@ def analizar_cobertura_temporal(
         fecha_fin: Fecha fin (YYYY-MM-DD)
         max_nubes: % máximo de nubes
         output_dir: Directorio para guardar el CSV (opcional, default 'output')
+        limite: Máximo de imágenes a analizar (None = todas, paginando)
+        solo_resumen: Calcular las estadísticas en GEE (`resumen_cobertura_servidor`)
+            sin descargar las imágenes ni exportar CSV
+        por: Agrupación de la distribución temporal ('anio' o 'mes')
+        campos: Propiedades a exportar al CSV (una columna cada una) en lugar del
+            dict completo de propiedades; solo se descargan esas (y las de nubes)
+        
+    Returns:
+        Resumen mostrado (ver `resumen_cobertura_servidor`) o None si no hubo imágenes
     """
     print("\n" + "="*70)
     print(f"ANÁLISIS DE COBERTURA TEMPORAL: {nombre_area.upper()}")
     print("="*70)
     
-    # Calcular área (protegido contra errores geométricos)
-    try:
-        # Usamos bestEffort=True y maxError para evitar fallos en geometrías complejas
-        area_m2 = geometry.area(maxError=1000).getInfo()
-        area_ha = area_m2 / 10000
-        print(f"\n[INFO] Área aprox: {area_ha:.2f} ha ({area_m2/1000000:.2f} km²)")
-    except Exception:
-        print(f"\n[INFO] Área: (Cálculo omitido por complejidad geométrica)")
-
+    _imprimir_area(geometry)
     print(f"[INFO] Colección: {collection_id}")
     print(f"[INFO] Período: {fecha_inicio} a {fecha_fin}")
     print(f"[INFO] Filtro nubes: ≤{max_nubes}%")
@@ -146,62 +536,314 @@ def analizar_cobertura_temporal(
     # Buscar imágenes
     print("\n[INFO] Analizando cobertura temporal...")
     
+    if solo_resumen:
+        try:
+            resumen = resumen_cobertura_servidor(collection_id, geometry, fecha_inicio, fecha_fin,
+                                                 max_nubes, por=por)
+        except Exception as e:
+            print(f"[ERROR] Error en análisis: {e}")
+            return
+        if not resumen['total']:
+            print("[WARN] No se encontraron imágenes")
+            return
+        _imprimir_resumen(resumen)
+        return resumen
+    
+    if output_dir is None:
+        output_dir = Path('output')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    csv_path = output_dir / f'busqueda_espacial_{nombre_area}_{timestamp}.csv'
+    
+    # Las páginas se agregan y se escriben al CSV a medida que llegan:
+    # la memoria no crece con la cantidad de imágenes
+    resumen = ResumenCobertura(top=5, por=por)
+    archivo = None
     try:
-        imagenes = buscar_imagenes_por_espacio(
+        paginas = iterar_paginas_imagenes(
             collection_id=collection_id,
             geometry=geometry,
             fecha_inicio=fecha_inicio,
             fecha_fin=fecha_fin,
             max_nubes=max_nubes,
-            limite=500
+            limite=limite,
+            campos=None if campos is None else [*campos, *_propiedades_nubes(collection_id)]
         )
-        
-        if not imagenes:
-            print("[WARN] No se encontraron imágenes")
+        for n_pagina, pagina in enumerate(paginas, 1):
+            if archivo is None:
+                output_dir.mkdir(exist_ok=True, parents=True)
+                archivo = open(csv_path, 'w', newline='', encoding='utf-8')
+                if campos is None:
+                    escritor = csv.DictWriter(archivo, fieldnames=['id', 'fecha', 'nubes', 'properties', 'año'])
+                    escritor.writeheader()
+            if campos is None:
+                for imagen in pagina:
+                    resumen.agregar(imagen)
+                    escritor.writerow({**imagen, 'año': imagen['fecha'][:4] if imagen['fecha'] else None})
+            else:
+                resumen.agregar_tabla(pagina)
+                columnas = ['id', 'fecha', 'nubes', *campos] if 'nubes' in pagina else ['id', 'fecha', *campos]
+                salida = pagina[list(dict.fromkeys(columnas))].assign(
+                    fecha=pagina['fecha'].dt.strftime('%Y-%m-%d'), año=pagina['fecha'].dt.year)
+                salida.to_csv(archivo, header=n_pagina == 1, index=False)
+            print(f"[INFO] Página {n_pagina}: {len(pagina)} imágenes (total {resumen.total})")
+    except Exception as e:
+        print(f"[ERROR] Error en análisis: {e}")
+        if not resumen.total:
             return
+        print(f"[WARN] Resumen parcial de las {resumen.total} imágenes recibidas")
+    finally:
+        if archivo is not None:
+            archivo.close()
+    
+    if not resumen.total:
+        print("[WARN] No se encontraron imágenes")
+        return
+    
+    _imprimir_resumen(resumen.a_dict())
+    print(f"\n[OK] Resultados exportados a: {csv_path}")
+    return resumen.a_dict()
+
+
+def _disponibilidad_coleccion(
+    collection_id: str,
+    geometry: ee.Geometry,
+    fecha_inicio: str,
+    fecha_fin: str,
+    max_nubes: float,
+    por: str
+) -> Dict:
+    # Una fila de la comparación: la búsqueda se proyecta a fecha y nubes (sin propiedades completas)
+    inicio = time.perf_counter()
+    fila: Dict = {'collection_id': collection_id}
+    try:
+        paginas = list(iterar_paginas_imagenes(collection_id, geometry, fecha_inicio, fecha_fin,
+                                               max_nubes, campos=_propiedades_nubes(collection_id)))
+    except Exception as e:
+        logger.error(f"Error buscando imágenes de {collection_id}: {e}")
+        return {**fila, 'imagenes': None, 'error': str(e), 'segundos': round(time.perf_counter() - inicio, 1)}
+    
+    tabla = pd.concat(paginas, ignore_index=True) if paginas else pd.DataFrame({'fecha': pd.Series(dtype='datetime64[ms]')})
+    resumen = ResumenCobertura(por=por)
+    if len(tabla):
+        resumen.agregar_tabla(tabla)
+    datos = resumen.a_dict()
+    
+    dias = tabla['fecha'].dt.normalize().drop_duplicates()
+    fila.update({
+        'imagenes': datos['total'],
+        'fechas_distintas': len(dias),
+        'primera': dias.min().strftime('%Y-%m-%d') if len(dias) else None,
+        'ultima': dias.max().strftime('%Y-%m-%d') if len(dias) else None,
+        # Mediana de días entre adquisiciones distintas (revisita efectiva sobre el área)
+        'dias_entre_imagenes': float(dias.diff().dt.days.median()) if len(dias) > 1 else None,
+        'nubes_promedio': round(datos['nubes']['promedio'], 1) if datos['nubes'] else None,
+        'nubes_min': round(datos['nubes']['min'], 1) if datos['nubes'] else None,
+        **datos['por_periodo'],
+        'error': None,
+        'segundos': round(time.perf_counter() - inicio, 1),
+    })
+    return fila
+
+
+def comparar_colecciones(
+    collection_ids: Sequence[str],
+    geometry: ee.Geometry,
+    nombre_area: str,
+    fecha_inicio: str = '2020-01-01',
+    fecha_fin: str = '2024-12-31',
+    max_nubes: float = 100,
+    workers: int = 4,
+    por: str = 'anio',
+    output_dir: Optional[Path] = None
+) -> pd.DataFrame:
+    """
+    Compara la disponibilidad de varias colecciones sobre la misma área.
+    
+    Las búsquedas corren en paralelo (hasta `workers` a la vez), así que el
+    tiempo total se acerca al de la colección más lenta y no a la suma. El
+    área se calcula una sola vez.
+    
+    Args:
+        collection_ids: Colecciones a comparar (ej: S2 SR, Landsat 8/9 L2, S1 GRD)
+        geometry: Geometría del área
+        nombre_area: Nombre del área para display y el CSV
+        workers: Búsquedas simultáneas
+        por: Agrupación de los conteos por período ('anio' o 'mes')
+        output_dir: Directorio para guardar el CSV (opcional, default 'output')
         
-        print(f"[OK] Imágenes encontradas: {len(imagenes)}")
-        
-        # Análisis por año
-        df = pd.DataFrame(imagenes)
-        if 'fecha' in df.columns and df['fecha'].notna().any():
-            df['año'] = pd.to_datetime(df['fecha']).dt.year
-            por_año = df.groupby('año').size()
-            
-            print("\n" + "-"*70)
-            print("DISTRIBUCIÓN TEMPORAL:")
-            print("-"*70)
-            for año, count in por_año.items():
-                print(f"  {año}: {count:3d} imágenes")
-            
-            # Análisis de nubes si está disponible
-            if 'nubes' in df.columns and df['nubes'].notna().any():
-                print("\n" + "-"*70)
-                print("CALIDAD (% NUBES):")
-                print("-"*70)
-                print(f"  Promedio: {df['nubes'].mean():.1f}%")
-                print(f"  Mínimo:   {df['nubes'].min():.1f}%")
-                print(f"  Máximo:   {df['nubes'].max():.1f}%")
-                
-                # Mejores imágenes
-                mejores = df.nsmallest(5, 'nubes')[['fecha', 'nubes']]
-                print("\n" + "-"*70)
-                print("TOP 5 MEJORES IMÁGENES (menos nubes):")
-                print("-"*70)
-                for idx, row in mejores.iterrows():
-                    print(f"  {row['fecha']} - {row['nubes']:.2f}% nubes")
-            
-            # Exportar CSV
-            if output_dir is None:
-                output_dir = Path('output')
-            
-            output_dir.mkdir(exist_ok=True, parents=True)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            csv_path = output_dir / f'busqueda_espacial_{nombre_area}_{timestamp}.csv'
-            
-            df.to_csv(csv_path, index=False)
-            print(f"\n[OK] Resultados exportados a: {csv_path}")
+    Returns:
+        DataFrame con una fila por colección: imágenes, fechas distintas,
+        primera/última, días entre imágenes, nubes, conteo por período y error
+    """
+    collection_ids = list(dict.fromkeys(collection_ids))
+    print("\n" + "="*70)
+    print(f"COMPARACIÓN DE COLECCIONES: {nombre_area.upper()}")
+    print("="*70)
+    _imprimir_area(geometry)
+    print(f"[INFO] Colecciones: {len(collection_ids)}")
+    print(f"[INFO] Período: {fecha_inicio} a {fecha_fin}")
+    print(f"[INFO] Filtro nubes: ≤{max_nubes}%")
+    print(f"\n[INFO] Buscando en paralelo ({min(max(1, workers), len(collection_ids) or 1)} a la vez)...")
+    
+    inicio = time.perf_counter()
+    filas: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='gee-comparar') as pool:
+        futuros = {pool.submit(_disponibilidad_coleccion, cid, geometry, fecha_inicio, fecha_fin,
+                               max_nubes, por): cid for cid in collection_ids}
+        for futuro in as_completed(futuros):
+            fila = futuro.result()
+            filas[fila['collection_id']] = fila
+            if fila['error']:
+                print(f"[ERROR] {fila['collection_id']}: {fila['error']}")
+            else:
+                print(f"[OK] {fila['collection_id']}: {fila['imagenes']} imágenes ({fila['segundos']} s)")
+    duracion = time.perf_counter() - inicio
+    
+    # Orden de entrada; las columnas por período van ordenadas después de las fijas
+    tabla = pd.DataFrame([filas[cid] for cid in collection_ids])
+    fijas = ['collection_id', 'imagenes', 'fechas_distintas', 'primera', 'ultima',
+             'dias_entre_imagenes', 'nubes_promedio', 'nubes_min']
+    periodos = sorted(c for c in tabla.columns if c not in fijas and c not in ('error', 'segundos'))
+    tabla = tabla.reindex(columns=[*fijas, *periodos, 'error', 'segundos'])
+    sin_error = tabla['error'].isna()
+    tabla.loc[sin_error, periodos] = tabla.loc[sin_error, periodos].fillna(0)
+    tabla[['imagenes', 'fechas_distintas', *periodos]] = \
+        tabla[['imagenes', 'fechas_distintas', *periodos]].astype('Int64')
+    
+    print("\n" + "-"*70)
+    print("DISPONIBILIDAD POR COLECCIÓN:")
+    print("-"*70)
+    print(tabla.drop(columns=['error']).to_string(index=False, na_rep='-'))
+    
+    suma = tabla['segundos'].sum()
+    print(f"\n[INFO] Tiempo total: {duracion:.1f} s (suma de las búsquedas: {suma:.1f} s)")
+    
+    if output_dir is None:
+        output_dir = Path('output')
+    output_dir.mkdir(exist_ok=True, parents=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    csv_path = output_dir / f'comparacion_colecciones_{nombre_area}_{timestamp}.csv'
+    tabla.to_csv(csv_path, index=False)
+    print(f"\n[OK] Comparación exportada a: {csv_path}")
+    return tabla
+
+
+@retry_api_call()
+def cobertura_por_feature(
+    collection_id: str,
+    features: ee.FeatureCollection,
+    fecha_inicio: str,
+    fecha_fin: str,
+    max_nubes: float = 100,
+    campo_id: str = 'feature_id'
+) -> pd.DataFrame:
+    """
+    Imágenes disponibles para cada feature de una colección de polígonos, en
+    una sola petición.
+    
+    La búsqueda se mapea sobre `features` en el servidor (filterBounds por
+    feature) y solo vuelven los agregados: cantidad de imágenes, fechas
+    distintas, primera/última fecha y nubes promedio. Cientos de parcelas
+    cuestan una petición en lugar de una consulta completa por parcela
+    (`getInfo` admite hasta 5000 features por llamada).
+    
+    Args:
+        features: Polígonos con el identificador en `campo_id` (ver `geo_utils.features_ee`)
+        campo_id: Propiedad que identifica cada feature
         
+    Returns:
+        DataFrame con una fila por feature, en el orden de `features`: campo_id,
+        imagenes, fechas_distintas, primera, ultima, nubes_promedio
+    """
+    # filterBounds con todas las features acota la colección antes de mapear
+    coleccion = _filtrar_coleccion(collection_id, features, fecha_inicio, fecha_fin, max_nubes)
+    candidatas = _propiedades_nubes(collection_id)
+    
+    def por_feature(feature):
+        feature = ee.Feature(feature)
+        imagenes = coleccion.filterBounds(feature.geometry())
+        hay = imagenes.size().gt(0)
+        dias = imagenes.aggregate_array('system:time_start') \
+            .map(lambda t: ee.Date(t).format('YYYY-MM-dd')).distinct()
+        propiedades = {
+            campo_id: feature.get(campo_id),
+            'imagenes': imagenes.size(),
+            'fechas_distintas': dias.size(),
+            # Los agregados sobre una colección vacía fallan: solo se evalúan si hay imágenes
+            'primera_ms': ee.Algorithms.If(hay, imagenes.aggregate_min('system:time_start'), None),
+            'ultima_ms': ee.Algorithms.If(hay, imagenes.aggregate_max('system:time_start'), None),
+        }
+        for prop in candidatas:
+            con_valor = imagenes.filter(ee.Filter.notNull([prop]))
+            propiedades[prop] = ee.Algorithms.If(con_valor.size().gt(0), con_valor.aggregate_mean(prop), None)
+        return ee.Feature(None, propiedades)
+    
+    resultado = features.map(por_feature).getInfo()
+    filas = [f.get('properties', {}) for f in resultado.get('features', [])]
+    
+    tabla = pd.DataFrame(filas, columns=[campo_id, 'imagenes', 'fechas_distintas', 'primera_ms', 'ultima_ms',
+                                         *candidatas])
+    for extremo in ('primera', 'ultima'):
+        tabla[extremo] = pd.to_datetime(tabla.pop(f'{extremo}_ms'), unit='ms').dt.strftime('%Y-%m-%d')
+    nubes = pd.Series(float('nan'), index=tabla.index)
+    for prop in candidatas:
+        nubes = nubes.combine_first(pd.to_numeric(tabla.pop(prop)))
+    tabla['nubes_promedio'] = nubes.round(1)
+    tabla[['imagenes', 'fechas_distintas']] = tabla[['imagenes', 'fechas_distintas']].astype('Int64')
+    return tabla
+
+
+def analizar_cobertura_por_feature(
+    collection_id: str,
+    features: ee.FeatureCollection,
+    nombre_area: str,
+    fecha_inicio: str = '2020-01-01',
+    fecha_fin: str = '2024-12-31',
+    max_nubes: float = 100,
+    campo_id: str = 'feature_id',
+    output_dir: Optional[Path] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Reporte de `cobertura_por_feature` y exportación de la tabla a CSV.
+    
+    Args:
+        collection_id: ID de la colección
+        features: Polígonos a analizar (ver `geo_utils.cargar_features_geojson`)
+        nombre_area: Nombre del archivo/área para display y el CSV
+        campo_id: Propiedad que identifica cada feature
+        output_dir: Directorio para guardar el CSV (opcional, default 'output')
+    """
+    print("\n" + "="*70)
+    print(f"COBERTURA POR FEATURE: {nombre_area.upper()}")
+    print("="*70)
+    print(f"[INFO] Colección: {collection_id}")
+    print(f"[INFO] Período: {fecha_inicio} a {fecha_fin}")
+    print(f"[INFO] Filtro nubes: ≤{max_nubes}%")
+    print("\n[INFO] Calculando imágenes por feature en GEE (una petición)...")
+    
+    inicio = time.perf_counter()
+    try:
+        tabla = cobertura_por_feature(collection_id, features, fecha_inicio, fecha_fin, max_nubes, campo_id)
     except Exception as e:
         print(f"[ERROR] Error en análisis: {e}")
+        return None
+    
+    sin_imagenes = int((tabla['imagenes'] == 0).sum())
+    print(f"[OK] {len(tabla)} features en {time.perf_counter() - inicio:.1f} s "
+          f"({sin_imagenes} sin imágenes)")
+    
+    print("\n" + "-"*70)
+    print("IMÁGENES POR FEATURE:")
+    print("-"*70)
+    print(tabla.head(20).to_string(index=False, na_rep='-'))
+    if len(tabla) > 20:
+        print(f"  ... {len(tabla) - 20} features más en el CSV")
+    
+    if output_dir is None:
+        output_dir = Path('output')
+    output_dir.mkdir(exist_ok=True, parents=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    csv_path = output_dir / f'cobertura_por_feature_{nombre_area}_{timestamp}.csv'
+    tabla.to_csv(csv_path, index=False)
+    print(f"\n[OK] Resultados exportados a: {csv_path}")
+    return tabla
@@ -0,0 +1,173 @@
+"""
+Caché persistente de respuestas de la API de Earth Engine.
+
+Guarda en una base SQLite (modo WAL, compartible entre procesos y hilos) las
+respuestas de llamadas de solo lectura como `ee.data.getAsset`, con un TTL por
+llamada y desalojo LRU cuando se supera el tamaño máximo. Solo se guardan las
+respuestas exitosas: los errores siempre se vuelven a consultar. Quien necesita
+datos recientes puede acotar además la antigüedad aceptable de una entrada
+(ver `obtener`).
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Union
+
+logger = logging.getLogger(__name__)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respuestas (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL,
+    expira REAL NOT NULL,
+    ultimo_acceso REAL NOT NULL,
+    tamano INTEGER NOT NULL,
+    guardada REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas(ultimo_acceso);
+"""
+
+
+class CacheRespuestas:
+    """
+    Caché de respuestas JSON en disco.
+
+    Atributos:
+        bypass: Si es True no se leen entradas (cada llamada va a la API) pero
+            las respuestas nuevas sí se guardan, refrescando la caché.
+        aciertos / fallos: Contadores de esta instancia.
+    """
+
+    def __init__(self, ruta: Union[str, Path], ttl_defecto: float = 86400.0,
+                 max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            ruta: Archivo SQLite de la caché
+            ttl_defecto: Segundos de validez cuando la llamada no indica otro
+            max_bytes: Tamaño máximo de las respuestas guardadas (desalojo LRU)
+        """
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_defecto = ttl_defecto
+        self.max_bytes = max_bytes
+        self.bypass = False
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.ruta), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_ESQUEMA)
+        columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(respuestas)")}
+        if 'guardada' not in columnas:
+            # Base creada sin la columna: sus entradas cuentan como antiguas
+            self._conn.execute("ALTER TABLE respuestas ADD COLUMN guardada REAL NOT NULL DEFAULT 0")
+
+    @staticmethod
+    def clave(metodo: str, *args: Any) -> str:
+        return f"{metodo}:{json.dumps(args, sort_keys=True, default=str)}"
+
+    def obtener(self, metodo: str, args: tuple, calcular: Callable[[], Any],
+                ttl: Union[float, None] = None, antiguedad_max: Union[float, None] = None) -> Any:
+        """
+        Devuelve la respuesta guardada para (metodo, args) si no expiró; si no,
+        llama a `calcular()`, guarda el resultado y lo devuelve.
+
+        Args:
+            metodo: Nombre de la llamada (ej: 'getAsset')
+            args: Argumentos que identifican la petición (serializables a JSON)
+            calcular: Función que hace la llamada real a la API
+            ttl: Segundos de validez de esta respuesta (None = `ttl_defecto`)
+            antiguedad_max: Solo aceptar una respuesta guardada hace menos de
+                estos segundos, aunque no haya expirado (None = sin límite)
+        """
+        clave = self.clave(metodo, *args)
+        ahora = time.time()
+        if not self.bypass:
+            with self._lock:
+                fila = self._conn.execute("SELECT valor, expira, guardada FROM respuestas WHERE clave = ?",
+                                          (clave,)).fetchone()
+                if (fila is not None and fila[1] > ahora
+                        and (antiguedad_max is None or fila[2] >= ahora - antiguedad_max)):
+                    self._conn.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?",
+                                       (ahora, clave))
+                    self.aciertos += 1
+                    return json.loads(fila[0])
+
+        valor = calcular()
+        with self._lock:
+            self.fallos += 1
+        if valor is not None:
+            self._guardar(clave, valor, ahora + (self.ttl_defecto if ttl is None else ttl))
+        return valor
+
+    def _guardar(self, clave: str, valor: Any, expira: float) -> None:
+        try:
+            texto = json.dumps(valor, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            try:
+                ahora = time.time()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO respuestas (clave, valor, expira, ultimo_acceso, tamano, guardada) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (clave, texto, expira, ahora, len(texto), ahora))
+                self._desalojar()
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo guardar en la caché de API: {e}")
+
+    def _desalojar(self) -> None:
+        # Primero las expiradas; luego las de acceso más antiguo hasta entrar en el límite
+        self._conn.execute("DELETE FROM respuestas WHERE expira <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        exceso = total - self.max_bytes
+        claves = []
+        for clave, tamano in self._conn.execute(
+                "SELECT clave, tamano FROM respuestas ORDER BY ultimo_acceso"):
+            claves.append((clave,))
+            exceso -= tamano
+            if exceso <= 0:
+                break
+        self._conn.executemany("DELETE FROM respuestas WHERE clave = ?", claves)
+
+    @contextmanager
+    def refrescando(self) -> Iterator['CacheRespuestas']:
+        """
+        Bloque en el que las llamadas ignoran la caché al leer pero la
+        actualizan (ej: revalidación, que necesita datos frescos).
+        """
+        previo = self.bypass
+        self.bypass = True
+        try:
+            yield self
+        finally:
+            self.bypass = previo
+
+    def invalidar(self, metodo: str, *args: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (self.clave(metodo, *args),))
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM respuestas")
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            entradas, tamano = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()
+        total = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / total if total else 0.0,
+            'entradas': entradas,
+            'bytes': tamano,
+        }
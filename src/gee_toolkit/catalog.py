@@ -8,14 +8,32 @@ Módulo central para la gestión, descubrimiento y mantenimiento de colecciones
 
 import ee
 import pandas as pd
+import hashlib
 import json
 import logging
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Set, Tuple, Union
 from pathlib import Path
-from copy import deepcopy
 from .config import get_project_id as get_project_id_from_config
 from .api_utils import retry_api_call, safe_ee_execute
+from .api_cache import CacheRespuestas
+from .discovery import (BASE_PUBLICA, PROVEEDORES_DEFECTO, CrawlerAssets, ResultadoListado,
+                        comparar_por_carpetas, id_legacy)
+from .search_index import (ArbolPrefijos, ColaExpiracion, IndiceTemporal, IndiceTexto, IndiceTrigramas,
+                           Periodo)
+from .enrichment import EnriquecimientoImagenes, ImagenObjetivo, SondeoColecciones, requiere_sondeo
+from .classification import CLASIFICADOR_CATEGORIA, CLASIFICADOR_NIVEL
+from .snapshot import cargar_snapshot, firma_contenido, guardar_snapshot
+from .catalog_merge import bloqueo_exclusivo, fusionar_en, ruta_bloqueo
+from .records import RegistroColeccion, catalogo_plano, compactar_catalogo
+from .storage_sqlite import AlmacenSQLite
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -26,23 +44,105 @@ class CatalogoGEE:
     Gestor de catálogo de colecciones GEE con capacidades de descubrimiento y mantenimiento.
     """
     
-    def __init__(self, project_id: Optional[str] = None):
+    # Política de volcado por defecto dentro de una transacción
+    FLUSH_CADA_DEFECTO: int = 100
+    FLUSH_SEGUNDOS_DEFECTO: float = 60.0
+    # Colecciones por petición en el sondeo de imágenes (ver `enrichment.py`)
+    TAMANO_LOTE_SONDEO: int = 25
+    # Validez en la caché de API de los listados de carpetas (getAsset usa `cache_duration_days`)
+    TTL_LISTADO_SEGUNDOS: float = 6 * 3600
+    # `limpiar_invalidas` solo confía en respuestas de getAsset guardadas hace
+    # menos que esto o durante esta ejecución (ej: por un --revalidate previo)
+    ANTIGUEDAD_CACHE_LIMPIEZA: float = 15 * 60
+    
+    def __init__(self, project_id: Optional[str] = None, sqlite_path: Optional[Union[str, Path]] = None,
+                 usar_cache: bool = True, catalog_path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            project_id: Proyecto de Google Cloud (por defecto, el de .env)
+            sqlite_path: Si se indica, el catálogo se persiste en esa base SQLite
+                en lugar del JSON. Si la base está vacía se importa el JSON actual.
+            usar_cache: Guardar las respuestas de getAsset/listAssets en
+                `config/.cache_api.db`, compartida entre procesos (ver `api_cache.py`)
+            catalog_path: JSON del catálogo (por defecto `config/colecciones_gee.json`);
+                la caché y el estado del descubrimiento se guardan en su carpeta
+        """
         if not project_id:
             project_id = get_project_id_from_config()
         
         self.project_id: Optional[str] = project_id
-        self.catalog_path: Path = Path(__file__).parent.parent.parent / 'config' / 'colecciones_gee.json'
+        self.catalog_path: Path = (Path(catalog_path) if catalog_path else
+                                   Path(__file__).parent.parent.parent / 'config' / 'colecciones_gee.json')
+        
+        # Estado de escrituras agrupadas (ver `transaccion`)
+        self._profundidad_transaccion: int = 0
+        self._cambios_pendientes: int = 0
+        self._ultimo_volcado: float = time.monotonic()
+        self._inicio_ejecucion: float = time.time()
+        self._flush_cada: Optional[int] = None
+        self._flush_segundos: Optional[float] = None
+        
+        # Backend SQLite opcional: solo se escriben las filas modificadas
+        self.almacen: Optional[AlmacenSQLite] = AlmacenSQLite(sqlite_path) if sqlite_path else None
+        self._modificados: Set[str] = set()
+        
+        self.sondeo = SondeoColecciones(tamano_lote=self.TAMANO_LOTE_SONDEO)
+        self.enriquecimiento = EnriquecimientoImagenes()
+        self.cache: Optional[CacheRespuestas] = (
+            CacheRespuestas(self.catalog_path.parent / '.cache_api.db') if usar_cache else None)
+        
+        # Contenido del JSON en la última lectura o escritura propia: base de la
+        # fusión con cambios de otros procesos (ver `catalog_merge.py`)
+        self._base_json: Optional[bytes] = None
         
         # Cargar catálogo
-        self.colecciones: Dict[str, Any] = self._cargar_catalogo()
+        self.colecciones: Dict[str, Any] = {}
+        self.colecciones = self._cargar_catalogo()
+        
+        # Índices en memoria (se mantienen vía `_al_modificar`)
+        self._indice_texto = IndiceTexto()
+        self._cola_expiracion = ColaExpiracion()
+        self._indice_temporal = IndiceTemporal()
+        self._arbol_prefijos = ArbolPrefijos()
+        # Trigramas de ID + nombre y solo de ID: se arman en la primera búsqueda aproximada
+        self._trigramas: Optional[IndiceTrigramas] = None
+        self._trigramas_id: Optional[IndiceTrigramas] = None
+        self._inventario: Optional[pd.DataFrame] = None
+        self._reconstruir_indices()
     
     def _cargar_catalogo(self) -> Dict[str, Any]:
+        """
+        Carga el catálogo desde la base SQLite si está configurada (importando
+        el JSON la primera vez); si no, desde el JSON.
+        """
+        if self.almacen is None:
+            return self._cargar_catalogo_json()
+        if self.almacen.vacio():
+            catalogo = self._cargar_catalogo_json()
+            self.almacen.importar(catalogo)
+            print(f"[INFO] Catálogo importado a {self.almacen.ruta}")
+            return catalogo
+        catalogo = self.almacen.exportar()
+        compactar_catalogo(catalogo)
+        return catalogo
+
+    def _cargar_catalogo_json(self) -> Dict[str, Any]:
+        """
+        Carga el catálogo desde el snapshot binario si corresponde al JSON
+        actual; si no, parsea el JSON y regenera el snapshot.
+        """
         try:
             if not self.catalog_path.exists():
                 return self._definir_catalogo_defecto()
-                
-            with open(self.catalog_path, 'r', encoding='utf-8') as f:
-                catalogo = json.load(f)
+            
+            contenido = self.catalog_path.read_bytes()
+            self._base_json = contenido
+            firma = firma_contenido(self.catalog_path, contenido)
+            catalogo = cargar_snapshot(self.catalog_path, firma)
+            if catalogo is None:
+                catalogo = json.loads(contenido.decode('utf-8'))
+                compactar_catalogo(catalogo)
+                guardar_snapshot(self.catalog_path, catalogo, firma)
             
             # Validar metadata
             if '_metadata' not in catalogo:
@@ -60,16 +160,246 @@ class CatalogoGEE:
             return self._definir_catalogo_defecto()
 
     def _guardar_catalogo(self, catalogo: Optional[Dict[str, Any]] = None) -> None:
-        if catalogo is None:
-            catalogo = self.colecciones
-            
+        """
+        Persiste el catálogo en disco.
+        
+        Dentro de una `transaccion` solo registra el cambio y vuelca cuando se
+        cumple la política de conteo o tiempo (o al cerrar la transacción).
+        """
+        if catalogo is not None:
+            self._escribir_catalogo(catalogo)
+            return
+
+        if self._profundidad_transaccion > 0:
+            self._cambios_pendientes += 1
+            por_conteo = self._flush_cada is not None and self._cambios_pendientes >= self._flush_cada
+            por_tiempo = (self._flush_segundos is not None
+                          and time.monotonic() - self._ultimo_volcado >= self._flush_segundos)
+            if por_conteo or por_tiempo:
+                self._escribir_catalogo(self.colecciones)
+            return
+
+        self._escribir_catalogo(self.colecciones)
+
+    def _escribir_catalogo(self, catalogo: Dict[str, Any]) -> None:
+        """
+        Vuelca el catálogo al backend activo: con SQLite solo las colecciones
+        modificadas desde el último volcado, si no el JSON completo.
+        """
+        if self.almacen is None:
+            self._escribir_json(catalogo)
+            return
+        try:
+            self.almacen.guardar(catalogo, self._modificados)
+            self._modificados.clear()
+            self._cambios_pendientes = 0
+            self._ultimo_volcado = time.monotonic()
+            logger.info(f"Catálogo guardado en {self.almacen.ruta}")
+        except Exception as e:
+            logger.error(f"Error guardando catálogo en SQLite: {e}")
+
+    def _escribir_json(self, catalogo: Dict[str, Any], fusionar: bool = True) -> None:
+        """
+        Escribe el JSON de forma atómica: archivo temporal en el mismo directorio,
+        fsync y `os.replace`. Un fallo a mitad de escritura deja intacto el archivo anterior.
+        Luego actualiza el snapshot binario con la firma del JSON recién escrito.
+        
+        La escritura se hace con el bloqueo del catálogo tomado. Si otro proceso
+        escribió el JSON desde nuestra última lectura, primero se fusionan sus
+        cambios en memoria (ver `_fusionar_con_disco`).
+        
+        Args:
+            catalogo: Catálogo a escribir
+            fusionar: False para sobrescribir el JSON sin fusionar (ej: exportar desde SQLite)
+        """
+        tmp_path = None
+        propio = fusionar and catalogo is self.colecciones
         try:
             self.catalog_path.parent.mkdir(exist_ok=True)
-            with open(self.catalog_path, 'w', encoding='utf-8') as f:
-                json.dump(catalogo, f, indent=2, ensure_ascii=False)
+            with bloqueo_exclusivo(ruta_bloqueo(self.catalog_path)):
+                if propio:
+                    self._fusionar_con_disco()
+                contenido = json.dumps(catalogo_plano(catalogo), indent=2, ensure_ascii=False).encode('utf-8')
+                with tempfile.NamedTemporaryFile('wb', dir=self.catalog_path.parent,
+                                                 prefix=f".{self.catalog_path.name}.", suffix='.tmp',
+                                                 delete=False) as f:
+                    tmp_path = f.name
+                    f.write(contenido)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.catalog_path)
+                tmp_path = None
+                self._fsync_directorio(self.catalog_path.parent)
+                self._base_json = contenido
+            guardar_snapshot(self.catalog_path, catalogo, firma_contenido(self.catalog_path, contenido))
+            
+            if propio:
+                self._modificados.clear()
+            self._cambios_pendientes = 0
+            self._ultimo_volcado = time.monotonic()
             logger.info(f"Catálogo guardado en {self.catalog_path}")
         except Exception as e:
             logger.error(f"Error guardando catálogo: {e}")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _fusionar_con_disco(self) -> None:
+        """
+        Incorpora al catálogo en memoria los cambios que otro proceso escribió
+        en el JSON desde nuestra última lectura o escritura. Debe llamarse con
+        el bloqueo del catálogo tomado.
+        """
+        try:
+            en_disco = self.catalog_path.read_bytes()
+        except FileNotFoundError:
+            return
+        if en_disco == self._base_json:
+            return
+        try:
+            disco = json.loads(en_disco.decode('utf-8'))
+        except ValueError as e:
+            logger.warning(f"JSON en disco ilegible, se sobrescribe sin fusionar: {e}")
+            return
+        base = json.loads(self._base_json.decode('utf-8')) if self._base_json else {}
+        resultado = fusionar_en(self.colecciones, base, disco, self._modificados)
+        compactar_catalogo(self.colecciones)
+        for cid in resultado.actualizados:
+            self._actualizar_indices(cid)
+        print(f"[INFO] El catálogo fue modificado por otro proceso: se incorporaron "
+              f"{len(resultado.actualizados)} cambio(s), {len(resultado.conflictos)} conflicto(s) "
+              f"resuelto(s) por last_verified")
+
+    @staticmethod
+    def _fsync_directorio(directorio: Path) -> None:
+        # Asegura que el rename quede registrado (no disponible en Windows)
+        if os.name != 'posix':
+            return
+        fd = os.open(directorio, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def exportar_json(self) -> Path:
+        """
+        Escribe el catálogo en memoria a `config/colecciones_gee.json`
+        (útil con el backend SQLite para versionar o compartir el JSON).
+        
+        Returns:
+            Ruta del JSON escrito
+        """
+        self._escribir_json(self.colecciones, fusionar=False)
+        print(f"[OK] Catálogo exportado a: {self.catalog_path}")
+        return self.catalog_path
+
+    def importar_json(self) -> int:
+        """
+        Reemplaza el contenido de la base SQLite por el de `config/colecciones_gee.json`.
+        
+        Returns:
+            Número de colecciones importadas
+        """
+        if self.almacen is None:
+            print("[WARN] No hay backend SQLite configurado; nada que importar.")
+            return 0
+        self.colecciones = self._cargar_catalogo_json()
+        total = self.almacen.importar(self.colecciones)
+        self._modificados.clear()
+        self._reconstruir_indices()
+        print(f"[OK] {total} colecciones importadas a: {self.almacen.ruta}")
+        return total
+
+    @contextmanager
+    def transaccion(self, flush_cada: Optional[int] = FLUSH_CADA_DEFECTO,
+                    flush_segundos: Optional[float] = FLUSH_SEGUNDOS_DEFECTO):
+        """
+        Agrupa las mutaciones del catálogo y las escribe en disco de una vez.
+        
+        Dentro del bloque, cada `_guardar_catalogo()` solo cuenta un cambio; se
+        vuelca a disco cuando se acumulan `flush_cada` cambios, cuando pasan
+        `flush_segundos` desde el último volcado o al salir del bloque más
+        externo (también si hubo una excepción). Las transacciones se pueden anidar.
+        
+        Args:
+            flush_cada: Cambios acumulados que fuerzan un volcado (None = sin límite)
+            flush_segundos: Segundos entre volcados (None = sin límite)
+        
+        Ejemplo:
+            with catalogo.transaccion():
+                for cid in ids:
+                    catalogo.agregar_coleccion_al_catalogo(cid)
+        """
+        politica_previa = (self._flush_cada, self._flush_segundos)
+        if self._profundidad_transaccion == 0:
+            self._ultimo_volcado = time.monotonic()
+        self._flush_cada, self._flush_segundos = flush_cada, flush_segundos
+        self._profundidad_transaccion += 1
+        try:
+            yield self
+        finally:
+            self._profundidad_transaccion -= 1
+            self._flush_cada, self._flush_segundos = politica_previa
+            if self._profundidad_transaccion == 0 and self._cambios_pendientes:
+                self._escribir_catalogo(self.colecciones)
+
+    def _reconstruir_indices(self) -> None:
+        """
+        Construye desde cero los índices en memoria a partir de `self.colecciones`.
+        """
+        self._indice_texto = IndiceTexto()
+        self._cola_expiracion = ColaExpiracion()
+        self._indice_temporal = IndiceTemporal()
+        self._arbol_prefijos = ArbolPrefijos()
+        self._trigramas = None
+        self._trigramas_id = None
+        self._inventario = None
+        for cat_id, cat_info in self.colecciones.items():
+            if cat_id.startswith('_'): continue
+            for cid, registro in cat_info.get('colecciones', {}).items():
+                self._indice_texto.agregar(cid, registro)
+                self._cola_expiracion.actualizar(cid, registro.get('last_verified'))
+                self._indice_temporal.actualizar(cid, registro)
+                self._arbol_prefijos.agregar(cid)
+
+    def _al_modificar(self, collection_id: str) -> None:
+        """
+        Sincroniza los índices en memoria tras agregar, actualizar, mover o
+        eliminar `collection_id`. Toda mutación del catálogo debe llamarlo.
+        """
+        self._modificados.add(collection_id)
+        self._actualizar_indices(collection_id)
+
+    def _actualizar_indices(self, collection_id: str) -> None:
+        self._inventario = None
+        encontrado = self._buscar_registro(collection_id)
+        if encontrado is None:
+            self._indice_texto.eliminar(collection_id)
+            self._cola_expiracion.eliminar(collection_id)
+            self._indice_temporal.eliminar(collection_id)
+            self._arbol_prefijos.eliminar(collection_id)
+            if self._trigramas is not None:
+                self._trigramas.eliminar(collection_id)
+                self._trigramas_id.eliminar(collection_id)
+        else:
+            self._indice_texto.agregar(collection_id, encontrado[1])
+            self._cola_expiracion.actualizar(collection_id, encontrado[1].get('last_verified'))
+            self._indice_temporal.actualizar(collection_id, encontrado[1])
+            self._arbol_prefijos.agregar(collection_id)
+            if self._trigramas is not None:
+                self._trigramas.agregar(collection_id, f"{collection_id} {encontrado[1].get('nombre', '')}")
+                self._trigramas_id.agregar(collection_id, collection_id)
+
+    def _buscar_registro(self, collection_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Devuelve (categoria, registro) de una colección o None si no está en el catálogo.
+        """
+        for cat_id, cat_info in self.colecciones.items():
+            if cat_id.startswith('_') or not isinstance(cat_info, dict): continue
+            registro = cat_info.get('colecciones', {}).get(collection_id)
+            if registro is not None:
+                return cat_id, registro
+        return None
 
     def _definir_catalogo_defecto(self) -> Dict[str, Any]:
         return {
@@ -84,7 +414,6 @@ class CatalogoGEE:
         """
         Infiere el nivel de procesamiento a partir de metadata oficial o del ID.
         """
-        cid = collection_id.upper()
         props = {}
         if metadata and 'properties' in metadata:
             props = {k.upper(): str(v).upper() for k, v in metadata['properties'].items()}
@@ -98,76 +427,40 @@ class CatalogoGEE:
             if 'SURFACE REFLECTANCE' in nivel_oficial: return 'L2 (SR)'
             return nivel_oficial.title()
 
-        # 2. Heurística por ID (Fallback)
-        # Sentinel
-        if 'S2_SR' in cid or 'L2A' in cid: return 'L2A'
-        if 'S2_HARMONIZED' in cid and 'SR' not in cid: return 'L1C'
-        if 'COPERNICUS/S2' in cid and 'SR' not in cid: return 'L1C'
-        if 'S1_GRD' in cid: return 'L1_GRD'
-        if 'S5P' in cid: return 'L2 (Atmosférico)'
-        
-        # Landsat
-        if 'C02/T1_L2' in cid or 'C02/T2_L2' in cid: return 'L2'
-        if 'C02/T1_TOA' in cid or 'C02/T2_TOA' in cid: return 'TOA'
-        if 'C02/T1_RT' in cid: return 'RAW'
-        if 'C02/T1' in cid or 'C02/T2' in cid: return 'L1 (DN)'
-        
-        # MODIS
-        if any(x in cid for x in ['MOD09', 'MYD09', 'MCD09']):
-            if 'GA' in cid: return 'L2G'
-            return 'L3' if 'A1' in cid else 'L2'
-            
-        return 'No especificado'
+        # 2. Heurística por ID (Fallback): ver REGLAS_NIVEL
+        return CLASIFICADOR_NIVEL.clasificar(collection_id)
+
+    @staticmethod
+    def _texto_clasificacion(collection_id: str, metadata: Dict[str, Any]) -> str:
+        nombre = metadata.get('nombre', '')
+        desc = str(metadata.get('descripcion', ''))
+        return f"{collection_id} {nombre} {desc}"
 
     def _detectar_categoria(self, collection_id: str, metadata: Dict[str, Any]) -> str:
-        cid = collection_id.upper()
-        nombre = metadata.get('nombre', '').upper()
-        desc = str(metadata.get('descripcion', '')).upper()
-        texto = f"{cid} {nombre} {desc}"
-
-        if any(x in cid for x in ['S5P', 'TROPOMI']) or any(x in texto for x in ['NO2', 'CO', 'O3', 'SO2', 'CH4', 'ATMOSPHERE']):
-            return 'atmosfera'
-        if any(x in cid for x in ['HYCOM', 'GSW', 'OCEANDATA']) or any(x in texto for x in ['WATER', 'OCEAN', 'SST', 'HYDRO']):
-            return 'agua'
-        if any(x in cid for x in ['GEDI', 'HANSEN', 'GLAD']) or any(x in texto for x in ['FOREST', 'BIOMASS', 'CANOPY', 'TREE']):
-            return 'lidar_biomasa'
-        if any(x in cid for x in ['FAO', 'WAPOR']) or any(x in texto for x in ['CROP', 'AGRICULTURE', 'YIELD']):
-            return 'agricultura'
-        if any(x in cid for x in ['ISDASOIL', 'OPENLANDMAP']) or 'SOIL' in texto:
-            return 'suelos'
-        if any(x in cid for x in ['FIRMS', 'FIRE', 'MCD64']) or 'BURNED' in texto:
-            return 'fuego'
-        if 'SNOW' in texto or 'ICE' in texto or 'CRYOSPHERE' in texto:
-            return 'criosphere'
-        if any(x in cid for x in ['WORLDCOVER', 'CORINE', 'NLCD', 'DYNAMICWORLD']):
-            return 'landcover'
-        if any(x in cid for x in ['DEM', 'SRTM', 'ELEVATION']):
-            return 'elevacion'
-        if 'SAR' in texto or 'SENTINEL-1' in cid:
-            return 'sar'
-        if any(x in cid for x in ['ERA5', 'CHIRPS', 'GPM', 'CLIMATE']):
-            return 'clima'
-        if any(x in cid for x in ['MOD13', 'NDVI', 'EVI']):
-            return 'vegetacion'
-        if any(x in cid for x in ['WORLDPOP', 'GPW', 'URBAN']):
-            return 'poblacion'
-        
-        return 'clima'
+        """
+        Infiere la categoría temática (ver REGLAS_CATEGORIA; gana la primera que coincide).
+        """
+        return CLASIFICADOR_CATEGORIA.clasificar(collection_id, self._texto_clasificacion(collection_id, metadata))
 
     @retry_api_call(raise_on_failure=False)
-    def buscar_coleccion_api(self, collection_id: str) -> Optional[Dict[str, Any]]:
+    def buscar_coleccion_api(self, collection_id: str, asset_info: Optional[Dict[str, Any]] = None,
+                             sondeo: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Obtiene metadata enriquecida de la API de Earth Engine.
         Usa ee.data.getAsset para metadata ligera y evita computaciones pesadas.
+        
+        Args:
+            collection_id: ID de la colección
+            asset_info: Respuesta de getAsset ya obtenida (evita repetir la llamada)
+            sondeo: Resultado de `SondeoColecciones` ya obtenido en lote
+                (si es None y la colección lo requiere, se sondea aquí)
         """
         try:
             # 1. Obtener metadata ligera vía REST API (Asset ID)
             # Esto evita 'accumulating over 5000 elements' al no instanciar ImageCollection pesado
-            try:
-                asset_info = ee.data.getAsset(collection_id)
-            except ee.EEException:
+            if asset_info is None:
                 # Si falla getAsset (ej: no existe), retornamos None
-                return None
+                asset_info = self._obtener_asset(collection_id)
                 
             if not asset_info or asset_info.get('type') != 'IMAGE_COLLECTION':
                 return None
@@ -185,24 +478,17 @@ class CatalogoGEE:
             # CONTINGENCIA: Saltamos inspección de imágenes para colecciones masivas conocidas
             # que causan timeouts incluso con filtros (Landsat, Sentinel).
             # Confiamos solo en la metadata del asset para estas.
-            es_masiva = any(x in collection_id for x in ['LANDSAT/', 'COPERNICUS/', 'MODIS/'])
+            es_masiva = not requiere_sondeo(collection_id)
             
-            first_img = None
             res = "No especificado"
             bandas = []
             
             if not es_masiva:
-                try:
-                    col = ee.ImageCollection(collection_id)
-                    # Estrategia: Buscar en Enero 2024 (30 días)
-                    filtered = col.filterDate('2024-01-01', '2024-01-31').limit(1)
-                    
-                    if filtered.size().getInfo() > 0:
-                        first_img_info = filtered.first().getInfo()
-                        if first_img_info and 'bands' in first_img_info:
-                            bandas = [b['id'] for b in first_img_info['bands']]
-                except Exception:
-                    pass
+                # Bandas de la primera imagen de Enero 2024, en una sola petición
+                if sondeo is None:
+                    sondeo = self.sondeo.sondear_lote([collection_id]).get(collection_id)
+                if sondeo:
+                    bandas = list(sondeo.get('bandas') or [])
             else:
                 # Para colecciones masivas, intentamos extraer bandas de metadata si existe en properties
                 pass
@@ -228,134 +514,482 @@ class CatalogoGEE:
                 'bandas': bandas,
                 'resolucion': res,
                 'periodo': periodo,
+                'update_time': asset_info.get('updateTime'),
+                'huella': self._huella_asset(asset_info),
                 'last_verified': datetime.now().isoformat()
             }
         except Exception as e:
             logger.error(f"Error procesando {collection_id}: {e}")
             return None
 
+    @staticmethod
+    def _huella_asset(asset_info: Dict[str, Any]) -> str:
+        """
+        Huella de la metadata de un asset (tipo, propiedades y rango temporal),
+        para detectar cambios cuando la API no informa `updateTime`.
+        """
+        relevante = {k: asset_info.get(k) for k in ('type', 'properties', 'startTime', 'endTime')}
+        texto = json.dumps(relevante, sort_keys=True, default=str)
+        return hashlib.blake2b(texto.encode('utf-8'), digest_size=12).hexdigest()
+
+    def _firma_registro(self, collection_id: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        (update_time, huella) guardados para una colección, o None si no tiene ninguno.
+        """
+        encontrado = self._buscar_registro(collection_id)
+        if encontrado is None:
+            return None
+        registro = encontrado[1]
+        if not registro.get('update_time') and not registro.get('huella'):
+            return None
+        return registro.get('update_time'), registro.get('huella')
+
+    def _revalidar_metadata(self, collection_id: str,
+                            firma: Optional[Tuple[Optional[str], Optional[str]]]) -> Optional[Dict[str, Any]]:
+        """
+        Revalidación condicional: una sola llamada a getAsset. Si el asset no
+        cambió desde la última verificación (mismo `updateTime` o, sin él, misma
+        huella) devuelve `{'sin_cambios': True, 'last_verified': ...}` sin volver
+        a sondear imágenes; si cambió, la metadata completa.
+        
+        Args:
+            collection_id: ID de la colección
+            firma: (update_time, huella) guardados en el catálogo (ver `_firma_registro`)
+        """
+        asset_info = self._obtener_asset(collection_id)
+        if not asset_info:
+            return None
+        if self._asset_sin_cambios(firma, asset_info):
+            return {'sin_cambios': True, 'last_verified': datetime.now().isoformat()}
+        return self.buscar_coleccion_api(collection_id, asset_info)
+
+    def _obtener_asset(self, collection_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._get_asset(collection_id)
+        except ee.EEException:
+            return None
+
+    def _get_asset(self, collection_id: str, antiguedad_max: Optional[float] = None) -> Dict[str, Any]:
+        """
+        `ee.data.getAsset` a través de la caché de respuestas, si está activa.
+        Los errores (ej: asset inexistente) se propagan y no se guardan.
+        
+        Args:
+            collection_id: ID del asset
+            antiguedad_max: Segundos máximos desde que se guardó la respuesta en caché
+        """
+        if self.cache is None:
+            return ee.data.getAsset(collection_id)
+        return self.cache.obtener('getAsset', (collection_id,), lambda: ee.data.getAsset(collection_id),
+                                  self._ttl_cache(), antiguedad_max)
+
+    def _ttl_cache(self) -> float:
+        """
+        Validez (segundos) de las respuestas de getAsset: `cache_duration_days` del catálogo.
+        """
+        dias = self.colecciones.get('_metadata', {}).get('cache_duration_days', 30)
+        return float(dias) * 86400
+
+    @contextmanager
+    def _refrescando_cache(self) -> Iterator[None]:
+        """
+        Las llamadas dentro del bloque van a la API pero actualizan la caché
+        (la revalidación necesita datos frescos).
+        """
+        if self.cache is None:
+            yield
+            return
+        with self.cache.refrescando():
+            yield
+
+    @classmethod
+    def _asset_sin_cambios(cls, firma: Optional[Tuple[Optional[str], Optional[str]]],
+                           asset_info: Dict[str, Any]) -> bool:
+        if firma is None:
+            return False
+        update_time, huella = firma
+        if update_time and asset_info.get('updateTime'):
+            return update_time == asset_info['updateTime']
+        return huella is not None and huella == cls._huella_asset(asset_info)
+
     def agregar_coleccion_al_catalogo(self, collection_id: str, categoria: Optional[str] = None) -> bool:
         metadata = self.buscar_coleccion_api(collection_id)
         if not metadata: 
             print(f"  [ERROR] No se pudo acceder al asset: {collection_id}")
             return False
         
+        self._registrar_coleccion(collection_id, metadata, categoria)
+        self._guardar_catalogo()
+        return True
+
+    def _registrar_coleccion(self, collection_id: str, metadata: Dict[str, Any], categoria: Optional[str] = None) -> str:
+        """
+        Inserta una colección nueva con la metadata de la API. No persiste.
+        
+        Returns:
+            Categoría en la que quedó registrada
+        """
         if not categoria:
             categoria = self._detectar_categoria(collection_id, metadata)
         
         if categoria not in self.colecciones:
             self.colecciones[categoria] = {'nombre': categoria.replace('_', ' ').title(), 'colecciones': {}}
             
-        self.colecciones[categoria]['colecciones'][collection_id] = {
+        self.colecciones[categoria]['colecciones'][collection_id] = RegistroColeccion({
             'nombre': metadata['nombre'],
             'bandas_principales': metadata['bandas'][:6],
             'resolucion': metadata['resolucion'],
             'temporal': metadata['periodo'],
             'last_verified': metadata['last_verified'],
+            'update_time': metadata.get('update_time'),
+            'huella': metadata.get('huella'),
             'nivel': self._detectar_nivel_procesamiento(collection_id, metadata)
-        }
-        self._guardar_catalogo()
-        return True
+        })
+        self._al_modificar(collection_id)
+        return categoria
 
     def verificar_y_actualizar(self, collection_id: str) -> bool:
         """
-        Consulta la API de GEE y actualiza toda la metadata del asset en el catálogo.
+        Consulta la API de GEE y actualiza la metadata del asset en el catálogo.
+        Si el asset no cambió desde la última verificación solo renueva `last_verified`.
         """
-        metadata = self.buscar_coleccion_api(collection_id)
+        with self._refrescando_cache():
+            metadata = self._revalidar_metadata(collection_id, self._firma_registro(collection_id))
         if not metadata: return False
         
+        if self._aplicar_metadata(collection_id, metadata):
+            self._guardar_catalogo()
+            return True
+        return False
+
+    def _aplicar_metadata(self, collection_id: str, metadata: Dict[str, Any]) -> bool:
+        """
+        Vuelca la metadata obtenida de la API sobre la entrada existente del catálogo.
+        Con `sin_cambios` (ver `_revalidar_metadata`) solo renueva `last_verified`.
+        No persiste: el llamador decide cuándo guardar.
+        """
         for cat in self.colecciones.values():
             if isinstance(cat, dict) and collection_id in cat.get('colecciones', {}):
-                cat['colecciones'][collection_id].update({
-                    'nombre': metadata['nombre'],
-                    'bandas_principales': metadata['bandas'][:6],
-                    'resolucion': metadata['resolucion'],
-                    'temporal': metadata['periodo'],
-                    'last_verified': metadata['last_verified'],
-                    'nivel': self._detectar_nivel_procesamiento(collection_id, metadata)
-                })
-                self._guardar_catalogo()
+                registro = cat['colecciones'][collection_id]
+                if metadata.get('sin_cambios'):
+                    registro['last_verified'] = metadata['last_verified']
+                else:
+                    nuevos = {
+                        'nombre': metadata['nombre'],
+                        'bandas_principales': metadata['bandas'][:6],
+                        'resolucion': metadata['resolucion'],
+                        'temporal': metadata['periodo'],
+                        'last_verified': metadata['last_verified'],
+                        'update_time': metadata.get('update_time'),
+                        'huella': metadata.get('huella'),
+                        'nivel': self._detectar_nivel_procesamiento(collection_id, metadata)
+                    }
+                    if registro.get('enriquecida'):
+                        # Bandas y resolución vienen de `enriquecer_colecciones`: se conservan
+                        del nuevos['bandas_principales'], nuevos['resolucion']
+                    registro.update(nuevos)
+                self._al_modificar(collection_id)
                 return True
         return False
 
-    def revalidar_expiradas(self, dias: int = 30, limite: Optional[int] = None):
+    def _consultar_metadata_concurrente(self, ids: List[str], workers: int,
+                                        condicional: bool = False) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Obtiene la metadata de varios IDs con un pool acotado de hilos.
+        
+        Trabaja en dos etapas: primero getAsset por ID (en paralelo) y luego el
+        sondeo de imágenes de las colecciones que lo requieren, agrupado en
+        lotes de `sondeo.tamano_lote` (una petición por lote, lotes en paralelo).
+        
+        Solo las llamadas de red corren en los hilos; los pares (id, metadata) se
+        entregan al hilo llamador, que es el único que modifica el catálogo, en
+        el orden de `ids` (cada uno apenas están listos todos los anteriores):
+        el catálogo resultante es el mismo con cualquier número de hilos.
+        
+        Args:
+            ids: IDs de colecciones a consultar
+            workers: Número máximo de consultas simultáneas
+            condicional: Para entradas ya catalogadas: si el asset no cambió se
+                entrega `{'sin_cambios': True, ...}` (ver `_revalidar_metadata`)
+        """
+        ids = list(dict.fromkeys(ids))
+        pendientes: Dict[str, Optional[Dict[str, Any]]] = {}
+        siguiente = 0
+        for cid, metadata in self._consultar_metadata_sin_orden(ids, workers, condicional):
+            pendientes[cid] = metadata
+            while siguiente < len(ids) and ids[siguiente] in pendientes:
+                yield ids[siguiente], pendientes.pop(ids[siguiente])
+                siguiente += 1
+
+    def _consultar_metadata_sin_orden(self, ids: List[str], workers: int,
+                                      condicional: bool) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Etapas de `_consultar_metadata_concurrente`; entrega cada par a medida que termina.
+        """
+        # Las firmas se leen aquí: los hilos no tocan el catálogo
+        firmas = {cid: self._firma_registro(cid) for cid in ids} if condicional else {}
+        pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='gee-meta')
+        try:
+            # Etapa 1: metadata del asset
+            a_sondear: Dict[str, Dict[str, Any]] = {}
+            futuros = {pool.submit(self._obtener_asset, cid): cid for cid in ids}
+            for futuro in as_completed(futuros):
+                cid = futuros[futuro]
+                try:
+                    asset_info = futuro.result()
+                except Exception as e:
+                    logger.error(f"Error consultando {cid}: {e}")
+                    asset_info = None
+                
+                if not asset_info:
+                    yield cid, None
+                elif condicional and self._asset_sin_cambios(firmas.get(cid), asset_info):
+                    yield cid, {'sin_cambios': True, 'last_verified': datetime.now().isoformat()}
+                elif requiere_sondeo(cid) and asset_info.get('type') == 'IMAGE_COLLECTION':
+                    a_sondear[cid] = asset_info
+                else:
+                    yield cid, self.buscar_coleccion_api(cid, asset_info)
+            
+            # Etapa 2: sondeo de imágenes por lotes
+            if a_sondear:
+                lotes = self.sondeo.lotes(list(a_sondear))
+                print(f"[INFO] Sondeando {len(a_sondear)} colecciones en {len(lotes)} lote(s)...")
+                futuros = {pool.submit(self.sondeo.sondear_lote, lote): lote for lote in lotes}
+                for futuro in as_completed(futuros):
+                    try:
+                        sondeos = futuro.result()
+                    except Exception as e:
+                        logger.error(f"Error en lote de sondeo: {e}")
+                        sondeos = {}
+                    for cid in futuros[futuro]:
+                        yield cid, self.buscar_coleccion_api(cid, a_sondear[cid], sondeos.get(cid) or {})
+        finally:
+            # Si el consumidor se interrumpe, no esperar a las consultas pendientes
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def revalidar_expiradas(self, dias: int = 30, limite: Optional[int] = None, workers: int = 1):
+        """
+        Re-valida contra la API las colecciones cuya verificación expiró.
+        
+        Args:
+            dias: Antigüedad (en días) a partir de la cual una entrada expira
+            limite: Máximo de colecciones a procesar
+            workers: Consultas simultáneas a la API. Con 1 se procesa en serie;
+                con más, la metadata se descarga en paralelo y se aplica al
+                catálogo desde este hilo, guardando una sola vez al final.
+        """
         print(f"\n[INFO] Revalidando colecciones con más de {dias} días de antigüedad...")
-        expiradas = self._obtener_ids_expirados(dias)
-        if not expiradas:
+        a_validar = self._obtener_ids_expirados(dias, limite)
+        if not a_validar:
             print("  [OK] Todas las colecciones están al día.")
             return
 
-        a_validar = expiradas[:limite] if limite else expiradas
-        validas, invalidas = 0, 0
+        inicio = time.perf_counter()
+        validas, fallidas = self._revalidar_ids(a_validar, workers)
+        
+        duracion = time.perf_counter() - inicio
+        print(f"\n[RESUMEN] Válidas: {validas}, Fallidas: {len(fallidas)}")
+        if duracion > 0:
+            print(f"[INFO] Rendimiento: {(validas + len(fallidas)) / duracion:.2f} colecciones/s "
+                  f"({duracion:.1f} s, {max(1, workers)} hilo(s))")
 
-        for col_id in a_validar:
-            print(f"  Verificando {col_id}...", end=" ")
-            if self.verificar_y_actualizar(col_id):
-                validas += 1
-                print("[OK]")
-            else:
-                invalidas += 1
-                print("[FALLÓ]")
+    def _revalidar_ids(self, ids: List[str], workers: int = 1) -> Tuple[int, List[str]]:
+        """
+        Consulta la API para cada ID y actualiza el catálogo en una transacción.
+        Las respuestas no se leen de la caché de API, pero sí se guardan en ella.
         
-        print(f"\n[RESUMEN] Válidas: {validas}, Fallidas: {invalidas}")
+        Returns:
+            Tuple con la cantidad de válidas y la lista de IDs que fallaron
+        """
+        with self._refrescando_cache():
+            return self._revalidar_ids_api(ids, workers)
 
-    def _obtener_ids_expirados(self, dias: int) -> List[str]:
+    def _revalidar_ids_api(self, ids: List[str], workers: int) -> Tuple[int, List[str]]:
+        validas, fallidas, sin_cambios = 0, [], 0
+        
+        # Las que aparecen sin cambios en el listado de su carpeta no requieren getAsset
+        listado = self._listar_por_carpetas(ids, workers)
+        ahora = datetime.now().isoformat()
+        resueltas = ((cid, {'sin_cambios': True, 'last_verified': ahora}) for cid in listado.sin_cambios)
+        a_consultar = listado.cambiados + listado.no_listados + listado.sin_resolver
+        
+        if workers > 1 and a_consultar:
+            print(f"[INFO] Consultando {len(a_consultar)} colecciones con {workers} hilos...")
+        consultadas = self._consultar_metadata_concurrente(a_consultar, workers, condicional=True)
+        resultados = chain(resueltas, consultadas)
+        
+        with self.transaccion():
+            for col_id, metadata in resultados:
+                if metadata and self._aplicar_metadata(col_id, metadata):
+                    self._guardar_catalogo()
+                    validas += 1
+                    if metadata.get('sin_cambios'):
+                        sin_cambios += 1
+                        print(f"  Verificando {col_id}... [SIN CAMBIOS]")
+                    else:
+                        print(f"  Verificando {col_id}... [OK]")
+                else:
+                    fallidas.append(col_id)
+                    print(f"  Verificando {col_id}... [FALLÓ]")
+        if sin_cambios:
+            print(f"[INFO] {sin_cambios} colecciones sin cambios desde la última verificación "
+                  f"(solo se renovó last_verified)")
+        return validas, fallidas
+
+    def _listar_por_carpetas(self, ids: List[str], workers: int = 1) -> ResultadoListado:
+        """
+        Compara las colecciones con el listado de sus carpetas (una llamada
+        `listAssets` por carpeta y página en lugar de un getAsset por colección).
+        """
+        update_times = {cid: (self._firma_registro(cid) or (None, None))[0] for cid in ids}
+        listado = comparar_por_carpetas(update_times, workers=workers, cache=self.cache,
+                                        ttl=self.TTL_LISTADO_SEGUNDOS)
+        if listado.carpetas:
+            print(f"[INFO] Listado por carpetas: {listado.carpetas} carpetas en {listado.llamadas} llamadas; "
+                  f"{len(listado.sin_cambios)} sin cambios, {len(listado.cambiados)} modificadas, "
+                  f"{len(listado.no_listados)} no listadas, {len(listado.sin_resolver)} sin resolver")
+        return listado
+
+    def revalidar_continuo(self, presupuesto: int = 50, intervalo: float = 3600.0, dias: int = 30,
+                           workers: int = 1, ciclos: Optional[int] = None):
+        """
+        Revalidación continua: cada `intervalo` segundos revalida como máximo
+        `presupuesto` colecciones expiradas, las más desactualizadas primero.
+        
+        Reparte las consultas a la API de forma pareja en el tiempo en lugar de
+        revalidar todo de golpe cuando vence una tanda de entradas.
+        
+        Args:
+            presupuesto: Consultas a la API por ciclo
+            intervalo: Segundos entre el inicio de un ciclo y el siguiente
+            dias: Antigüedad (en días) a partir de la cual una entrada expira
+            workers: Consultas simultáneas a la API dentro de cada ciclo
+            ciclos: Número de ciclos a ejecutar (None = hasta Ctrl+C)
+        """
+        total = len(self._cola_expiracion)
+        necesario = math.ceil(total * intervalo / (dias * 86400)) if total else 0
+        print(f"\n[INFO] Modo continuo: hasta {presupuesto} consultas cada {intervalo:.0f} s "
+              f"(Ctrl+C para detener)")
+        if presupuesto < necesario:
+            print(f"[WARN] Con {total} colecciones se necesitan ~{necesario} consultas por ciclo "
+                  f"para mantenerlas con menos de {dias} días")
+
+        ciclo = 0
+        while ciclos is None or ciclo < ciclos:
+            ciclo += 1
+            inicio = time.monotonic()
+            umbral = (datetime.now() - timedelta(days=dias)).timestamp()
+            ids = self._cola_expiracion.mas_antiguas(umbral, presupuesto)
+            
+            validas, fallidas = self._revalidar_ids(ids, workers) if ids else (0, [])
+            # Las fallidas vuelven al final de la cola para no agotar el presupuesto de cada ciclo
+            for cid in fallidas:
+                self._cola_expiracion.posponer(cid, time.time())
+            
+            pendientes = len(self._cola_expiracion.mas_antiguas(umbral))
+            espera = max(0.0, intervalo - (time.monotonic() - inicio))
+            print(f"[CICLO {ciclo}] Válidas: {validas}, Fallidas: {len(fallidas)}, "
+                  f"expiradas pendientes: {pendientes}")
+            if ciclos is not None and ciclo >= ciclos:
+                break
+            print(f"[INFO] Próximo ciclo en {espera:.0f} s")
+            time.sleep(espera)
+
+    def _obtener_ids_expirados(self, dias: int, limite: Optional[int] = None) -> List[str]:
+        """
+        IDs verificados hace más de `dias` días (o nunca), los más antiguos primero.
+        """
         umbral = datetime.now() - timedelta(days=dias)
-        expirados = []
-        for cat in self.colecciones.values():
-            if not isinstance(cat, dict) or 'colecciones' not in cat: continue
-            for cid, data in cat['colecciones'].items():
-                last = data.get('last_verified')
-                if not last or datetime.fromisoformat(last) < umbral:
-                    expirados.append(cid)
-        return expirados
+        return self._cola_expiracion.mas_antiguas(umbral.timestamp(), limite)
 
-    def verificar_y_actualizar(self, collection_id: str) -> bool:
+    def enriquecer_colecciones(self, limite: Optional[int] = None, workers: int = 1,
+                               forzar: bool = False, timeout: Optional[float] = None):
         """
-        Consulta la API de GEE y actualiza toda la metadata del asset en el catálogo.
+        Completa bandas, tipos de dato y escala nominal (`resolucion`) a partir
+        de una imagen reciente de cada colección, incluidas las masivas
+        (Landsat, Sentinel, MODIS) que la verificación normal no sondea.
+        
+        Las colecciones se evalúan por lotes, una petición por lote y con un
+        plazo por petición (ver `EnriquecimientoImagenes`). El resultado queda
+        en el catálogo con la marca `enriquecida` y la revalidación no lo pisa,
+        así que cada colección se enriquece una sola vez.
+        
+        Args:
+            limite: Máximo de colecciones a procesar
+            workers: Lotes evaluados en paralelo (y consultas getAsset simultáneas)
+            forzar: Volver a enriquecer también las ya enriquecidas
+            timeout: Segundos máximos por petición (None = el de `self.enriquecimiento`)
         """
-        metadata = self.buscar_coleccion_api(collection_id)
-        if not metadata: return False
+        print("\n[INFO] Enriqueciendo bandas y escala nominal de las colecciones...")
+        ids = [cid for cid, cat in self._iter_colecciones()
+               if forzar or not self.colecciones[cat]['colecciones'][cid].get('enriquecida')]
+        if limite is not None:
+            ids = ids[:limite]
+        if not ids:
+            print("  [OK] Todas las colecciones ya están enriquecidas.")
+            return
         
-        for cat in self.colecciones.values():
-            if isinstance(cat, dict) and collection_id in cat.get('colecciones', {}):
-                cat['colecciones'][collection_id].update({
-                    'nombre': metadata['nombre'],
-                    'bandas_principales': metadata['bandas'][:6],
-                    'resolucion': metadata['resolucion'],
-                    'temporal': metadata['periodo'],
-                    'last_verified': metadata['last_verified'],
-                    'nivel': self._detectar_nivel_procesamiento(collection_id, metadata)
+        inicio = time.perf_counter()
+        # Tipo y fin de cada asset: getAsset pasa por la caché de API
+        objetivos: List[ImagenObjetivo] = []
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='gee-meta') as pool:
+            for cid, info in zip(ids, pool.map(self._obtener_asset, ids)):
+                if info and info.get('type') in ('IMAGE', 'IMAGE_COLLECTION'):
+                    objetivos.append(ImagenObjetivo(cid, info['type'], info.get('endTime')))
+        
+        if not objetivos:
+            print("  [INFO] Ninguna de las colecciones pendientes es una imagen o colección accesible.")
+            return
+        
+        enriquecimiento = self.enriquecimiento
+        if timeout is None:
+            timeout = enriquecimiento.timeout
+        peticiones_previas = enriquecimiento.peticiones
+        print(f"[INFO] {len(objetivos)} colecciones con imágenes en lotes de {enriquecimiento.tamano_lote} "
+              f"(plazo {timeout:.0f} s por petición)...")
+        resultados = enriquecimiento.enriquecer(objetivos, workers, timeout=timeout)
+        
+        ahora = datetime.now().isoformat()
+        enriquecidas, sin_imagenes = 0, []
+        with self.transaccion():
+            for objetivo in objetivos:
+                campos = resultados.get(objetivo.collection_id)
+                encontrado = self._buscar_registro(objetivo.collection_id)
+                if not campos or not campos['bandas'] or encontrado is None:
+                    sin_imagenes.append(objetivo.collection_id)
+                    continue
+                encontrado[1].update({
+                    'bandas_principales': campos['bandas'][:6],
+                    'tipos_datos': campos['tipos_datos'],
+                    'escala_nominal': campos['escala_nominal'],
+                    'resolucion': campos['resolucion'],
+                    'enriquecida': ahora,
                 })
+                self._al_modificar(objetivo.collection_id)
                 self._guardar_catalogo()
-                return True
-        return False
+                enriquecidas += 1
+                print(f"  {objetivo.collection_id}: {len(campos['bandas'])} bandas, {campos['resolucion']}")
+        
+        duracion = time.perf_counter() - inicio
+        print(f"\n[RESUMEN] Enriquecidas: {enriquecidas}, Sin imagen en la ventana o con error: {len(sin_imagenes)}, "
+              f"Omitidas (tablas o inaccesibles): {len(ids) - len(objetivos)}")
+        print(f"[INFO] {enriquecimiento.peticiones - peticiones_previas} petición(es) de cómputo en {duracion:.1f} s")
 
-    def limpiar_invalidas(self, silencioso: bool = False):
+    def limpiar_invalidas(self, silencioso: bool = False, workers: int = 1):
         """
         Escanea el catálogo y elimina colecciones que ya no son accesibles en GEE o están deprecadas.
+        
+        Primero lista cada carpeta del catálogo una vez: las colecciones que
+        aparecen con el mismo `updateTime` guardado siguen siendo válidas. Solo
+        el resto (modificadas, ausentes del listado o sin resolver) se verifica
+        con getAsset.
+        
+        Args:
+            silencioso: Eliminar sin pedir confirmación
+            workers: Carpetas listadas en paralelo
         """
         print("\n[INFO] Iniciando limpieza de colecciones inaccesibles o deprecadas...")
-        invalidas = []
-        for cid, cat in self._iter_colecciones():
-            try:
-                # Usar getAsset es mucho más rápido y seguro que instanciar colecciones
-                info = ee.data.getAsset(cid)
-                
-                # Check adicional: Deprecación
-                props = info.get('properties', {})
-                is_deprecated = props.get('deprecated', False)
-                title = props.get('title', '').upper()
-                
-                if str(is_deprecated).lower() == 'true' or '[DEPRECATED]' in title:
-                    print(f"  [DEPRECADO] {cid}")
-                    invalidas.append((cat, cid))
-                    
-            except Exception as e:
-                msg = str(e).lower()
-                if 'not found' in msg or 'permission' in msg or 'access' in msg or 'forbidden' in msg:
-                    print(f"  [INACCESIBLE] {cid}")
-                    invalidas.append((cat, cid))
+        invalidas = self._buscar_invalidas(workers)
         
         if not invalidas:
             print("  [OK] No se encontraron colecciones inválidas.")
@@ -375,26 +1009,68 @@ class CatalogoGEE:
         # Proceder con la eliminación
         for cat, cid in invalidas:
             del self.colecciones[cat]['colecciones'][cid]
+            self._al_modificar(cid)
         
         self._guardar_catalogo()
         print(f"  [OK] Catálogo limpio. Se eliminaron {len(invalidas)} colecciones.")
 
+    def _buscar_invalidas(self, workers: int) -> List[Tuple[str, str]]:
+        """
+        (categoría, ID) de las colecciones inaccesibles o deprecadas, consultando la API.
+        Las inaccesibles se quitan también de la caché de respuestas.
+        
+        Los listados de carpetas pueden venir de la caché. Una respuesta de
+        getAsset en caché (válida hasta `cache_duration_days`) puede ser de un
+        asset ya borrado: solo se usa si se guardó durante esta ejecución o
+        hace menos de `ANTIGUEDAD_CACHE_LIMPIEZA` segundos.
+        """
+        invalidas = []
+        antiguedad_max = max(self.ANTIGUEDAD_CACHE_LIMPIEZA, time.time() - self._inicio_ejecucion)
+        categorias = {cid: cat for cid, cat in self._iter_colecciones()}
+        listado = self._listar_por_carpetas(list(categorias), workers)
+        for cid in listado.cambiados + listado.no_listados + listado.sin_resolver:
+            cat = categorias[cid]
+            try:
+                # Usar getAsset es mucho más rápido y seguro que instanciar colecciones
+                info = self._get_asset(cid, antiguedad_max)
+                
+                # Check adicional: Deprecación
+                props = info.get('properties', {})
+                is_deprecated = props.get('deprecated', False)
+                title = props.get('title', '').upper()
+                
+                if str(is_deprecated).lower() == 'true' or '[DEPRECATED]' in title:
+                    print(f"  [DEPRECADO] {cid}")
+                    invalidas.append((cat, cid))
+                    
+            except Exception as e:
+                msg = str(e).lower()
+                if 'not found' in msg or 'permission' in msg or 'access' in msg or 'forbidden' in msg:
+                    print(f"  [INACCESIBLE] {cid}")
+                    invalidas.append((cat, cid))
+                    if self.cache is not None:
+                        self.cache.invalidar('getAsset', cid)
+        return invalidas
+
     def recategorizar(self):
         print("\n[INFO] Re-evaluando categorías segón la nueva lógica...")
         movimientos = 0
-        original = deepcopy(self.colecciones)
         
-        for cat_id, cat_info in original.items():
-            if cat_id.startswith('_'): continue
-            for cid, data in cat_info.get('colecciones', {}).items():
-                nueva_cat = self._detectar_categoria(cid, data)
-                if nueva_cat != cat_id:
-                    print(f"  [MOVE] {cid}: {cat_id} -> {nueva_cat}")
-                    if nueva_cat not in self.colecciones:
-                        self.colecciones[nueva_cat] = {'nombre': nueva_cat.replace('_', ' ').title(), 'colecciones': {}}
-                    self.colecciones[nueva_cat]['colecciones'][cid] = data
-                    del self.colecciones[cat_id]['colecciones'][cid]
-                    movimientos += 1
+        # Foto de la ubicación actual y clasificación de todo el catálogo en lote
+        pares = list(self._iter_colecciones())
+        ids = pd.Series([cid for cid, _ in pares], dtype=object)
+        textos = pd.Series([self._texto_clasificacion(cid, self.colecciones[cat_id]['colecciones'][cid])
+                            for cid, cat_id in pares], dtype=object)
+        nuevas = CLASIFICADOR_CATEGORIA.clasificar_lote(ids, textos) if pares else []
+        
+        for (cid, cat_id), nueva_cat in zip(pares, nuevas):
+            if nueva_cat != cat_id:
+                print(f"  [MOVE] {cid}: {cat_id} -> {nueva_cat}")
+                if nueva_cat not in self.colecciones:
+                    self.colecciones[nueva_cat] = {'nombre': nueva_cat.replace('_', ' ').title(), 'colecciones': {}}
+                self.colecciones[nueva_cat]['colecciones'][cid] = self.colecciones[cat_id]['colecciones'].pop(cid)
+                self._al_modificar(cid)
+                movimientos += 1
         
         if movimientos > 0:
             self._guardar_catalogo()
@@ -402,7 +1078,14 @@ class CatalogoGEE:
         else:
             print("  [OK] Todas las categorías son correctas.")
 
-    def agregar_lote(self, file_path: str):
+    def agregar_lote(self, file_path: str, workers: int = 1):
+        """
+        Agrega las colecciones listadas en un archivo (un ID por línea, '#' para comentarios).
+        
+        Args:
+            file_path: Ruta del archivo
+            workers: Consultas simultáneas a la API (el sondeo de imágenes va por lotes)
+        """
         path = Path(file_path)
         if not path.exists():
             print(f"[ERROR] No existe el archivo {file_path}")
@@ -413,48 +1096,75 @@ class CatalogoGEE:
         
         print(f"[INFO] Procesando lote de {len(ids)} colecciones...")
         exitos = 0
-        for cid in ids:
-            if self.agregar_coleccion_al_catalogo(cid):
-                exitos += 1
-                print(f"  [OK] Agregada: {cid}")
-            else:
-                print(f"  [ERROR] No encontrada: {cid}")
+        with self.transaccion():
+            for cid, metadata in self._consultar_metadata_concurrente(ids, workers):
+                if metadata:
+                    self._registrar_coleccion(cid, metadata)
+                    self._guardar_catalogo()
+                    exitos += 1
+                    print(f"  [OK] Agregada: {cid}")
+                else:
+                    print(f"  [ERROR] No encontrada: {cid}")
         print(f"\n[RESUMEN] Agregadas con éxito: {exitos}/{len(ids)}")
 
-    def descubrir_colecciones(self, providers: Optional[List[str]] = None):
+    def descubrir_colecciones(self, providers: Optional[List[str]] = None, workers: int = 1,
+                              completo: bool = False):
+        """
+        Busca colecciones públicas que aún no están en el catálogo y las agrega.
+        
+        Trabaja en dos etapas: primero recorre las carpetas de los proveedores
+        (BFS paginado con `workers` hilos) reuniendo los IDs nuevos, y luego
+        descarga su metadata de forma concurrente y los registra en el catálogo.
+        
+        El estado del recorrido se guarda en `config/.descubrimiento_estado.json`:
+        una ejecución interrumpida se reanuda donde quedó, y las carpetas que no
+        cambiaron desde el último descubrimiento exitoso no se vuelven a listar.
+        
+        Args:
+            providers: Carpetas a explorar (por defecto, los proveedores principales)
+            workers: Consultas simultáneas a la API en ambas etapas
+            completo: Ignorar el estado guardado y recorrer todas las carpetas
+        """
         if not providers:
-            providers = [
-                "COPERNICUS", "LANDSAT", "MODIS", "NASA", "ECMWF", "USGS", "JAXA", "ESA", "NOAA", "JRC",
-                "LARSE", "FAO", "WRI", "GOOGLE", "GRIDMET", "WWF", "UMD", "Tsinghua", "COPERNICUS/Landcover"
-            ]
+            providers = PROVEEDORES_DEFECTO
         
-        base_path = "projects/earthengine-public/assets"
-        total_nuevas = 0
         ids_existentes = {cid for cid, _ in self._iter_colecciones()}
+        nuevas: List[str] = []
+        inicio = time.perf_counter()
 
-        def _crawl(folder: str):
-            nonlocal total_nuevas
-            try:
-                res = ee.data.listAssets({'parent': folder})
-                if not res: return
-                for asset in res.get('assets', []):
-                    aid, atype = asset.get('id'), asset.get('type')
-                    if not aid or not atype: continue
-                    legacy_id = aid.replace(f"{base_path}/", "")
-                    
-                    if atype == 'IMAGE_COLLECTION' and legacy_id not in ids_existentes:
-                        print(f"[NUEVO] {legacy_id}")
-                        if self.agregar_coleccion_al_catalogo(legacy_id):
-                            ids_existentes.add(legacy_id)
-                            total_nuevas += 1
-                    elif atype == 'FOLDER':
-                        _crawl(aid)
-            except Exception:
-                pass
+        # Etapa 1: recorrido de carpetas
+        print(f"Explorando {len(providers)} proveedores con {max(1, workers)} hilo(s)...")
+        crawler = CrawlerAssets(workers=workers, completo=completo,
+                                estado_path=self.catalog_path.parent / '.descubrimiento_estado.json')
+        for asset in crawler.recorrer([f"{BASE_PUBLICA}/{p}" for p in providers]):
+            legacy_id = id_legacy(asset)
+            if legacy_id not in ids_existentes:
+                ids_existentes.add(legacy_id)
+                nuevas.append(legacy_id)
+                print(f"[NUEVO] {legacy_id}")
 
-        for p in providers:
-            print(f"Explorando {p}...")
-            _crawl(f"{base_path}/{p}")
+        print(f"[INFO] Recorrido completo: {crawler.paginas} páginas listadas, "
+              f"{len(nuevas)} colecciones nuevas ({time.perf_counter() - inicio:.1f} s)")
+        if crawler.reanudado:
+            print("[INFO] Se reanudó un recorrido interrumpido.")
+        if crawler.omitidas:
+            print(f"[INFO] {crawler.omitidas} carpetas sin cambios omitidas (use completo=True para forzar)")
+        if crawler.errores:
+            print(f"[WARN] {len(crawler.errores)} carpetas no se pudieron listar (ver log)")
+
+        # Etapa 2: enriquecimiento de las nuevas. Con varios hilos el orden del
+        # recorrido depende de qué página termina primero: se registran por ID
+        nuevas.sort()
+        total_nuevas = 0
+        with self.transaccion():
+            for cid, metadata in self._consultar_metadata_concurrente(nuevas, workers):
+                if metadata:
+                    self._registrar_coleccion(cid, metadata)
+                    self._guardar_catalogo()
+                    total_nuevas += 1
+                else:
+                    print(f"  [ERROR] No se pudo acceder al asset: {cid}")
+        crawler.confirmar()
         print(f"\n[FIN] Descubiertas {total_nuevas} nuevas colecciones.")
 
     def _iter_colecciones(self):
@@ -463,6 +1173,119 @@ class CatalogoGEE:
             for cid in cat_info.get('colecciones', {}).keys():
                 yield cid, cat_id
 
+    def buscar_texto(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """
+        Búsqueda de texto sobre ID, nombre y descripción usando el índice invertido.
+        
+        Todos los términos deben aparecer (completos o como prefijo). Coincidencias
+        en segmentos del ID pesan más que en el nombre, y éste más que en la descripción.
+        
+        Args:
+            query: Texto a buscar (ej: 'sentinel sr', 'mod13')
+            limit: Máximo de resultados (0 = sin límite)
+            
+        Returns:
+            Lista de (collection_id, puntaje) ordenada por relevancia
+        """
+        return self._indice_texto.buscar(query, limit)
+
+    def _indices_trigramas(self) -> Tuple[IndiceTrigramas, IndiceTrigramas]:
+        """
+        Índices de trigramas (ID + nombre, y solo ID). Se arman al primer uso:
+        solo hacen falta cuando la búsqueda exacta no encuentra nada.
+        """
+        if self._trigramas is None:
+            trigramas, trigramas_id = IndiceTrigramas(), IndiceTrigramas()
+            for cat_id, cat_info in self.colecciones.items():
+                if cat_id.startswith('_'): continue
+                for cid, registro in cat_info.get('colecciones', {}).items():
+                    trigramas.agregar(cid, f"{cid} {registro.get('nombre', '')}")
+                    trigramas_id.agregar(cid, cid)
+            self._trigramas, self._trigramas_id = trigramas, trigramas_id
+        return self._trigramas, self._trigramas_id
+
+    def buscar_aproximado(self, query: str, limit: int = 20, minimo: float = 0.5) -> List[Tuple[str, float]]:
+        """
+        Búsqueda tolerante a errores de tipeo sobre ID y nombre (ej: 'sentinl',
+        'S2_SR_HARMONISED'), por similitud de trigramas.
+        
+        Args:
+            query: Texto a buscar
+            limit: Máximo de resultados
+            minimo: Fracción mínima de trigramas de la consulta que deben coincidir
+            
+        Returns:
+            Lista de (collection_id, similitud) de mayor a menor similitud
+        """
+        return self._indices_trigramas()[0].buscar(query, limit, minimo)
+
+    def sugerir_ids(self, collection_id: str, limit: int = 5, minimo: float = 0.6) -> List[str]:
+        """
+        IDs del catálogo parecidos a `collection_id` ("¿quisiste decir...?").
+        
+        Returns:
+            Lista de IDs de mayor a menor similitud; vacía si el ID existe en el catálogo
+        """
+        if collection_id in self._arbol_prefijos:
+            return []
+        trigramas_id = self._indices_trigramas()[1]
+        return [cid for cid, _ in trigramas_id.buscar(collection_id, limit, minimo, completo=True)]
+
+    def explorar_prefijo(self, prefijo: str = '') -> List[Tuple[str, int, bool]]:
+        """
+        Siguiente nivel de la jerarquía de IDs bajo `prefijo` (ej: '' ->
+        'COPERNICUS', 'MODIS', ...; 'MODIS' -> 'MODIS/006', 'MODIS/061').
+        
+        Args:
+            prefijo: Ruta de segmentos separados por '/' ('' = raíz)
+            
+        Returns:
+            Lista de (ruta, colecciones bajo la ruta, es_coleccion) ordenada por ruta
+        """
+        return self._arbol_prefijos.hijos(prefijo)
+
+    def contar_prefijo(self, prefijo: str = '') -> int:
+        """
+        Número de colecciones cuyo ID empieza con los segmentos de `prefijo`.
+        """
+        return self._arbol_prefijos.contar(prefijo)
+
+    def colecciones_bajo_prefijo(self, prefijo: str, limite: int = 0) -> List[str]:
+        """
+        IDs bajo `prefijo` en orden alfabético (0 = sin límite).
+        """
+        return self._arbol_prefijos.colecciones(prefijo, limite)
+
+    def periodo_coleccion(self, collection_id: str) -> Optional[Periodo]:
+        """
+        Cobertura temporal parseada de una colección.
+        
+        Returns:
+            (inicio, fin) con fin None si sigue vigente, o None si el período
+            es desconocido o la colección no está en el catálogo
+        """
+        return self._indice_temporal.periodo(collection_id)
+
+    def colecciones_en_rango(self, fecha_inicio: str, fecha_fin: str,
+                             incluir_sin_periodo: bool = True) -> Set[str]:
+        """
+        Colecciones cuya cobertura temporal se superpone con [fecha_inicio, fecha_fin].
+        
+        Args:
+            fecha_inicio: Inicio del rango (YYYY-MM-DD)
+            fecha_fin: Fin del rango (YYYY-MM-DD)
+            incluir_sin_periodo: Si True, incluye las colecciones de período
+                desconocido (ej: 'Consultar en GEE'), que podrían tener datos
+                
+        Returns:
+            Conjunto de collection_id
+        """
+        ids = set(self._indice_temporal.superpuestas(fecha_inicio, fecha_fin))
+        if incluir_sin_periodo:
+            ids.update(cid for cid, _ in self._iter_colecciones()
+                       if self._indice_temporal.periodo(cid) is None)
+        return ids
+
     def generar_reporte(self):
         print("\n" + "="*50)
         print("REPORTE DE ESTADO DEL CATÁLOGO")
@@ -480,54 +1303,89 @@ class CatalogoGEE:
         """
         Genera un DataFrame con todas las colecciones del catálogo. 
         
+        El inventario se construye una sola vez y queda en memoria hasta que el
+        catálogo se modifica (ver `_al_modificar`); cada llamada devuelve una copia.
+        
         Args:
             exportar_csv: Si True, exporta a CSV
             
         Returns:
             DataFrame con el inventario completo
         """
-        print("\n" + "="*80)
-        print("GENERANDO INVENTARIO COMPLETO DE COLECCIONES GEE")
-        print("="*80)
+        if self._inventario is None:
+            print("\n" + "="*80)
+            print("GENERANDO INVENTARIO COMPLETO DE COLECCIONES GEE")
+            print("="*80)
+            self._inventario = self._construir_inventario()
         
-        registros = []
+        df = self._inventario.copy()
         
+        if exportar_csv and not df.empty:
+            self._exportar_csv(df)
+        
+        return df
+
+    def _construir_inventario(self) -> pd.DataFrame:
+        """
+        Arma el inventario por columnas (sin un dict por fila). `categoria`,
+        `categoria_id` y `nivel_procesamiento` quedan como categóricas.
+        """
+        cat_ids, cat_nombres, ids, regs = [], [], [], []
         for categoria_id, categoria_info in self.colecciones.items():
             if categoria_id.startswith('_'): continue
-                
-            categoria_nombre = categoria_info['nombre']
-            n_colecciones = len(categoria_info.get('colecciones', {}))
-            
-            # print(f"\n{categoria_nombre}: {n_colecciones} colecciones") # Optional logging
-            
-            for col_id, col_info in categoria_info.get('colecciones', {}).items():
-                # Procesar colección para el DataFrame
-                registro = {
-                    'categoria': categoria_nombre,
-                    'categoria_id': categoria_id,
-                    'collection_id': col_id,
-                    'nombre': col_info.get('nombre', ''),
-                    'resolucion_espacial': col_info.get('resolucion', ''),
-                    'resolucion_temporal': col_info.get('frecuencia', col_info.get('temporal', '')),
-                    'periodo_temporal': col_info.get('temporal', ''),
-                    'nivel_procesamiento': col_info.get('nivel', ''), # Asegurar que este campo exista o se infiera
-                    'qa_disponible': col_info.get('qa', False),
-                    'bandas_principales': ', '.join(col_info.get('bandas_principales', [])),
-                    'last_verified': col_info.get('last_verified', '')
-                }
-                
-                # Intentar inferir nivel si no existe en el JSON
-                if not registro['nivel_procesamiento']:
-                    registro['nivel_procesamiento'] = self._detectar_nivel_procesamiento(col_id)
-                
-                registros.append(registro)
+            cols = categoria_info.get('colecciones', {})
+            cat_ids.extend([categoria_id] * len(cols))
+            cat_nombres.extend([categoria_info.get('nombre', categoria_id)] * len(cols))
+            ids.extend(cols.keys())
+            regs.extend(cols.values())
         
-        df = pd.DataFrame(registros)
+        # Las bandas son tuplas compartidas entre registros: unir cada combinación una vez
+        bandas: Dict[Any, str] = {}
+        for r in regs:
+            b = r.get('bandas_principales') or ()
+            if isinstance(b, tuple) and b not in bandas:
+                bandas[b] = ', '.join(b)
         
-        if exportar_csv and not df.empty:
-            self._exportar_csv(df)
+        # Inferir nivel (en lote) solo donde no existe en el JSON
+        niveles = [r.get('nivel') for r in regs]
+        faltantes = [i for i, nivel in enumerate(niveles) if not nivel]
+        if faltantes:
+            inferidos = CLASIFICADOR_NIVEL.clasificar_lote(pd.Series([ids[i] for i in faltantes], dtype=object))
+            for i, nivel in zip(faltantes, inferidos):
+                niveles[i] = nivel
         
-        return df
+        periodos = [self._indice_temporal.periodo(cid) for cid in ids]
+        
+        return pd.DataFrame({
+            'categoria': pd.Categorical(cat_nombres),
+            'categoria_id': pd.Categorical(cat_ids),
+            'collection_id': ids,
+            'nombre': [r.get('nombre', '') for r in regs],
+            'resolucion_espacial': [r.get('resolucion', '') for r in regs],
+            'resolucion_temporal': [r.get('frecuencia', r.get('temporal', '')) for r in regs],
+            'periodo_temporal': [r.get('temporal', '') for r in regs],
+            'fecha_inicio': pd.to_datetime([p[0] if p else None for p in periodos]),
+            'fecha_fin': pd.to_datetime([p[1] if p else None for p in periodos]),
+            'nivel_procesamiento': pd.Categorical(niveles),
+            'qa_disponible': [r.get('qa', False) for r in regs],
+            'bandas_principales': [bandas[b] if isinstance(b, tuple) else ', '.join(b)
+                                   for b in (r.get('bandas_principales') or () for r in regs)],
+            'last_verified': [r.get('last_verified', '') for r in regs],
+        })
+
+    def _exportar_csv(self, df: pd.DataFrame) -> Path:
+        """
+        Exporta el inventario a output/inventario_colecciones_<timestamp>.csv
+        """
+        output_dir = Path('output')
+        output_dir.mkdir(exist_ok=True, parents=True)
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        csv_path = output_dir / f'inventario_colecciones_{timestamp}.csv'
+        
+        df.to_csv(csv_path, index=False)
+        print(f"[OK] Inventario exportado a: {csv_path}")
+        return csv_path
 
     def listar_niveles_disponibles(self) -> pd.DataFrame:
         """
@@ -542,9 +1400,9 @@ class CatalogoGEE:
             print("[WARN] El catálogo está vacío.")
             return pd.DataFrame()
 
-        # Normalizar niveles vacíos
-        df['nivel_procesamiento'] = df['nivel_procesamiento'].fillna('No especificado')
-        df.loc[df['nivel_procesamiento'] == '', 'nivel_procesamiento'] = 'No especificado'
+        # Normalizar niveles vacíos (la columna es categórica en el inventario)
+        df['nivel_procesamiento'] = df['nivel_procesamiento'].astype(object) \
+            .fillna('No especificado').replace('', 'No especificado')
 
         # Agrupar y contar
         niveles = df.groupby('nivel_procesamiento').agg(
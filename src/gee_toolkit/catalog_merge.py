@@ -0,0 +1,139 @@
+"""
+Escritura concurrente del catálogo JSON entre procesos.
+
+Varios procesos (ej: los servicios `cli` y `maintenance` que comparten
+`./config`, o varias ejecuciones de `maintain_catalog.py`) pueden modificar el
+mismo `colecciones_gee.json`. Para no pisarse, cada escritura:
+
+  1. Toma un bloqueo exclusivo (advisory) sobre `.colecciones_gee.json.lock`.
+  2. Si el JSON en disco cambió desde la última lectura o escritura propia,
+     lo fusiona registro por registro con el catálogo en memoria (`fusionar_en`).
+  3. Escribe el resultado y libera el bloqueo.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+Ubicacion = Tuple[str, Dict[str, Any]]
+
+
+def ruta_bloqueo(json_path: Path) -> Path:
+    """
+    Archivo de bloqueo asociado a un JSON (ej: config/.colecciones_gee.json.lock).
+    """
+    return json_path.with_name(f".{json_path.name}.lock")
+
+
+@contextmanager
+def bloqueo_exclusivo(ruta: Path) -> Iterator[None]:
+    """
+    Bloqueo exclusivo entre procesos sobre `ruta` (espera hasta obtenerlo).
+    Es cooperativo: solo excluye a quienes usan el mismo bloqueo.
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def indexar_registros(catalogo: Dict[str, Any]) -> Dict[str, Ubicacion]:
+    """
+    collection_id -> (categoria, registro) para todo el catálogo.
+    """
+    indice: Dict[str, Ubicacion] = {}
+    for cat_id, cat_info in catalogo.items():
+        if cat_id.startswith('_') or not isinstance(cat_info, dict): continue
+        for cid, registro in cat_info.get('colecciones', {}).items():
+            indice[cid] = (cat_id, registro)
+    return indice
+
+
+class ResultadoFusion(NamedTuple):
+    actualizados: List[str]   # registros tomados del disco (cambios de otro proceso)
+    conflictos: List[str]     # modificados por ambos procesos
+
+
+def _gana_disco(en_disco: Optional[Ubicacion], propio: Optional[Ubicacion]) -> bool:
+    # Una eliminación (de cualquiera de los dos lados) prevalece; si ambos
+    # actualizaron el registro, gana el de `last_verified` más reciente (empate: el propio)
+    if en_disco is None or propio is None:
+        return en_disco is None
+    return (en_disco[1].get('last_verified') or '') > (propio[1].get('last_verified') or '')
+
+
+def fusionar_en(propio: Dict[str, Any], base: Dict[str, Any], disco: Dict[str, Any],
+                modificados: Iterable[str]) -> ResultadoFusion:
+    """
+    Fusión a tres bandas, registro por registro, aplicada sobre `propio`.
+
+    Los registros que otro proceso cambió (distintos entre `base` y `disco`) se
+    copian a `propio`, salvo que este proceso también los haya modificado: en
+    ese conflicto decide `last_verified` (ver `_gana_disco`). Las categorías y
+    claves de metadata nuevas en disco se agregan.
+
+    Args:
+        propio: Catálogo en memoria (se modifica en el lugar)
+        base: Catálogo tal como estaba en disco en la última lectura/escritura propia
+        disco: Catálogo actual en disco
+        modificados: IDs modificados por este proceso desde `base`
+    """
+    for clave, valor in disco.items():
+        if clave in propio: continue
+        if isinstance(valor, dict) and 'colecciones' in valor:
+            propio[clave] = {**valor, 'colecciones': {}}
+        else:
+            propio[clave] = valor
+
+    en_base = indexar_registros(base)
+    en_disco = indexar_registros(disco)
+    en_propio = indexar_registros(propio)
+    modificados = set(modificados)
+
+    actualizados: List[str] = []
+    conflictos: List[str] = []
+    for cid in en_base.keys() | en_disco.keys():
+        remoto = en_disco.get(cid)
+        if remoto == en_base.get(cid):
+            continue  # el otro proceso no lo tocó
+        local = en_propio.get(cid)
+        if cid in modificados:
+            conflictos.append(cid)
+            if not _gana_disco(remoto, local):
+                continue
+        if local is not None:
+            del propio[local[0]]['colecciones'][cid]
+        if remoto is not None:
+            cat_id, registro = remoto
+            propio.setdefault(cat_id, {'colecciones': {}}).setdefault('colecciones', {})[cid] = registro
+        actualizados.append(cid)
+
+    if conflictos:
+        logger.info(f"Fusión del catálogo: {len(conflictos)} conflicto(s): {conflictos[:10]}")
+    return ResultadoFusion(actualizados, conflictos)
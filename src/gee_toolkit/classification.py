@@ -0,0 +1,306 @@
+"""
+Clasificación de colecciones por categoría temática y nivel de procesamiento.
+
+Las reglas de palabras clave viven en tablas declarativas y ordenadas
+(gana la primera regla que coincide). Todas las palabras de una tabla se
+compilan en una única expresión regular con forma de trie, que detecta en
+una sola pasada qué palabras aparecen como subcadena del texto (o de una
+columna completa de textos, en la versión en lote).
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Regla(NamedTuple):
+    """
+    Regla de clasificación. Coincide si aparece alguna palabra de `en_id` en el
+    ID o alguna de `en_texto` en el texto completo, y además el ID contiene
+    todas las de `requiere` y ninguna de `excluye`.
+    """
+    resultado: str
+    en_id: Tuple[str, ...] = ()
+    en_texto: Tuple[str, ...] = ()
+    requiere: Tuple[str, ...] = ()
+    excluye: Tuple[str, ...] = ()
+
+
+# Orden = prioridad. El texto es "<ID> <NOMBRE> <DESCRIPCIÓN>" en mayúsculas.
+REGLAS_CATEGORIA: List[Regla] = [
+    Regla('atmosfera', en_id=('S5P', 'TROPOMI'), en_texto=('NO2', 'CO', 'O3', 'SO2', 'CH4', 'ATMOSPHERE')),
+    Regla('agua', en_id=('HYCOM', 'GSW', 'OCEANDATA'), en_texto=('WATER', 'OCEAN', 'SST', 'HYDRO')),
+    Regla('lidar_biomasa', en_id=('GEDI', 'HANSEN', 'GLAD'), en_texto=('FOREST', 'BIOMASS', 'CANOPY', 'TREE')),
+    Regla('agricultura', en_id=('FAO', 'WAPOR'), en_texto=('CROP', 'AGRICULTURE', 'YIELD')),
+    Regla('suelos', en_id=('ISDASOIL', 'OPENLANDMAP'), en_texto=('SOIL',)),
+    Regla('fuego', en_id=('FIRMS', 'FIRE', 'MCD64'), en_texto=('BURNED',)),
+    Regla('criosphere', en_texto=('SNOW', 'ICE', 'CRYOSPHERE')),
+    Regla('landcover', en_id=('WORLDCOVER', 'CORINE', 'NLCD', 'DYNAMICWORLD')),
+    Regla('elevacion', en_id=('DEM', 'SRTM', 'ELEVATION')),
+    Regla('sar', en_id=('SENTINEL-1',), en_texto=('SAR',)),
+    Regla('clima', en_id=('ERA5', 'CHIRPS', 'GPM', 'CLIMATE')),
+    Regla('vegetacion', en_id=('MOD13', 'NDVI', 'EVI')),
+    Regla('poblacion', en_id=('WORLDPOP', 'GPW', 'URBAN')),
+]
+CATEGORIA_DEFECTO = 'clima'
+
+_MODIS_REFLECTANCIA = ('MOD09', 'MYD09', 'MCD09')
+
+# Heurística por ID cuando la metadata no trae el nivel oficial
+REGLAS_NIVEL: List[Regla] = [
+    # Sentinel
+    Regla('L2A', en_id=('S2_SR', 'L2A')),
+    Regla('L1C', en_id=('S2_HARMONIZED',), excluye=('SR',)),
+    Regla('L1C', en_id=('COPERNICUS/S2',), excluye=('SR',)),
+    Regla('L1_GRD', en_id=('S1_GRD',)),
+    Regla('L2 (Atmosférico)', en_id=('S5P',)),
+    # Landsat
+    Regla('L2', en_id=('C02/T1_L2', 'C02/T2_L2')),
+    Regla('TOA', en_id=('C02/T1_TOA', 'C02/T2_TOA')),
+    Regla('RAW', en_id=('C02/T1_RT',)),
+    Regla('L1 (DN)', en_id=('C02/T1', 'C02/T2')),
+    # MODIS
+    Regla('L2G', en_id=_MODIS_REFLECTANCIA, requiere=('GA',)),
+    Regla('L3', en_id=_MODIS_REFLECTANCIA, requiere=('A1',)),
+    Regla('L2', en_id=_MODIS_REFLECTANCIA),
+]
+NIVEL_DEFECTO = 'No especificado'
+
+
+def _regex_trie(palabras: Iterable[str]) -> str:
+    """
+    Arma una alternación anidada por prefijos común ('CO(?:RINE)?|...').
+    Al ser codiciosa, en cada posición devuelve la palabra más larga que coincide.
+    """
+    raiz: Dict[str, dict] = {}
+    for palabra in palabras:
+        nodo = raiz
+        for ch in palabra:
+            nodo = nodo.setdefault(ch, {})
+        nodo[''] = {}
+
+    def _nodo(nodo: Dict[str, dict]) -> str:
+        ramas = [re.escape(ch) + _nodo(sub) for ch, sub in sorted(nodo.items()) if ch != '']
+        if not ramas:
+            return ''
+        patron = ramas[0] if len(ramas) == 1 else f"(?:{'|'.join(ramas)})"
+        return f"(?:{patron})?" if '' in nodo else patron
+
+    return _nodo(raiz)
+
+
+class MultiPatron:
+    """
+    Detector de múltiples palabras clave en una pasada (equivalente exacto a
+    `{p for p in palabras if p in texto}`).
+
+    La regex con forma de trie recorre el texto sin solapamiento y en cada
+    posición captura la palabra más larga. Lo que ese recorrido no ve se
+    recupera con dos tablas precalculadas:
+      - `_contenidas`: palabras que son subcadena de la palabra encontrada.
+      - `_solapes`: palabras que empiezan dentro de ella y terminan después.
+        Para cada una se guarda la cadena solapada completa (ej: 'CO' + 'O3'
+        -> 'CO3'), cuya presencia se verifica con un simple `in`.
+    """
+
+    def __init__(self, palabras: Iterable[str]):
+        self.palabras: List[str] = sorted(set(palabras))
+        self.indice: Dict[str, int] = {p: i for i, p in enumerate(self.palabras)}
+        self.regex = re.compile(f"({_regex_trie(self.palabras)})") if self.palabras else None
+        self._contenidas: Dict[str, FrozenSet[str]] = {
+            p: frozenset(q for q in self.palabras if q in p) for p in self.palabras
+        }
+        self._solapes: Dict[str, Tuple[Tuple[str, str], ...]] = {
+            p: tuple((p[:k] + q, q) for k in range(1, len(p)) for q in self.palabras
+                     if len(q) > len(p) - k and q.startswith(p[k:]))
+            for p in self.palabras
+        }
+        self._con_solapes = np.array([bool(self._solapes[p]) for p in self.palabras], dtype=bool)
+        self._sin_solapes: FrozenSet[str] = frozenset(p for p in self.palabras if not self._solapes[p])
+        # Matriz de cierre: fila = palabra encontrada, columna = palabra presente
+        self._cierre = np.zeros((len(self.palabras), len(self.palabras)), dtype=np.float32)
+        for p, contenidas in self._contenidas.items():
+            for q in contenidas:
+                self._cierre[self.indice[p], self.indice[q]] = 1.0
+
+    def presentes(self, texto: str) -> FrozenSet[str]:
+        """
+        Palabras clave que aparecen como subcadena de `texto`.
+        """
+        if self.regex is None or not texto:
+            return frozenset()
+        presentes: set = set()
+        for palabra in set(self.regex.findall(texto)):
+            presentes |= self._contenidas[palabra]
+            for solapada, otra in self._solapes[palabra]:
+                if solapada in texto:
+                    presentes |= self._contenidas[otra]
+        return frozenset(presentes)
+
+    def firma(self, texto: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """
+        Clave barata que determina `presentes(texto)`: las palabras que captura
+        la regex y las cadenas solapadas (ver `_solapes`) que aparecen en el texto.
+        """
+        if self.regex is None or not texto:
+            return (), ()
+        encontradas = tuple(self.regex.findall(texto))
+        if self._sin_solapes.issuperset(encontradas):
+            return encontradas, ()
+        return encontradas, tuple(s for p in encontradas for s, _ in self._solapes[p] if s in texto)
+
+    def presencia(self, textos: List[str]) -> np.ndarray:
+        """
+        Matriz booleana (textos x palabras) con una sola pasada de la regex.
+
+        Los textos se concatenan separados por '\\n' (ninguna palabra clave lo
+        contiene, así que no hay coincidencias que crucen filas). `split` devuelve
+        alternadamente tramos sin coincidencia y palabras encontradas; con las
+        longitudes acumuladas se ubica cada palabra en su fila.
+        """
+        matriz = np.zeros((len(textos), len(self.palabras)), dtype=bool)
+        if self.regex is None or not textos:
+            return matriz
+
+        partes = self.regex.split('\n'.join(textos))
+        encontradas = partes[1::2]
+        if not encontradas:
+            return matriz
+
+        # Posición de inicio de cada palabra encontrada y de cada fila en el bloque
+        fin_partes = np.cumsum(np.fromiter(map(len, partes), dtype=np.int64, count=len(partes)))
+        posiciones = fin_partes[0:-1:2]
+        inicio_filas = np.cumsum(np.fromiter(map(len, textos), dtype=np.int64, count=len(textos)) + 1)
+        filas = np.searchsorted(inicio_filas, posiciones, side='right')
+        cols = np.fromiter(map(self.indice.__getitem__, encontradas), dtype=np.int64, count=len(encontradas))
+        matriz[filas, cols] = True
+
+        # Solo las palabras con solapes requieren revisar el texto de su fila
+        extra_filas, extra_cols = [], []
+        for k in np.flatnonzero(self._con_solapes[cols]).tolist():
+            fila = int(filas[k])
+            for solapada, otra in self._solapes[encontradas[k]]:
+                if solapada in textos[fila]:
+                    extra_filas.append(fila)
+                    extra_cols.append(self.indice[otra])
+        if extra_filas:
+            matriz[extra_filas, extra_cols] = True
+
+        # Expandir a todas las palabras contenidas en cada hallazgo
+        return (matriz.astype(np.float32) @ self._cierre) > 0
+
+    def columnas(self, palabras: Iterable[str]) -> List[int]:
+        return [self.indice[p] for p in palabras]
+
+
+class ClasificadorReglas:
+    """
+    Evalúa una tabla de reglas ordenada sobre las palabras detectadas por
+    `MultiPatron`. El resultado depende solo de las palabras presentes, así
+    que la versión por ID se memoiza por la firma de la regex (y, sin texto,
+    también por el ID) y la versión en lote toma, una vez por fila distinta,
+    la primera regla que coincide.
+    """
+
+    # IDs memoizados por `clasificar` antes de vaciar la memo (acota la memoria)
+    MAX_MEMO_ID: int = 100_000
+
+    def __init__(self, reglas: List[Regla], defecto: str):
+        self.reglas = list(reglas)
+        self.defecto = defecto
+        self._patron_id = MultiPatron(p for r in self.reglas for p in r.en_id + r.requiere + r.excluye)
+        self._patron_texto = MultiPatron(p for r in self.reglas for p in r.en_texto)
+        self._memo: Dict[Tuple[tuple, tuple], str] = {}
+        self._memo_id: Dict[str, str] = {}
+
+    def _evaluar(self, en_id: FrozenSet[str], en_texto: FrozenSet[str]) -> str:
+        for regla in self.reglas:
+            if not (en_id.intersection(regla.en_id) or en_texto.intersection(regla.en_texto)):
+                continue
+            if en_id.issuperset(regla.requiere) and en_id.isdisjoint(regla.excluye):
+                return regla.resultado
+        return self.defecto
+
+    def _resolver(self, cid: str, texto: str) -> str:
+        """
+        Resultado para un ID y un texto ya en mayúsculas.
+        """
+        clave = (self._patron_id.firma(cid), self._patron_texto.firma(texto))
+        resultado = self._memo.get(clave)
+        if resultado is None:
+            resultado = self._memo[clave] = self._evaluar(self._patron_id.presentes(cid),
+                                                          self._patron_texto.presentes(texto))
+        return resultado
+
+    def clasificar(self, collection_id: str, texto: str = '') -> str:
+        """
+        Clasifica una colección.
+
+        Args:
+            collection_id: ID de la colección
+            texto: Texto libre donde buscar las palabras `en_texto` (típicamente
+                ID + nombre + descripción)
+        """
+        cid = collection_id.upper()
+        if texto:
+            return self._resolver(cid, texto.upper())
+
+        # Sin texto el resultado depende solo del ID: las llamadas repetidas
+        # (ej: cada revalidación de la misma colección) no vuelven a pasar la regex
+        resultado = self._memo_id.get(cid)
+        if resultado is None:
+            if len(self._memo_id) >= self.MAX_MEMO_ID:
+                self._memo_id.clear()
+            resultado = self._memo_id[cid] = self._resolver(cid, '')
+        return resultado
+
+    def clasificar_lote(self, ids: pd.Series, textos: Optional[pd.Series] = None) -> pd.Series:
+        """
+        Clasifica una Serie completa de IDs (y opcionalmente sus textos) sin
+        iterar reglas por fila. Las filas repetidas se clasifican una sola vez.
+
+        Returns:
+            Serie con el resultado, alineada con el índice de `ids`
+        """
+        codigos, _ = pd.factorize(ids, use_na_sentinel=False)
+        if textos is not None:
+            codigos_texto, _ = pd.factorize(textos.fillna(''))
+            codigos, _ = pd.factorize(codigos * (int(codigos_texto.max(initial=0)) + 1) + codigos_texto)
+        # Primera aparición de cada fila distinta (los códigos siguen ese orden)
+        primeras = np.unique(codigos, return_index=True)[1]
+        resultados = self._clasificar_filas(
+            [str(x) for x in ids.iloc[primeras].tolist()],
+            [str(t) for t in textos.iloc[primeras].fillna('').tolist()] if textos is not None else None)
+        return pd.Series(resultados[codigos], index=ids.index, dtype=object)
+
+    def _clasificar_filas(self, ids: List[str], textos: Optional[List[str]]) -> np.ndarray:
+        n = len(ids)
+        en_id = self._patron_id.presencia([x.upper() for x in ids])
+        if textos is not None:
+            en_texto = self._patron_texto.presencia([t.upper() for t in textos])
+        else:
+            en_texto = np.zeros((n, len(self._patron_texto.palabras)), dtype=bool)
+
+        condiciones = []
+        for regla in self.reglas:
+            cond = np.zeros(n, dtype=bool)
+            if regla.en_id:
+                cond |= en_id[:, self._patron_id.columnas(regla.en_id)].any(axis=1)
+            if regla.en_texto:
+                cond |= en_texto[:, self._patron_texto.columnas(regla.en_texto)].any(axis=1)
+            if regla.requiere:
+                cond &= en_id[:, self._patron_id.columnas(regla.requiere)].all(axis=1)
+            if regla.excluye:
+                cond &= ~en_id[:, self._patron_id.columnas(regla.excluye)].any(axis=1)
+            condiciones.append(cond)
+
+        valores = np.array([r.resultado for r in self.reglas] + [self.defecto], dtype=object)
+        # Índice de la primera regla que coincide (la última posición es el defecto)
+        primera = np.column_stack(condiciones + [np.ones(n, dtype=bool)]).argmax(axis=1)
+        return valores[primera]
+
+
+CLASIFICADOR_CATEGORIA = ClasificadorReglas(REGLAS_CATEGORIA, CATEGORIA_DEFECTO)
+CLASIFICADOR_NIVEL = ClasificadorReglas(REGLAS_NIVEL, NIVEL_DEFECTO)
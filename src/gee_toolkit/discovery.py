@@ -0,0 +1,398 @@
+"""
+Descubrimiento de colecciones públicas de Earth Engine.
+
+Recorre en anchura las carpetas de proveedores con `ee.data.listAssets`,
+siguiendo la paginación (`nextPageToken`) y repartiendo las páginas entre un
+pool acotado de hilos.
+
+Opcionalmente guarda el estado del recorrido en un archivo JSON: si se
+interrumpe, la siguiente ejecución continúa donde quedó, y las carpetas cuyo
+`updateTime` no cambió desde el último recorrido exitoso no se vuelven a listar.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import ee
+
+from .api_cache import CacheRespuestas
+
+logger = logging.getLogger(__name__)
+
+BASE_PUBLICA = "projects/earthengine-public/assets"
+
+PROVEEDORES_DEFECTO = [
+    "COPERNICUS", "LANDSAT", "MODIS", "NASA", "ECMWF", "USGS", "JAXA", "ESA", "NOAA", "JRC",
+    "LARSE", "FAO", "WRI", "GOOGLE", "GRIDMET", "WWF", "UMD", "Tsinghua", "COPERNICUS/Landcover"
+]
+
+
+def id_legacy(asset: Dict[str, Any]) -> str:
+    """
+    Devuelve el ID corto (ej: 'MODIS/061/MOD13Q1') de un asset listado.
+    """
+    aid = asset.get('id') or asset.get('name', '')
+    return aid.replace(f"{BASE_PUBLICA}/", "")
+
+
+def nombre_asset(asset: Dict[str, Any]) -> str:
+    """
+    Devuelve el nombre completo del asset, utilizable como `parent` en listAssets.
+    """
+    return asset.get('name') or f"{BASE_PUBLICA}/{id_legacy(asset)}"
+
+
+def listar_pagina(parent: str, page_token: Optional[str] = None,
+                  tamano_pagina: int = 1000) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Lista una sola página de una carpeta.
+
+    Args:
+        parent: Nombre completo de la carpeta
+        page_token: Token devuelto por la página anterior (None para la primera)
+        tamano_pagina: Máximo de assets por página
+
+    Returns:
+        Tuple con los assets de la página y el token de la siguiente (o None)
+    """
+    params: Dict[str, Any] = {'parent': parent, 'pageSize': tamano_pagina}
+    if page_token:
+        params['pageToken'] = page_token
+    res = ee.data.listAssets(params) or {}
+    return res.get('assets', []), res.get('nextPageToken')
+
+
+def listar_carpeta(parent: str, tamano_pagina: int = 1000, cache: Optional[CacheRespuestas] = None,
+                   ttl: Optional[float] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Lista todas las páginas de una carpeta.
+
+    Args:
+        parent: Nombre completo de la carpeta
+        tamano_pagina: Máximo de assets por página
+        cache: Caché de respuestas; el listado completo se guarda como una entrada
+        ttl: Segundos de validez del listado en la caché
+
+    Returns:
+        Tuple con los assets y el número de páginas (llamadas a la API; 0 si
+        vino de la caché)
+    """
+    if cache is not None:
+        paginas = [0]
+
+        def calcular() -> List[Dict[str, Any]]:
+            assets, paginas[0] = listar_carpeta(parent, tamano_pagina)
+            return assets
+
+        return cache.obtener('listAssets', (parent,), calcular, ttl), paginas[0]
+
+    assets, token = listar_pagina(parent, None, tamano_pagina)
+    paginas = 1
+    while token:
+        mas, token = listar_pagina(parent, token, tamano_pagina)
+        assets.extend(mas)
+        paginas += 1
+    return assets, paginas
+
+
+def carpeta_padre(collection_id: str) -> Optional[str]:
+    """
+    Nombre completo (utilizable en listAssets) de la carpeta de una colección.
+    'MODIS/061/MOD13Q1' -> 'projects/earthengine-public/assets/MODIS/061'
+    'projects/sat-io/open-datasets/GHS/X' -> 'projects/sat-io/assets/open-datasets/GHS'
+    """
+    partes = collection_id.split('/')
+    if partes[0] != 'projects':
+        return f"{BASE_PUBLICA}/{'/'.join(partes[:-1])}" if len(partes) >= 2 else None
+    if len(partes) >= 4 and partes[2] == 'assets':
+        return '/'.join(partes[:-1])
+    if len(partes) >= 4:
+        return f"projects/{partes[1]}/assets/{'/'.join(partes[2:-1])}"
+    return None
+
+
+class ResultadoListado(NamedTuple):
+    """
+    Clasificación de colecciones del catálogo según el listado de sus carpetas.
+    """
+    sin_cambios: List[str]    # aparecen con el mismo updateTime guardado
+    cambiados: List[str]      # aparecen con otro updateTime (o sin uno guardado)
+    no_listados: List[str]    # no aparecen en el listado completo de su carpeta
+    sin_resolver: List[str]   # carpeta no listada (error o pocas colecciones)
+    carpetas: int
+    llamadas: int
+
+
+def comparar_por_carpetas(update_times: Dict[str, Optional[str]], workers: int = 1,
+                          tamano_pagina: int = 1000, min_por_carpeta: int = 2,
+                          cache: Optional[CacheRespuestas] = None,
+                          ttl: Optional[float] = None) -> ResultadoListado:
+    """
+    Agrupa colecciones por carpeta y lista cada carpeta una sola vez, en lugar
+    de llamar a getAsset por colección.
+
+    Args:
+        update_times: collection_id -> updateTime guardado (None si no se conoce)
+        workers: Carpetas listadas en paralelo
+        tamano_pagina: Máximo de assets por página
+        min_por_carpeta: Carpetas con menos colecciones de updateTime conocido se
+            dejan sin resolver (un getAsset por colección es más barato)
+        cache: Caché de respuestas para los listados (ver `listar_carpeta`)
+        ttl: Segundos de validez de cada listado en la caché
+    """
+    grupos: Dict[str, List[str]] = {}
+    sin_resolver: List[str] = []
+    for cid in update_times:
+        padre = carpeta_padre(cid)
+        if padre is None:
+            sin_resolver.append(cid)
+        else:
+            grupos.setdefault(padre, []).append(cid)
+    # Sin updateTime guardado el listado no puede confirmar nada: iría igual a getAsset
+    for padre in [p for p, ids in grupos.items()
+                  if sum(1 for cid in ids if update_times[cid]) < min_por_carpeta]:
+        sin_resolver.extend(grupos.pop(padre))
+
+    sin_cambios: List[str] = []
+    cambiados: List[str] = []
+    no_listados: List[str] = []
+    llamadas = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='gee-list') as pool:
+        futuros = {pool.submit(listar_carpeta, padre, tamano_pagina, cache, ttl): padre for padre in grupos}
+        for futuro in as_completed(futuros):
+            padre = futuros[futuro]
+            try:
+                assets, paginas = futuro.result()
+            except Exception as e:
+                logger.warning(f"No se pudo listar {padre}: {e}")
+                sin_resolver.extend(grupos[padre])
+                continue
+            llamadas += paginas
+            por_nombre = {nombre_asset(a).rsplit('/', 1)[-1]: a for a in assets}
+            for cid in grupos[padre]:
+                asset = por_nombre.get(cid.rsplit('/', 1)[-1])
+                if asset is None or asset.get('type') != 'IMAGE_COLLECTION':
+                    no_listados.append(cid)
+                elif update_times[cid] and asset.get('updateTime') == update_times[cid]:
+                    sin_cambios.append(cid)
+                else:
+                    cambiados.append(cid)
+
+    return ResultadoListado(sin_cambios, cambiados, no_listados, sin_resolver, len(grupos), llamadas)
+
+
+class CrawlerAssets:
+    """
+    Recorrido en anchura (BFS) de carpetas de assets con N hilos concurrentes.
+
+    La cola de trabajo contiene pares (carpeta, page_token). Cada hilo lista una
+    página; el hilo que itera `recorrer` encola las páginas siguientes y las
+    subcarpetas, de modo que la cola solo se toca desde un hilo.
+
+    Con `estado_path`, el recorrido es reanudable e incremental:
+      - Cada `checkpoint_cada` páginas (y al interrumpirse) se guardan la cola
+        pendiente, las carpetas visitadas y los assets ya entregados.
+      - Al terminar, `confirmar()` registra el `updateTime` de cada carpeta
+        listada. En el siguiente recorrido, una subcarpeta con el mismo
+        `updateTime` (y listada hace menos de `max_dias` días) se omite.
+    """
+
+    def __init__(self, workers: int = 1, tamano_pagina: int = 1000,
+                 estado_path: Optional[Path] = None, completo: bool = False,
+                 max_dias: float = 7.0, checkpoint_cada: int = 25):
+        """
+        Args:
+            workers: Páginas listadas en paralelo
+            tamano_pagina: Máximo de assets por página
+            estado_path: Archivo JSON de estado (None = sin checkpoints ni omisiones)
+            completo: Ignorar el estado previo y listar todas las carpetas
+            max_dias: Antigüedad máxima de un listado para poder omitir la carpeta
+            checkpoint_cada: Páginas entre checkpoints
+        """
+        self.workers = max(1, workers)
+        self.tamano_pagina = tamano_pagina
+        self.estado_path = Path(estado_path) if estado_path else None
+        self.completo = completo
+        self.max_dias = max_dias
+        self.checkpoint_cada = max(1, checkpoint_cada)
+        self.paginas = 0
+        self.omitidas = 0
+        self.reanudado = False
+        self.errores: List[Tuple[str, str]] = []
+
+        self._previo: Dict[str, Dict[str, Any]] = {}
+        self._update_times: Dict[str, Optional[str]] = {}
+        self._listadas: Dict[str, str] = {}
+
+    # --- Estado persistido ---------------------------------------------------
+
+    def _cargar_estado(self) -> Dict[str, Any]:
+        if not self.estado_path or not self.estado_path.exists():
+            return {}
+        try:
+            with open(self.estado_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Estado de recorrido ilegible ({self.estado_path}): {e}")
+            return {}
+
+    def _guardar_estado(self, en_curso: Optional[Dict[str, Any]]) -> None:
+        if not self.estado_path:
+            return
+        estado = {'carpetas': self._previo, 'en_curso': en_curso}
+        tmp_path = None
+        try:
+            self.estado_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.estado_path.parent,
+                                             prefix=f".{self.estado_path.name}.", suffix='.tmp',
+                                             delete=False) as f:
+                tmp_path = f.name
+                json.dump(estado, f, ensure_ascii=False)
+            os.replace(tmp_path, self.estado_path)
+            tmp_path = None
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el estado del recorrido: {e}")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _sin_cambios(self, carpeta: str, update_time: Optional[str]) -> bool:
+        # Una carpeta se omite si su updateTime coincide con el del último
+        # listado completo y ese listado no es demasiado antiguo
+        if self.completo or not update_time:
+            return False
+        previo = self._previo.get(carpeta)
+        if not previo or previo.get('update_time') != update_time:
+            return False
+        try:
+            listada = datetime.fromisoformat(previo['listada'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return datetime.now() - listada < timedelta(days=self.max_dias)
+
+    def confirmar(self) -> None:
+        """
+        Marca el recorrido como exitoso: guarda el `updateTime` de las carpetas
+        listadas y descarta el checkpoint. Llamar solo cuando los assets
+        entregados ya fueron procesados.
+        """
+        for carpeta, cuando in self._listadas.items():
+            self._previo[carpeta] = {'update_time': self._update_times.get(carpeta), 'listada': cuando}
+        # Una carpeta con errores invalida a sus ancestros: su subárbol no quedó completo
+        for fallida, _ in self.errores:
+            for carpeta in [c for c in self._previo if fallida == c or fallida.startswith(c + '/')]:
+                del self._previo[carpeta]
+        self._guardar_estado(None)
+
+    # --- Recorrido -------------------------------------------------------------
+
+    def recorrer(self, raices: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre las carpetas raíz y entrega cada asset IMAGE_COLLECTION encontrado.
+
+        Si hay un checkpoint de un recorrido interrumpido con las mismas raíces,
+        primero vuelve a entregar los assets que ya había encontrado y luego
+        continúa con la cola pendiente.
+
+        Args:
+            raices: Nombres completos de las carpetas de inicio
+
+        Yields:
+            Dict del asset tal como lo devuelve listAssets
+        """
+        estado = self._cargar_estado()
+        self._previo = estado.get('carpetas') or {}
+        en_curso_previo = estado.get('en_curso')
+
+        pendientes: Deque[Tuple[str, Optional[str]]] = deque()
+        visitadas = set()
+        encontradas: List[Dict[str, Any]] = []
+
+        if (not self.completo and en_curso_previo
+                and sorted(en_curso_previo.get('raices', [])) == sorted(raices)):
+            self.reanudado = True
+            pendientes.extend((c, t) for c, t in en_curso_previo.get('pendientes', []))
+            visitadas.update(en_curso_previo.get('visitadas', []))
+            self._update_times.update(en_curso_previo.get('update_times', {}))
+            self._listadas.update(en_curso_previo.get('listadas', {}))
+            encontradas.extend(en_curso_previo.get('encontradas', []))
+            logger.info(f"Reanudando recorrido: {len(pendientes)} páginas pendientes, "
+                        f"{len(encontradas)} assets ya encontrados")
+            yield from list(encontradas)
+        else:
+            for raiz in raices:
+                if raiz not in visitadas:
+                    visitadas.add(raiz)
+                    pendientes.append((raiz, None))
+
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='gee-crawl')
+        en_curso: Dict[Any, Tuple[str, Optional[str]]] = {}
+
+        def checkpoint() -> None:
+            self._guardar_estado({
+                'raices': list(raices),
+                'pendientes': list(en_curso.values()) + list(pendientes),
+                'visitadas': sorted(visitadas),
+                'update_times': self._update_times,
+                'listadas': self._listadas,
+                'encontradas': encontradas,
+            })
+
+        completado = False
+        try:
+            while pendientes or en_curso:
+                while pendientes and len(en_curso) < self.workers:
+                    carpeta, token = pendientes.popleft()
+                    futuro = pool.submit(listar_pagina, carpeta, token, self.tamano_pagina)
+                    en_curso[futuro] = (carpeta, token)
+
+                hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    carpeta, _token = en_curso.pop(futuro)
+                    try:
+                        assets, siguiente = futuro.result()
+                    except Exception as e:
+                        logger.warning(f"No se pudo listar {carpeta}: {e}")
+                        self.errores.append((carpeta, str(e)))
+                        continue
+
+                    self.paginas += 1
+                    if siguiente:
+                        pendientes.append((carpeta, siguiente))
+                    else:
+                        self._listadas[carpeta] = datetime.now().isoformat()
+
+                    nuevos = []
+                    for asset in assets:
+                        tipo = asset.get('type')
+                        if tipo == 'FOLDER':
+                            sub = nombre_asset(asset)
+                            if sub in visitadas:
+                                continue
+                            visitadas.add(sub)
+                            self._update_times[sub] = asset.get('updateTime')
+                            if self._sin_cambios(sub, asset.get('updateTime')):
+                                self.omitidas += 1
+                            else:
+                                pendientes.append((sub, None))
+                        elif tipo == 'IMAGE_COLLECTION':
+                            nuevos.append(asset)
+
+                    encontradas.extend(nuevos)
+                    if self.paginas % self.checkpoint_cada == 0:
+                        checkpoint()
+                    yield from nuevos
+            completado = True
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            # Interrumpido o terminado: el checkpoint se descarta recién en `confirmar`
+            checkpoint()
+            if not completado and self.estado_path:
+                logger.info(f"Recorrido interrumpido; checkpoint guardado en {self.estado_path}")
@@ -0,0 +1,287 @@
+"""
+Sondeo y enriquecimiento de colecciones por lotes.
+
+En lugar de dos `getInfo()` por colección (tamaño y primera imagen), arma un
+único `ee.Dictionary` con el sondeo de muchas colecciones y lo evalúa en una
+sola petición por lote. Si el lote falla (ej: una colección inaccesible), se
+parte en mitades hasta aislar a las colecciones con error.
+
+`EnriquecimientoImagenes` aplica la misma estrategia para obtener bandas,
+tipos de dato y escala nominal de una imagen reciente, incluidas las
+colecciones masivas que el sondeo omite.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import ee
+
+logger = logging.getLogger(__name__)
+
+# Colecciones que no se sondean: son tan grandes que incluso filtradas causan timeouts
+PREFIJOS_MASIVOS = ('LANDSAT/', 'COPERNICUS/', 'MODIS/')
+
+
+def requiere_sondeo(collection_id: str) -> bool:
+    return not any(x in collection_id for x in PREFIJOS_MASIVOS)
+
+
+class SondeoColecciones:
+    """
+    Sondeo de bandas, propiedades de la primera imagen y conteo de imágenes en
+    una ventana temporal, para varias colecciones por petición.
+    """
+
+    def __init__(self, tamano_lote: int = 25, fecha_inicio: str = '2024-01-01',
+                 fecha_fin: str = '2024-01-31', max_conteo: int = 1000):
+        """
+        Args:
+            tamano_lote: Colecciones por petición
+            fecha_inicio: Inicio de la ventana donde se busca la primera imagen
+            fecha_fin: Fin de la ventana
+            max_conteo: Tope del conteo de imágenes en la ventana (evita
+                acumular demasiados elementos en el servidor)
+        """
+        self.tamano_lote = max(1, tamano_lote)
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.max_conteo = max_conteo
+        self.peticiones = 0
+        self.errores: Dict[str, str] = {}
+        # Los lotes pueden evaluarse desde varios hilos
+        self._lock = threading.Lock()
+
+    def lotes(self, ids: List[str]) -> List[List[str]]:
+        return [ids[i:i + self.tamano_lote] for i in range(0, len(ids), self.tamano_lote)]
+
+    def _expresion(self, collection_id: str) -> ee.Dictionary:
+        ventana = ee.ImageCollection(collection_id).filterDate(self.fecha_inicio, self.fecha_fin)
+        n = ventana.limit(self.max_conteo).size()
+        primera = ee.Image(ventana.first())
+        hay = n.gt(0)
+        return ee.Dictionary({
+            'n_imagenes': n,
+            'bandas': ee.Algorithms.If(hay, primera.bandNames(), ee.List([])),
+            'propiedades': ee.Algorithms.If(hay, primera.toDictionary(), ee.Dictionary({})),
+        })
+
+    def sondear_lote(self, ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Sondea un lote en una petición; si falla, lo divide para aislar errores.
+
+        Returns:
+            collection_id -> {'n_imagenes', 'bandas', 'propiedades'} o None si falló
+        """
+        if not ids:
+            return {}
+        with self._lock:
+            self.peticiones += 1
+        try:
+            info = ee.Dictionary({cid: self._expresion(cid) for cid in ids}).getInfo() or {}
+            return {cid: info.get(cid) for cid in ids}
+        except Exception as e:
+            if len(ids) == 1:
+                logger.warning(f"Sondeo fallido para {ids[0]}: {e}")
+                with self._lock:
+                    self.errores[ids[0]] = str(e)
+                return {ids[0]: None}
+            mitad = len(ids) // 2
+            resultado = self.sondear_lote(ids[:mitad])
+            resultado.update(self.sondear_lote(ids[mitad:]))
+            return resultado
+
+    def sondear(self, ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Sondea todas las colecciones, lote por lote.
+        """
+        resultado: Dict[str, Optional[Dict[str, Any]]] = {}
+        for lote in self.lotes(ids):
+            resultado.update(self.sondear_lote(lote))
+        return resultado
+
+
+@contextmanager
+def plazo_api(segundos: float) -> Iterator[None]:
+    """
+    Límite de tiempo para cada petición a la API dentro del bloque
+    (`ee.data.setDeadline`). Al salir se restaura el límite que había antes.
+
+    El límite es global del módulo `ee` (la API no admite uno por petición):
+    mientras dura el bloque también rige para las peticiones de otros hilos.
+    Usarlo solo donde esas peticiones toleran el mismo plazo (ej: `--enrich`,
+    que no corre junto a otras consultas) y no abrir bloques simultáneos desde
+    varios hilos, porque cada uno restauraría el límite del otro.
+    """
+    # ee.data no expone un getter: el valor vigente vive en el estado del módulo
+    try:
+        anterior = ee.data._get_state().deadline_ms or 0
+    except AttributeError:
+        anterior = 0
+    ee.data.setDeadline(int(segundos * 1000))
+    try:
+        yield
+    finally:
+        ee.data.setDeadline(anterior)
+
+
+# Rangos (min, max) de los tipos enteros de Earth Engine
+_TIPOS_ENTEROS = {
+    (0, 255): 'uint8', (-128, 127): 'int8',
+    (0, 65535): 'uint16', (-32768, 32767): 'int16',
+    (0, 4294967295): 'uint32', (-2147483648, 2147483647): 'int32',
+}
+
+
+def tipo_pixel(pixel_type: Dict[str, Any]) -> str:
+    """
+    Nombre corto de un PixelType de `bandTypes()`
+    (ej: {'precision': 'int', 'min': 0, 'max': 65535} -> 'uint16').
+    """
+    precision = pixel_type.get('precision')
+    if precision == 'float':
+        return 'float32'
+    if precision == 'double':
+        return 'float64'
+    rango = (pixel_type.get('min'), pixel_type.get('max'))
+    return _TIPOS_ENTEROS.get(rango, f"int[{rango[0]}, {rango[1]}]")
+
+
+def formatear_escala(metros: float) -> str:
+    """
+    Escala nominal como texto de `resolucion` (ej: 10.0 -> '10m', 27829.9 -> '27.8km').
+    """
+    if metros >= 1000:
+        return f"{metros / 1000:.3g}km"
+    return f"{metros:.3g}m" if metros < 10 else f"{round(metros)}m"
+
+
+class ImagenObjetivo(NamedTuple):
+    collection_id: str
+    tipo: str                 # 'IMAGE' o 'IMAGE_COLLECTION' (de getAsset)
+    fin: Optional[str]        # `endTime` del asset (None = vigente)
+
+
+class EnriquecimientoImagenes:
+    """
+    Bandas, tipos de dato y escala nominal de una imagen reciente por
+    colección, varias colecciones por petición.
+
+    La imagen se busca en una ventana corta que termina en el `endTime` del
+    asset (o hoy): `filterDate` sobre una ventana de días es barato incluso en
+    Landsat o Sentinel-2, a diferencia de ordenar o contar la colección. Las
+    colecciones sin imágenes en la primera ventana se reintentan con las
+    siguientes, más amplias.
+    """
+
+    def __init__(self, tamano_lote: int = 10, ventanas_dias: Sequence[int] = (30, 400),
+                 timeout: float = 120.0):
+        """
+        Args:
+            tamano_lote: Colecciones por petición
+            ventanas_dias: Ventanas (días hacia atrás desde el fin) a probar en orden
+            timeout: Segundos máximos por petición (`plazo_api`; rige para
+                todo el proceso mientras dura `enriquecer`)
+        """
+        self.tamano_lote = max(1, tamano_lote)
+        self.ventanas_dias = tuple(ventanas_dias)
+        self.timeout = timeout
+        self.peticiones = 0
+        self.errores: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def lotes(self, objetivos: List[ImagenObjetivo]) -> List[List[ImagenObjetivo]]:
+        return [objetivos[i:i + self.tamano_lote] for i in range(0, len(objetivos), self.tamano_lote)]
+
+    @staticmethod
+    def _expresion(objetivo: ImagenObjetivo, dias: int, hoy: str) -> ee.ComputedObject:
+        if objetivo.tipo == 'IMAGE':
+            imagen = ee.Image(objetivo.collection_id)
+            hay = ee.Number(1)
+        else:
+            # Sin `endTime` (colección vigente) la ventana termina hoy, fecha que se fija en el cliente
+            fin = ee.Date(objetivo.fin or hoy)
+            ventana = ee.ImageCollection(objetivo.collection_id) \
+                .filterDate(fin.advance(-dias, 'day'), fin.advance(1, 'day'))
+            imagen = ee.Image(ventana.first())
+            hay = ventana.limit(1).size()
+        bandas = imagen.bandNames()
+        return ee.Algorithms.If(hay.gt(0), ee.Dictionary({
+            'bandas': bandas,
+            'tipos': imagen.bandTypes(),
+            'escalas': bandas.map(lambda b: imagen.select([ee.String(b)]).projection().nominalScale()),
+        }), None)
+
+    @staticmethod
+    def resumir(info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Campos del catálogo a partir de la respuesta cruda de una colección.
+        """
+        bandas = list(info.get('bandas') or [])
+        tipos = info.get('tipos') or {}
+        escalas = [float(e) for e in info.get('escalas') or [] if e]
+        escala = min(escalas) if escalas else None
+        return {
+            'bandas': bandas,
+            'tipos_datos': {b: tipo_pixel(tipos.get(b) or {}) for b in bandas},
+            'escala_nominal': round(escala, 3) if escala else None,
+            'resolucion': formatear_escala(escala) if escala else 'No especificado',
+        }
+
+    def enriquecer_lote(self, objetivos: List[ImagenObjetivo],
+                        dias: Optional[int] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Evalúa un lote en una petición; si falla (o vence el plazo), lo divide
+        para aislar a las colecciones con error.
+
+        Returns:
+            collection_id -> campos de `resumir`, o None si no hubo imagen o falló
+        """
+        if not objetivos:
+            return {}
+        dias = self.ventanas_dias[0] if dias is None else dias
+        hoy = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        with self._lock:
+            self.peticiones += 1
+        try:
+            info = ee.Dictionary({o.collection_id: self._expresion(o, dias, hoy)
+                                  for o in objetivos}).getInfo() or {}
+            return {o.collection_id: self.resumir(info[o.collection_id]) if info.get(o.collection_id) else None
+                    for o in objetivos}
+        except Exception as e:
+            if len(objetivos) == 1:
+                logger.warning(f"Enriquecimiento fallido para {objetivos[0].collection_id}: {e}")
+                with self._lock:
+                    self.errores[objetivos[0].collection_id] = str(e)
+                return {objetivos[0].collection_id: None}
+            mitad = len(objetivos) // 2
+            resultado = self.enriquecer_lote(objetivos[:mitad], dias)
+            resultado.update(self.enriquecer_lote(objetivos[mitad:], dias))
+            return resultado
+
+    def enriquecer(self, objetivos: List[ImagenObjetivo], workers: int = 1,
+                   timeout: Optional[float] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Enriquece todas las colecciones, ventana por ventana.
+
+        Args:
+            objetivos: Colecciones a enriquecer
+            workers: Lotes evaluados en paralelo
+            timeout: Segundos máximos por petición en esta llamada (None = `self.timeout`)
+        """
+        resultado: Dict[str, Optional[Dict[str, Any]]] = {}
+        pendientes = list(objetivos)
+        with plazo_api(self.timeout if timeout is None else timeout):
+            with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='gee-enriq') as pool:
+                for dias in self.ventanas_dias:
+                    for parcial in pool.map(lambda lote: self.enriquecer_lote(lote, dias), self.lotes(pendientes)):
+                        resultado.update(parcial)
+                    pendientes = [o for o in pendientes
+                                  if resultado.get(o.collection_id) is None and o.collection_id not in self.errores
+                                  and o.tipo != 'IMAGE']
+                    if not pendientes:
+                        break
+        return resultado
@@ -6,7 +6,10 @@ import sys
 import ee
 import geopandas as gpd
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
+
+# Propiedad con el identificador de cada feature cuando no se elige un atributo
+CAMPO_ID_DEFECTO = 'feature_id'
 
 def cargar_geojson(ruta_geojson: Path) -> Tuple[ee.Geometry, gpd.GeoDataFrame]:
     """
@@ -27,6 +30,10 @@ def cargar_geojson(ruta_geojson: Path) -> Tuple[ee.Geometry, gpd.GeoDataFrame]:
         if len(gdf) == 0:
             raise ValueError("El GeoJSON no contiene features")
         
+        if len(gdf) > 1:
+            print(f"[WARN] El GeoJSON tiene {len(gdf)} features; se usa solo la primera "
+                  f"(para analizarlas todas ver `cargar_features_geojson`)")
+        
         geom_geojson = gdf.geometry.iloc[0].__geo_interface__
         ee_geometry = ee.Geometry(geom_geojson)
         
@@ -37,3 +44,59 @@ def cargar_geojson(ruta_geojson: Path) -> Tuple[ee.Geometry, gpd.GeoDataFrame]:
         # En un contexto de librería idealmente haríamos raise, 
         # pero mantenemos el comportamiento del script original por ahora.
         sys.exit(1)
+
+
+def features_ee(gdf: gpd.GeoDataFrame, campo_id: Optional[str] = None) -> ee.FeatureCollection:
+    """
+    Convierte todas las features de un GeoDataFrame en una `ee.FeatureCollection`.
+    
+    Cada feature lleva solo su geometría y el identificador (el resto de los
+    atributos no se envía, para no agrandar la petición).
+    
+    Args:
+        gdf: GeoDataFrame (se reproyecta a EPSG:4326 si tiene otro CRS)
+        campo_id: Atributo que identifica cada feature (None = índice de fila,
+            en la propiedad `CAMPO_ID_DEFECTO`)
+        
+    Raises:
+        ValueError: Si el GeoDataFrame está vacío o no tiene el atributo `campo_id`
+    """
+    if len(gdf) == 0:
+        raise ValueError("El GeoJSON no contiene features")
+    if campo_id is not None and campo_id not in gdf.columns:
+        raise ValueError(f"El atributo '{campo_id}' no existe (disponibles: {', '.join(map(str, gdf.columns))})")
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    
+    if campo_id is None:
+        nombre, valores = CAMPO_ID_DEFECTO, list(range(len(gdf)))
+    else:
+        nombre, valores = campo_id, gdf[campo_id].tolist()
+        duplicados = len(valores) - len(set(map(str, valores)))
+        if duplicados:
+            print(f"[WARN] '{campo_id}' tiene {duplicados} valores repetidos; las filas de la tabla no serán únicas")
+    
+    vacias = 0
+    features = []
+    for valor, geometria in zip(valores, gdf.geometry):
+        if geometria is None or geometria.is_empty:
+            vacias += 1
+            continue
+        if not isinstance(valor, (int, float, str)):
+            valor = str(valor)  # ej: fechas o tipos numpy
+        features.append(ee.Feature(ee.Geometry(geometria.__geo_interface__), {nombre: valor}))
+    if vacias:
+        print(f"[WARN] {vacias} features sin geometría fueron omitidas")
+    return ee.FeatureCollection(features)
+
+
+def cargar_features_geojson(ruta_geojson: Path,
+                            campo_id: Optional[str] = None) -> Tuple[ee.FeatureCollection, gpd.GeoDataFrame]:
+    """
+    Carga todas las features de un GeoJSON como `ee.FeatureCollection` (ver `features_ee`).
+    
+    Returns:
+        Tuple[ee.FeatureCollection, gpd.GeoDataFrame]: Features de EE y el GeoDataFrame original.
+    """
+    gdf = gpd.read_file(ruta_geojson)
+    return features_ee(gdf, campo_id), gdf
@@ -0,0 +1,224 @@
+"""
+Registro compacto de colección.
+
+Cada entrada del catálogo era un dict libre: con cientos de miles de entradas el
+costo fijo de un dict por registro y las cadenas repetidas (`nivel`,
+`resolucion`, nombres de bandas) dominan la memoria. `RegistroColeccion`
+guarda los campos conocidos en `__slots__`, interna las cadenas repetidas y
+comparte las tuplas de bandas idénticas entre registros. Los campos fuera del
+esquema van a un dict auxiliar que solo existe si hace falta.
+
+Se comporta como un `MutableMapping` (`reg['nivel']`, `reg.get(...)`,
+`reg.update(...)`), así que el código que trata los registros como dict
+no cambia. Para escribir JSON: `catalogo_plano` para el catálogo completo o
+`a_json` como `default=` de `json.dumps`.
+"""
+
+import gc
+import operator
+import sys
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Orden de los campos en el JSON escrito (los extra van después, en orden de inserción)
+CAMPOS: Tuple[str, ...] = (
+    'nombre', 'bandas_principales', 'tipo', 'auto_agregada', 'last_verified', 'nivel',
+    'resolucion', 'temporal', 'frecuencia', 'qa', 'update_time', 'huella',
+    'tipos_datos', 'escala_nominal', 'enriquecida',
+)
+_CAMPOS = frozenset(CAMPOS)
+
+# Campos cuyos valores se repiten entre colecciones y conviene internar
+CAMPOS_REPETIDOS = frozenset({
+    'tipo', 'nivel', 'resolucion', 'temporal', 'frecuencia', 'sensor_type', 'temporal_resolution',
+})
+
+# Tuplas de cadenas compartidas entre registros (ej: las mismas bandas en varios productos)
+_TUPLAS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Marca de campo sin valor: `...` no puede venir de un JSON y se serializa con pickle sin clases propias
+_AUSENTE = ...
+_LEER_CAMPOS = operator.attrgetter(*CAMPOS)
+
+
+def _compactar(campo: str, valor: Any) -> Any:
+    if isinstance(valor, str):
+        return sys.intern(valor) if campo in CAMPOS_REPETIDOS else valor
+    if isinstance(valor, (list, tuple)):
+        tupla = tuple(valor)
+        try:
+            compartida = _TUPLAS.get(tupla)
+        except TypeError:  # elementos no hashables (ej: dicts)
+            return valor
+        if compartida is not None:
+            return compartida
+        if all(isinstance(x, str) for x in tupla):
+            tupla = tuple(sys.intern(x) for x in tupla)
+            return _TUPLAS.setdefault(tupla, tupla)
+    return valor
+
+
+class RegistroColeccion(MutableMapping):
+    """
+    Registro de una colección con acceso tipo dict.
+
+    Un campo conocido con valor `_AUSENTE` es una clave ausente (`'qa' in reg`
+    es False). Las listas de cadenas se guardan como tuplas compartidas;
+    `a_dict()` y el JSON las devuelven como listas.
+    """
+
+    __slots__ = CAMPOS + ('_extra',)
+
+    def __init__(self, datos: Optional[Mapping] = None, **kwargs: Any):
+        for campo in CAMPOS:
+            setattr(self, campo, _AUSENTE)
+        self._extra: Optional[Dict[str, Any]] = None
+        if datos is not None:
+            for clave, valor in datos.items():
+                valor = _compactar(clave, valor)
+                if clave in _CAMPOS:
+                    setattr(self, clave, valor)
+                else:
+                    self[clave] = valor
+        for clave, valor in kwargs.items():
+            self[clave] = valor
+
+    def __getitem__(self, clave: str) -> Any:
+        if clave in _CAMPOS:
+            valor = getattr(self, clave)
+            if valor is _AUSENTE:
+                raise KeyError(clave)
+            return valor
+        if self._extra is None:
+            raise KeyError(clave)
+        return self._extra[clave]
+
+    def __setitem__(self, clave: str, valor: Any) -> None:
+        valor = _compactar(clave, valor)
+        if clave in _CAMPOS:
+            setattr(self, clave, valor)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[clave] = valor
+
+    def __delitem__(self, clave: str) -> None:
+        if clave in _CAMPOS:
+            if getattr(self, clave) is _AUSENTE:
+                raise KeyError(clave)
+            setattr(self, clave, _AUSENTE)
+            return
+        if self._extra is None:
+            raise KeyError(clave)
+        del self._extra[clave]
+        if not self._extra:
+            self._extra = None
+
+    def __iter__(self) -> Iterator[str]:
+        for campo, valor in zip(CAMPOS, _LEER_CAMPOS(self)):
+            if valor is not _AUSENTE:
+                yield campo
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        presentes = sum(1 for valor in _LEER_CAMPOS(self) if valor is not _AUSENTE)
+        return presentes + (len(self._extra) if self._extra is not None else 0)
+
+    def get(self, clave: str, defecto: Any = None) -> Any:
+        if clave in _CAMPOS:
+            valor = getattr(self, clave)
+            return defecto if valor is _AUSENTE else valor
+        return defecto if self._extra is None else self._extra.get(clave, defecto)
+
+    def __contains__(self, clave: object) -> bool:
+        if clave in _CAMPOS:
+            return getattr(self, clave) is not _AUSENTE
+        return self._extra is not None and clave in self._extra
+
+    def __eq__(self, otro: object) -> bool:
+        if isinstance(otro, RegistroColeccion):
+            otro = otro.a_dict()
+        if not isinstance(otro, Mapping):
+            return NotImplemented
+        return self.a_dict() == dict(otro)
+
+    __hash__ = None  # mutable, como dict
+
+    # Estado compacto para pickle (snapshot): una tupla en lugar de un dict por registro
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return _LEER_CAMPOS(self) + (self._extra,)
+
+    def __setstate__(self, estado: Tuple[Any, ...]) -> None:
+        for campo, valor in zip(self.__slots__, estado):
+            setattr(self, campo, valor)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.a_dict()!r})"
+
+    def a_dict(self) -> Dict[str, Any]:
+        """
+        Copia como dict plano (tuplas de cadenas como listas, igual que en el JSON).
+        """
+        datos = {campo: list(valor) if valor.__class__ is tuple else valor
+                 for campo, valor in zip(CAMPOS, _LEER_CAMPOS(self)) if valor is not _AUSENTE}
+        if self._extra is not None:
+            for clave, valor in self._extra.items():
+                datos[clave] = list(valor) if valor.__class__ is tuple else valor
+        return datos
+
+
+def a_json(objeto: Any) -> Any:
+    """
+    Hook `default=` de `json.dumps` para catálogos con registros compactos.
+    """
+    if isinstance(objeto, RegistroColeccion):
+        return objeto.a_dict()
+    raise TypeError(f"Object of type {objeto.__class__.__name__} is not JSON serializable")
+
+
+def catalogo_plano(catalogo: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copia superficial del catálogo con los registros como dicts planos, lista
+    para `json.dumps` (más rápido que resolver cada registro vía `default=`).
+    """
+    plano: Dict[str, Any] = {}
+    # Sin GC mientras se crean los dicts temporales (no forman ciclos)
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for cat_id, cat_info in catalogo.items():
+            if cat_id.startswith('_') or not isinstance(cat_info, dict) or 'colecciones' not in cat_info:
+                plano[cat_id] = cat_info
+                continue
+            plano[cat_id] = {**cat_info, 'colecciones': {
+                cid: r.a_dict() if isinstance(r, RegistroColeccion) else r
+                for cid, r in cat_info['colecciones'].items()}}
+    finally:
+        if gc_activo:
+            gc.enable()
+    return plano
+
+
+def compactar_catalogo(catalogo: Dict[str, Any]) -> int:
+    """
+    Reemplaza en el lugar los registros dict del catálogo por `RegistroColeccion`.
+
+    Returns:
+        Número de registros convertidos
+    """
+    convertidos = 0
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for cat_id, cat_info in catalogo.items():
+            if cat_id.startswith('_') or not isinstance(cat_info, dict): continue
+            registros = cat_info.get('colecciones', {})
+            for cid, registro in registros.items():
+                if not isinstance(registro, RegistroColeccion):
+                    registros[cid] = RegistroColeccion(registro)
+                    convertidos += 1
+    finally:
+        if gc_activo:
+            gc.enable()
+    return convertidos
@@ -0,0 +1,653 @@
+"""
+Índices en memoria para búsquedas sobre el catálogo de colecciones.
+
+Se construyen una vez al cargar `CatalogoGEE` y se mantienen sincronizados
+con cada mutación del catálogo, de modo que las consultas interactivas no
+recorren todas las colecciones: texto (`IndiceTexto`), vencimiento de la
+verificación (`ColaExpiracion`), cobertura temporal (`IndiceTemporal`),
+jerarquía de IDs (`ArbolPrefijos`) y búsqueda aproximada (`IndiceTrigramas`).
+"""
+
+import calendar
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+_RE_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Pasa a minúsculas y elimina tildes (ej: 'Ñuñoa' -> 'nunoa').
+    """
+    texto = str(texto).lower()
+    if texto.isascii():
+        return texto
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> List[str]:
+    """
+    Divide un texto en tokens alfanuméricos normalizados.
+    'COPERNICUS/S2_SR_HARMONIZED' -> ['copernicus', 's2', 'sr', 'harmonized']
+    """
+    return _RE_TOKEN.findall(normalizar_texto(texto))
+
+
+class IndiceTexto:
+    """
+    Índice invertido de tokens sobre ID, nombre y descripción de cada colección.
+
+    Cada token apunta a las colecciones que lo contienen con el peso del campo
+    más relevante donde aparece. Las consultas exigen que todos los tokens
+    coincidan (exacto o por prefijo) y ordenan por la suma de pesos.
+    """
+
+    PESO_ID = 3.0
+    PESO_NOMBRE = 2.0
+    PESO_DESCRIPCION = 1.0
+    # Factor aplicado cuando el token solo coincide por prefijo
+    FACTOR_PREFIJO = 0.6
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._tokens_por_id: Dict[str, Set[str]] = {}
+        self._vocabulario: List[str] = []  # ordenado, para búsquedas por prefijo
+
+    def __len__(self) -> int:
+        return len(self._tokens_por_id)
+
+    def agregar(self, collection_id: str, registro: Mapping[str, Any]) -> None:
+        """
+        Indexa (o re-indexa) una colección.
+        """
+        self.eliminar(collection_id)
+
+        pesos: Dict[str, float] = {}
+        campos = [
+            (collection_id, self.PESO_ID),
+            (registro.get('nombre', ''), self.PESO_NOMBRE),
+            (registro.get('descripcion', ''), self.PESO_DESCRIPCION),
+            (registro.get('sensor_type', ''), self.PESO_DESCRIPCION),
+            (' '.join(registro.get('aplicaciones', []) or []), self.PESO_DESCRIPCION),
+        ]
+        for texto, peso in campos:
+            for token in tokenizar(texto or ''):
+                if pesos.get(token, 0.0) < peso:
+                    pesos[token] = peso
+
+        for token, peso in pesos.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                insort(self._vocabulario, token)
+            posting[collection_id] = peso
+        self._tokens_por_id[collection_id] = set(pesos)
+
+    def eliminar(self, collection_id: str) -> None:
+        """
+        Quita una colección del índice (no hace nada si no estaba).
+        """
+        tokens = self._tokens_por_id.pop(collection_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            posting = self._postings[token]
+            posting.pop(collection_id, None)
+            if not posting:
+                del self._postings[token]
+                i = bisect_left(self._vocabulario, token)
+                if i < len(self._vocabulario) and self._vocabulario[i] == token:
+                    del self._vocabulario[i]
+
+    def _coincidencias(self, token_consulta: str) -> Dict[str, float]:
+        """
+        Puntaje por colección para un token de la consulta (exacto o prefijo).
+        """
+        puntajes: Dict[str, float] = {}
+        i = bisect_left(self._vocabulario, token_consulta)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(token_consulta):
+            token = self._vocabulario[i]
+            factor = 1.0 if token == token_consulta else self.FACTOR_PREFIJO
+            for cid, peso in self._postings[token].items():
+                valor = peso * factor
+                if puntajes.get(cid, 0.0) < valor:
+                    puntajes[cid] = valor
+            i += 1
+        return puntajes
+
+    def buscar(self, consulta: str, limite: int = 20) -> List[Tuple[str, float]]:
+        """
+        Busca colecciones que contengan todos los tokens de la consulta.
+
+        Args:
+            consulta: Texto libre (ej: 'sentinel 2 sr')
+            limite: Máximo de resultados
+
+        Returns:
+            Lista de (collection_id, puntaje) ordenada de mayor a menor puntaje
+        """
+        tokens = list(dict.fromkeys(tokenizar(consulta)))
+        if not tokens:
+            return []
+
+        por_token = sorted((self._coincidencias(t) for t in tokens), key=len)
+        if not por_token[0]:
+            return []
+
+        resultado = dict(por_token[0])
+        for puntajes in por_token[1:]:
+            resultado = {cid: s + puntajes[cid] for cid, s in resultado.items() if cid in puntajes}
+            if not resultado:
+                return []
+
+        # A igual puntaje, primero los IDs más cortos (más específicos)
+        ranking = sorted(resultado.items(),
+                         key=lambda x: (-x[1], len(self._tokens_por_id[x[0]]), x[0]))
+        return ranking[:limite] if limite else ranking
+
+
+class ColaExpiracion:
+    """
+    Montículo (heap) de colecciones ordenado por `last_verified`: arriba la
+    más desactualizada.
+
+    Cada fecha ISO se convierte a timestamp una sola vez, al indexar. Una
+    actualización agrega una entrada nueva y la anterior se descarta cuando
+    llega al tope (borrado perezoso).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, str]] = []
+        self._vigente: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._vigente)
+
+    @staticmethod
+    def _timestamp(last_verified: Any) -> float:
+        # Sin verificar (o fecha ilegible) = lo más antiguo posible
+        if not last_verified:
+            return float('-inf')
+        try:
+            return datetime.fromisoformat(str(last_verified)).timestamp()
+        except ValueError:
+            return float('-inf')
+
+    def actualizar(self, collection_id: str, last_verified: Any) -> None:
+        """
+        Indexa (o re-indexa) una colección con su fecha de última verificación.
+        """
+        self.posponer(collection_id, self._timestamp(last_verified))
+
+    def posponer(self, collection_id: str, timestamp: float) -> None:
+        """
+        Fija el timestamp de una colección (solo en memoria), ej. para no
+        reintentar en cada ciclo una colección cuya verificación falló.
+        """
+        if self._vigente.get(collection_id) == timestamp and collection_id in self._vigente:
+            return
+        self._vigente[collection_id] = timestamp
+        heapq.heappush(self._heap, (timestamp, collection_id))
+        # Compactar si las entradas descartadas dominan el heap
+        if len(self._heap) > 2 * len(self._vigente) + 64:
+            self._heap = [(ts, cid) for cid, ts in self._vigente.items()]
+            heapq.heapify(self._heap)
+
+    def eliminar(self, collection_id: str) -> None:
+        self._vigente.pop(collection_id, None)
+
+    def mas_antiguas(self, umbral: float, limite: Optional[int] = None) -> List[str]:
+        """
+        Colecciones verificadas antes de `umbral`, de la más antigua a la más
+        reciente. No las quita de la cola.
+
+        Args:
+            umbral: Timestamp (segundos epoch) de corte
+            limite: Máximo de IDs a devolver (None = todos)
+        """
+        resultado: List[str] = []
+        extraidas: List[Tuple[float, str]] = []
+        vistas: Set[str] = set()
+        while self._heap and (limite is None or len(resultado) < limite):
+            ts, cid = self._heap[0]
+            if self._vigente.get(cid) != ts or cid in vistas:
+                heapq.heappop(self._heap)
+                continue
+            if ts >= umbral:
+                break
+            extraidas.append(heapq.heappop(self._heap))
+            vistas.add(cid)
+            resultado.append(cid)
+        for entrada in extraidas:
+            heapq.heappush(self._heap, entrada)
+        return resultado
+
+
+# --- Cobertura temporal -------------------------------------------------------
+
+_RE_EPOCH_MS = re.compile(r'^\s*\[\s*(-?\d+)\s*,\s*(-?\d+)\s*\]\s*$')
+_RE_FECHA = re.compile(r'(?<!\d)(\d{4})(?:-(\d{2})(?!\d))?(?:-(\d{2})(?!\d))?')
+_PALABRAS_VIGENTE = ('presente', 'present', 'actualidad')
+
+# Un fin de período tan cercano a la fecha en que se registró indica que la
+# colección seguía recibiendo imágenes (los productos mensuales o anuales
+# publican con meses de retraso)
+MARGEN_VIGENTE_DIAS = 180
+
+Periodo = Tuple[date, Optional[date]]
+
+# Fin usado en el IntervalIndex para las colecciones vigentes
+_SIN_FIN = date(2200, 12, 31)
+_ORDINAL_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _parsear_fecha(texto: Any, es_fin: bool = False) -> Optional[date]:
+    """
+    Primera fecha de un texto ('2017', '2017-03' o '2017-03-18'). Con
+    `es_fin`, las fechas incompletas se completan al último día del año o mes.
+    """
+    m = _RE_FECHA.search(str(texto or ''))
+    if not m:
+        return None
+    anio, mes, dia = int(m.group(1)), m.group(2), m.group(3)
+    if not 1800 <= anio <= 2200:
+        return None
+    try:
+        if mes is None:
+            return date(anio, 12, 31) if es_fin else date(anio, 1, 1)
+        mes = int(mes)
+        if dia is None:
+            return date(anio, mes, calendar.monthrange(anio, mes)[1] if es_fin else 1)
+        return date(anio, mes, int(dia))
+    except ValueError:
+        return None
+
+
+def _parsear_texto_periodo(texto: Any) -> Tuple[Optional[date], Optional[date], bool]:
+    """
+    (inicio, fin, vigente) de un texto libre de período:
+    '[950832000000, 1647648000000]' (ms epoch), '2017-03 a Presente',
+    '2015-presente', '2000-2020', 'Consultar en GEE' (sin datos).
+    """
+    texto = str(texto or '')
+    m = _RE_EPOCH_MS.match(texto)
+    if m:
+        inicio, fin = (datetime(1970, 1, 1) + timedelta(milliseconds=int(x)) for x in m.groups())
+        return inicio.date(), fin.date(), False
+    fechas = list(_RE_FECHA.finditer(texto))
+    if not fechas:
+        return None, None, False
+    inicio = _parsear_fecha(fechas[0].group(0))
+    fin = _parsear_fecha(fechas[1].group(0), es_fin=True) if len(fechas) > 1 else None
+    return inicio, fin, any(p in texto.lower() for p in _PALABRAS_VIGENTE)
+
+
+def es_rango_epoch(registro: Mapping[str, Any]) -> bool:
+    """
+    True si el período del registro es un rango '[ms, ms]' sin `date_end`
+    (formato del volcado original del catálogo de GEE, sin fecha de registro).
+    """
+    return not registro.get('date_end') and bool(_RE_EPOCH_MS.match(str(registro.get('temporal') or '')))
+
+
+def parsear_periodo(registro: Mapping[str, Any],
+                    margen_vigente_dias: int = MARGEN_VIGENTE_DIAS) -> Optional[Periodo]:
+    """
+    Cobertura temporal estructurada de un registro del catálogo.
+
+    Usa `date_start`/`date_end` si son fechas válidas y si no el texto de
+    `temporal`. Un fin a menos de `margen_vigente_dias` antes de
+    `last_verified` se considera vigente: la colección seguía recibiendo
+    imágenes cuando se verificó.
+
+    Returns:
+        (inicio, fin) con fin None si la colección sigue vigente, o None si
+        el período es desconocido (ej: 'Consultar en GEE')
+    """
+    inicio, fin, vigente = _parsear_texto_periodo(registro.get('temporal'))
+    inicio = _parsear_fecha(registro.get('date_start')) or inicio
+    fin = _parsear_fecha(registro.get('date_end'), es_fin=True) or fin
+    if inicio is None:
+        return None
+    if fin is not None and fin < inicio:
+        fin = None
+    if vigente:
+        fin = None
+    if fin is not None and registro.get('last_verified'):
+        try:
+            verificada = datetime.fromisoformat(str(registro['last_verified'])).date()
+            if fin >= verificada - timedelta(days=margen_vigente_dias):
+                fin = None
+        except ValueError:
+            pass
+    return inicio, fin
+
+
+class IndiceTemporal:
+    """
+    Períodos de cobertura por colección, con consulta de superposición sobre
+    un `pd.IntervalIndex`.
+
+    Los períodos se parsean una vez al indexar. El IntervalIndex se arma al
+    consultar y se descarta cuando cambia alguna colección.
+
+    Los rangos '[ms, ms]' no traen la fecha en que se registraron: se estima
+    como el fin más reciente entre ellos que no esté en el futuro (la fecha del
+    volcado), y los fines a menos de `margen_vigente_dias` de esa fecha se
+    tratan como vigentes.
+    """
+
+    def __init__(self, margen_vigente_dias: int = MARGEN_VIGENTE_DIAS):
+        self.margen_vigente_dias = margen_vigente_dias
+        self._periodos: Dict[str, Periodo] = {}
+        self._epoch: Set[str] = set()
+        self._limite_vigente: Optional[date] = None
+        self._ids: Optional[List[str]] = None
+        self._intervalos: Optional[pd.IntervalIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._periodos)
+
+    def actualizar(self, collection_id: str, registro: Mapping[str, Any]) -> None:
+        """
+        Indexa (o re-indexa) la cobertura de una colección; si no se puede
+        determinar, la colección queda fuera del índice.
+        """
+        periodo = parsear_periodo(registro, self.margen_vigente_dias)
+        if periodo is None:
+            self.eliminar(collection_id)
+            return
+        epoch = es_rango_epoch(registro)
+        if self._periodos.get(collection_id) != periodo or (collection_id in self._epoch) != epoch:
+            self._periodos[collection_id] = periodo
+            if epoch:
+                self._epoch.add(collection_id)
+            else:
+                self._epoch.discard(collection_id)
+            self._invalidar()
+
+    def eliminar(self, collection_id: str) -> None:
+        if self._periodos.pop(collection_id, None) is not None:
+            self._epoch.discard(collection_id)
+            self._invalidar()
+
+    def _invalidar(self) -> None:
+        self._intervalos = None
+        self._limite_vigente = None
+
+    def _limite(self) -> date:
+        # Fines de rangos '[ms, ms]' desde este límite cuentan como vigentes
+        if self._limite_vigente is None:
+            hoy = date.today()
+            fines = [self._periodos[cid][1] for cid in self._epoch]
+            volcado = max((f for f in fines if f is not None and f <= hoy), default=hoy)
+            self._limite_vigente = volcado - timedelta(days=self.margen_vigente_dias)
+        return self._limite_vigente
+
+    def periodo(self, collection_id: str) -> Optional[Periodo]:
+        periodo = self._periodos.get(collection_id)
+        if (periodo is not None and periodo[1] is not None and collection_id in self._epoch
+                and periodo[1] >= self._limite()):
+            return periodo[0], None
+        return periodo
+
+    def _construir(self) -> pd.IntervalIndex:
+        self._ids = list(self._periodos)
+        periodos = [self.periodo(cid) for cid in self._ids]
+        # Días desde 1970 vía ordinales (convertir objetos `date` uno a uno es lento)
+        inicios = np.array([p[0].toordinal() for p in periodos], dtype='int64') - _ORDINAL_EPOCH
+        fines = np.array([(p[1] or _SIN_FIN).toordinal() for p in periodos], dtype='int64') - _ORDINAL_EPOCH
+        return pd.IntervalIndex.from_arrays(inicios.astype('datetime64[D]').astype('datetime64[ns]'),
+                                            fines.astype('datetime64[D]').astype('datetime64[ns]'),
+                                            closed='both')
+
+    def superpuestas(self, inicio: Union[str, date], fin: Union[str, date]) -> List[str]:
+        """
+        Colecciones cuya cobertura se superpone con [inicio, fin] (ambos incluidos).
+        """
+        if self._intervalos is None:
+            self._intervalos = self._construir()
+        if not self._ids:
+            return []
+        consulta = pd.Interval(pd.Timestamp(inicio), pd.Timestamp(fin), closed='both')
+        mascara = self._intervalos.overlaps(consulta)
+        return [cid for cid, ok in zip(self._ids, mascara) if ok]
+
+
+# --- Jerarquía de IDs -----------------------------------------------------------
+
+class _NodoPrefijo:
+    __slots__ = ('hijos', 'total', 'es_coleccion')
+
+    def __init__(self):
+        self.hijos: Dict[str, '_NodoPrefijo'] = {}
+        self.total = 0            # colecciones en el subárbol (incluido el nodo)
+        self.es_coleccion = False
+
+
+class ArbolPrefijos:
+    """
+    Trie de los segmentos de los IDs ('MODIS' -> '061' -> 'MOD13Q1'), con el
+    número de colecciones de cada subárbol precalculado.
+
+    Agregar o quitar una colección y bajar a un prefijo cuestan O(profundidad);
+    listar un nivel solo recorre los hijos de ese nodo.
+    """
+
+    def __init__(self):
+        self._raiz = _NodoPrefijo()
+
+    def __len__(self) -> int:
+        return self._raiz.total
+
+    @staticmethod
+    def _segmentos(ruta: str) -> List[str]:
+        return [s for s in ruta.split('/') if s]
+
+    def _nodo(self, prefijo: str) -> Optional[_NodoPrefijo]:
+        nodo = self._raiz
+        for segmento in self._segmentos(prefijo):
+            nodo = nodo.hijos.get(segmento)
+            if nodo is None:
+                return None
+        return nodo
+
+    def __contains__(self, collection_id: object) -> bool:
+        nodo = self._nodo(str(collection_id))
+        return nodo is not None and nodo.es_coleccion
+
+    def agregar(self, collection_id: str) -> None:
+        """
+        Agrega una colección (no hace nada si ya estaba).
+        """
+        if collection_id in self:
+            return
+        nodo = self._raiz
+        nodo.total += 1
+        for segmento in self._segmentos(collection_id):
+            nodo = nodo.hijos.setdefault(segmento, _NodoPrefijo())
+            nodo.total += 1
+        nodo.es_coleccion = True
+
+    def eliminar(self, collection_id: str) -> None:
+        """
+        Quita una colección y las ramas que queden vacías (no hace nada si no estaba).
+        """
+        if collection_id not in self:
+            return
+        camino = [self._raiz]
+        segmentos = self._segmentos(collection_id)
+        for segmento in segmentos:
+            camino.append(camino[-1].hijos[segmento])
+        camino[-1].es_coleccion = False
+        for nodo in camino:
+            nodo.total -= 1
+        for padre, segmento, nodo in zip(reversed(camino[:-1]), reversed(segmentos), reversed(camino[1:])):
+            if nodo.total:
+                break
+            del padre.hijos[segmento]
+
+    def contar(self, prefijo: str = '') -> int:
+        """
+        Número de colecciones bajo `prefijo` (ej: 'MODIS/061').
+        """
+        nodo = self._nodo(prefijo)
+        return nodo.total if nodo is not None else 0
+
+    def hijos(self, prefijo: str = '') -> List[Tuple[str, int, bool]]:
+        """
+        Siguiente nivel bajo `prefijo`.
+
+        Returns:
+            Lista de (ruta, colecciones en el subárbol, es_coleccion) ordenada
+            por ruta; vacía si el prefijo no existe
+        """
+        nodo = self._nodo(prefijo)
+        if nodo is None:
+            return []
+        base = '/'.join(self._segmentos(prefijo))
+        base = f"{base}/" if base else ''
+        return [(f"{base}{segmento}", hijo.total, hijo.es_coleccion)
+                for segmento, hijo in sorted(nodo.hijos.items())]
+
+    def colecciones(self, prefijo: str = '', limite: int = 0) -> List[str]:
+        """
+        IDs bajo `prefijo` en orden alfabético (0 = sin límite).
+        """
+        nodo = self._nodo(prefijo)
+        if nodo is None:
+            return []
+        resultado: List[str] = []
+        base = '/'.join(self._segmentos(prefijo))
+        pila = [(base, nodo)]
+        while pila and (not limite or len(resultado) < limite):
+            ruta, nodo = pila.pop()
+            if nodo.es_coleccion:
+                resultado.append(ruta)
+            pila.extend((f"{ruta}/{s}" if ruta else s, h) for s, h in sorted(nodo.hijos.items(), reverse=True))
+        return resultado
+
+
+# --- Búsqueda aproximada --------------------------------------------------------
+
+@lru_cache(maxsize=65536)
+def _trigramas_token(token: str) -> frozenset:
+    # Los tokens se repiten mucho entre colecciones ('copernicus', 'modis', 'surface')
+    relleno = f"  {token} "
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+
+def trigramas(texto: str) -> Set[str]:
+    """
+    Trigramas de cada token normalizado, con relleno para que inicios y
+    finales de palabra cuenten: 'sr' -> {'  s', ' sr', 'sr '}.
+    """
+    resultado: Set[str] = set()
+    for token in tokenizar(texto):
+        resultado |= _trigramas_token(token)
+    return resultado
+
+
+class IndiceTrigramas:
+    """
+    Índice de trigramas para búsquedas tolerantes a errores de tipeo
+    ('sentinl', 'S2_SR_HARMONISED').
+
+    Para acotar el costo de cada consulta, los candidatos salen solo de los
+    trigramas menos frecuentes de la consulta: quien alcance la similitud
+    mínima tiene que contener al menos uno de ellos (filtro por prefijo).
+    Como tope adicional se evalúan a lo sumo `max_candidatos`.
+    """
+
+    def __init__(self, max_candidatos: int = 5000):
+        self.max_candidatos = max_candidatos
+        self._postings: Dict[str, Set[str]] = {}
+        self._trigramas: Dict[str, frozenset] = {}
+
+    def __len__(self) -> int:
+        return len(self._trigramas)
+
+    def agregar(self, clave: str, texto: str) -> None:
+        """
+        Indexa (o re-indexa) `texto` bajo `clave`.
+        """
+        nuevos = frozenset(trigramas(texto))
+        previos = self._trigramas.get(clave)
+        if previos == nuevos:
+            return
+        if previos is not None:
+            self.eliminar(clave)
+        self._trigramas[clave] = nuevos
+        postings = self._postings
+        for t in nuevos:
+            posting = postings.get(t)
+            if posting is None:
+                postings[t] = {clave}
+            else:
+                posting.add(clave)
+
+    def eliminar(self, clave: str) -> None:
+        for t in self._trigramas.pop(clave, ()):
+            posting = self._postings[t]
+            posting.discard(clave)
+            if not posting:
+                del self._postings[t]
+
+    def buscar(self, consulta: str, limite: int = 10, minimo: float = 0.5,
+               completo: bool = False) -> List[Tuple[str, float]]:
+        """
+        Claves más parecidas a la consulta.
+
+        Args:
+            consulta: Texto con posibles errores
+            limite: Máximo de resultados
+            minimo: Similitud mínima (0 a 1)
+            completo: Si True la consulta es el texto completo (ej: un ID) y se
+                usa el coeficiente de Dice; si no, es un fragmento y cuenta la
+                fracción de sus trigramas presentes en el texto indexado
+
+        Returns:
+            Lista de (clave, similitud) de mayor a menor similitud
+        """
+        q = trigramas(consulta)
+        if not q:
+            return []
+        # Coincidencias necesarias para llegar a `minimo`
+        if completo:
+            necesarias = math.ceil(minimo * len(q) / (2 - minimo))
+        else:
+            necesarias = math.ceil(minimo * len(q))
+        necesarias = max(1, necesarias)
+        raros = sorted(q, key=lambda t: len(self._postings.get(t, ())))[:len(q) - necesarias + 1]
+
+        candidatos: Set[str] = set()
+        for t in raros:
+            candidatos.update(self._postings.get(t, ()))
+            if len(candidatos) >= self.max_candidatos:
+                break
+
+        # (similitud, trigramas del texto, clave): a igual similitud, primero los textos más cortos
+        resultado: List[Tuple[float, int, str]] = []
+        for clave in candidatos:
+            propios = self._trigramas[clave]
+            comunes = len(q & propios)
+            if comunes < necesarias:
+                continue
+            if completo:
+                similitud = 2 * comunes / (len(q) + len(propios))
+            else:
+                similitud = comunes / len(q)
+            if similitud >= minimo:
+                resultado.append((similitud, len(propios), clave))
+        mejores = heapq.nsmallest(limite, resultado, key=lambda x: (-x[0], x[1], x[2]))
+        return [(clave, similitud) for similitud, _, clave in mejores]
@@ -0,0 +1,111 @@
+"""
+Snapshot binario del catálogo parseado.
+
+Junto a `colecciones_gee.json` se guarda un archivo pickle con el catálogo ya
+deserializado. El snapshot lleva la firma del JSON del que proviene (mtime,
+tamaño y hash del contenido) y solo se usa si coincide con el JSON actual; el
+JSON sigue siendo la fuente de verdad.
+
+Formato: dos objetos pickle consecutivos, primero la cabecera
+`(VERSION, firma)` y luego el catálogo, para poder descartar un snapshot
+obsoleto sin deserializarlo completo.
+
+Los registros compactos (`records.RegistroColeccion`) se resuelven al cargar
+sin depender del nombre con que se importó el paquete (`gee_toolkit` o
+`src.gee_toolkit`, según el script).
+"""
+
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .records import RegistroColeccion
+
+logger = logging.getLogger(__name__)
+
+VERSION_SNAPSHOT = 3
+
+Firma = Tuple[int, int, str]
+
+
+class _Cargador(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        if name == RegistroColeccion.__name__ and module.rsplit('.', 1)[-1] == 'records':
+            return RegistroColeccion
+        return super().find_class(module, name)
+
+
+def ruta_snapshot(json_path: Path) -> Path:
+    """
+    Ruta del snapshot asociado a un JSON (ej: config/.colecciones_gee.json.snapshot).
+    """
+    return json_path.with_name(f".{json_path.name}.snapshot")
+
+
+def firma_contenido(json_path: Path, contenido: bytes) -> Firma:
+    """
+    Firma del JSON: (mtime en ns, tamaño, blake2b del contenido).
+
+    Args:
+        json_path: Ruta del JSON (para mtime)
+        contenido: Bytes del JSON tal como se leyeron o escribieron
+    """
+    st = os.stat(json_path)
+    return st.st_mtime_ns, len(contenido), hashlib.blake2b(contenido, digest_size=16).hexdigest()
+
+
+def cargar_snapshot(json_path: Path, firma: Firma) -> Optional[Dict[str, Any]]:
+    """
+    Carga el snapshot si existe y corresponde a la firma indicada.
+
+    Returns:
+        Catálogo deserializado, o None si no hay snapshot válido
+    """
+    ruta = ruta_snapshot(json_path)
+    try:
+        with open(ruta, 'rb') as f:
+            version, firma_guardada = _Cargador(f).load()
+            if version != VERSION_SNAPSHOT or tuple(firma_guardada) != tuple(firma):
+                logger.info(f"Snapshot obsoleto, se regenerará: {ruta}")
+                return None
+            # Sin GC durante la carga: el catálogo no tiene ciclos y el recolector
+            # se dispararía repetidamente mientras se crean miles de dicts
+            gc_activo = gc.isenabled()
+            gc.disable()
+            try:
+                return _Cargador(f).load()
+            finally:
+                if gc_activo:
+                    gc.enable()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Snapshot ilegible ({ruta}): {e}")
+        return None
+
+
+def guardar_snapshot(json_path: Path, catalogo: Dict[str, Any], firma: Firma) -> None:
+    """
+    Escribe el snapshot de forma atómica (temporal + `os.replace`).
+    Un fallo solo se registra: el snapshot es prescindible.
+    """
+    ruta = ruta_snapshot(json_path)
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile('wb', dir=ruta.parent, prefix=f"{ruta.name}.",
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            pickle.dump((VERSION_SNAPSHOT, firma), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(catalogo, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, ruta)
+        tmp_path = None
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el snapshot {ruta}: {e}")
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
@@ -0,0 +1,186 @@
+"""
+Backend SQLite opcional para el catálogo de colecciones.
+
+Cada colección es una fila con su registro completo serializado en JSON
+(`datos`) más las columnas `categoria`, `nivel` y `last_verified`, indexadas
+para consultar la base con SQL desde otras herramientas. `CatalogoGEE` carga
+el catálogo completo en memoria (con sus propios índices) y usa la base solo
+para persistir: cada escritura toca únicamente las filas modificadas. La base
+trabaja en modo WAL, así que los lectores (CLI interactiva, reportes) no
+bloquean al proceso de mantenimiento que escribe.
+
+El layout JSON de `config/colecciones_gee.json` se puede importar y exportar
+sin pérdida con `importar` / `exportar`.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from .records import a_json
+
+logger = logging.getLogger(__name__)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categorias (
+    categoria_id TEXT PRIMARY KEY,
+    orden INTEGER NOT NULL,
+    datos TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS colecciones (
+    collection_id TEXT PRIMARY KEY,
+    categoria TEXT NOT NULL,
+    nivel TEXT,
+    last_verified TEXT,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_colecciones_categoria ON colecciones(categoria);
+CREATE INDEX IF NOT EXISTS idx_colecciones_nivel ON colecciones(nivel COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_colecciones_last_verified ON colecciones(last_verified);
+"""
+
+
+def _fila_coleccion(collection_id: str, categoria: str, registro: Dict[str, Any]) -> Tuple[str, str, Any, Any, str]:
+    return (collection_id, categoria, registro.get('nivel'), registro.get('last_verified'),
+            json.dumps(registro, ensure_ascii=False, default=a_json))
+
+
+class AlmacenSQLite:
+    """
+    Catálogo persistido en una base SQLite con índices.
+
+    Una sola conexión compartida y protegida por un lock: las escrituras vienen
+    del hilo principal de `CatalogoGEE` y las consultas son cortas.
+    """
+
+    def __init__(self, ruta: Union[str, Path]):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.ruta), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_ESQUEMA)
+        self._conn.commit()
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaccion(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _consultar(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # --- Importación / exportación del layout JSON -------------------------
+
+    def vacio(self) -> bool:
+        return not self._consultar("SELECT 1 FROM categorias LIMIT 1")
+
+    def importar(self, catalogo: Dict[str, Any]) -> int:
+        """
+        Reemplaza todo el contenido de la base por un catálogo con el layout JSON.
+
+        Returns:
+            Número de colecciones importadas
+        """
+        filas = []
+        with self._transaccion() as conn:
+            conn.execute("DELETE FROM colecciones")
+            conn.execute("DELETE FROM categorias")
+            conn.execute("DELETE FROM metadata")
+            self._escribir_cabecera(conn, catalogo)
+            for cat_id, cat_info in catalogo.items():
+                if cat_id.startswith('_') or not isinstance(cat_info, dict): continue
+                for cid, registro in cat_info.get('colecciones', {}).items():
+                    filas.append(_fila_coleccion(cid, cat_id, registro))
+            conn.executemany("INSERT OR REPLACE INTO colecciones VALUES (?, ?, ?, ?, ?)", filas)
+        logger.info(f"Importadas {len(filas)} colecciones a {self.ruta}")
+        return len(filas)
+
+    def exportar(self) -> Dict[str, Any]:
+        """
+        Reconstruye el catálogo completo con el layout de `colecciones_gee.json`.
+        """
+        catalogo: Dict[str, Any] = {}
+        for clave, valor in self._consultar("SELECT clave, valor FROM metadata"):
+            catalogo[clave] = json.loads(valor)
+        for cat_id, datos in self._consultar("SELECT categoria_id, datos FROM categorias ORDER BY orden"):
+            info = json.loads(datos)
+            info['colecciones'] = {}
+            catalogo[cat_id] = info
+        for cid, cat_id, datos in self._consultar(
+                "SELECT collection_id, categoria, datos FROM colecciones ORDER BY rowid"):
+            catalogo.setdefault(cat_id, {'colecciones': {}})['colecciones'][cid] = json.loads(datos)
+        return catalogo
+
+    # --- Escritura incremental ---------------------------------------------
+
+    def guardar(self, catalogo: Dict[str, Any], modificados: Iterable[str]) -> None:
+        """
+        Escribe solo las colecciones modificadas (upsert si siguen en el
+        catálogo, delete si se eliminaron) más metadata y categorías.
+        
+        Si otro proceso guardó la misma colección con un `last_verified` más
+        reciente, su fila se conserva. Como en la fusión del JSON (ver
+        `catalog_merge.py`), un `last_verified` ausente cuenta como el más
+        antiguo: un registro sin verificar no pisa una fila verificada.
+
+        Args:
+            catalogo: Catálogo en memoria con el layout JSON
+            modificados: IDs afectados desde la última escritura
+        """
+        pendientes: Set[str] = set(modificados)
+        filas = []
+        for cat_id, cat_info in catalogo.items():
+            if not pendientes: break
+            if cat_id.startswith('_') or not isinstance(cat_info, dict): continue
+            registros = cat_info.get('colecciones', {})
+            for cid in [c for c in pendientes if c in registros]:
+                filas.append(_fila_coleccion(cid, cat_id, registros[cid]))
+                pendientes.discard(cid)
+
+        with self._transaccion() as conn:
+            self._escribir_cabecera(conn, catalogo)
+            escritas = conn.executemany(
+                "INSERT INTO colecciones VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(collection_id) DO UPDATE SET categoria=excluded.categoria, "
+                "nivel=excluded.nivel, last_verified=excluded.last_verified, datos=excluded.datos "
+                "WHERE COALESCE(excluded.last_verified, '') >= COALESCE(colecciones.last_verified, '')",
+                filas).rowcount
+            conn.executemany("DELETE FROM colecciones WHERE collection_id = ?", [(c,) for c in pendientes])
+        if escritas < len(filas):
+            logger.info(f"{len(filas) - escritas} colección(es) conservan la fila de la base "
+                        f"(last_verified más reciente que el propio)")
+
+    @staticmethod
+    def _escribir_cabecera(conn: sqlite3.Connection, catalogo: Dict[str, Any]) -> None:
+        # Metadata y datos de categoría (sin sus colecciones); son pocas filas
+        orden = 0
+        for clave, valor in catalogo.items():
+            if clave.startswith('_'):
+                conn.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                             (clave, json.dumps(valor, ensure_ascii=False)))
+            elif isinstance(valor, dict):
+                info = {k: v for k, v in valor.items() if k != 'colecciones'}
+                conn.execute("INSERT OR REPLACE INTO categorias VALUES (?, ?, ?)",
+                             (clave, orden, json.dumps(info, ensure_ascii=False)))
+                orden += 1